@@ -0,0 +1,177 @@
+"""
+Golden-output check and micro-benchmark for cleanup.py.
+
+The legacy_* functions are the original per-paragraph implementations from main.py.
+Their outputs on the corpus are frozen in golden/cleanup.json; the compiled versions
+must reproduce them byte for byte.
+
+    python -m benchmarks.cleanup_bench                 # check against golden + time both
+    python -m benchmarks.cleanup_bench --write-golden  # regenerate golden from the legacy code
+"""
+import os
+import re
+import sys
+import json
+import random
+import sqlite3
+import timeit
+
+import smartypants
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cleanup
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "cleanup.json")
+CHAPTERS_DB = os.path.join("data", "chapters.db")
+
+LEGACY_AD_KEYWORDS = ["Discord", "Ko-fi", "Patreon", "Want more chapters", "Next chapter", "Previous chapter", "Consider supporting", "buymeacoffee", "TranslatingNovice", "Z0Rel", "BlueMangoAde"]
+
+def legacy_clean_text_node_content(text):
+    text = text.replace("‘'", '"').replace("'‘", '"')
+    text = text.replace("’'", '"').replace("'’", '"')
+    text = text.replace("‘‘", '"').replace("’’", '"')
+    text = text.replace("''", '"')
+    text = text.replace('“', '"').replace('”', '"')
+    text = text.replace('‘', "'").replace('’', "'")
+    return text
+
+def legacy_format_html_content(text):
+    pattern_italic = r"(?<=[ >\n])'((?:[^'<]|(?<=\w)'(?=\w))+?)'(?=[ <.,;:!?\n])"
+    text = re.sub(pattern_italic, r"<em>'\1'</em>", text)
+    pattern_bold = r"\[(.*?)\]"
+    text = re.sub(pattern_bold, r"<strong>[\1]</strong>", text)
+    return text
+
+def legacy_apply_smartypants(text):
+    attr = smartypants.Attr.q | smartypants.Attr.d | smartypants.Attr.e | smartypants.Attr.u
+    return smartypants.smartypants(text, attr=attr)
+
+def legacy_contains_ad(text):
+    return any(kw.lower() in text.lower() for kw in LEGACY_AD_KEYWORDS)
+
+def legacy_title_match(line, title_pattern):
+    title_search_pattern = title_pattern if title_pattern else r"(Chapter \d+|Author's Q&A \(\d+\)|Author's Tidbit \(\d+\))"
+    match = re.search(rf'^({title_search_pattern}([:\s\-].*)?)$', line, re.I)
+    if not match and title_pattern:
+        match = re.search(rf'^({title_pattern}(\s+.*)?)$', line, re.I)
+    if not match:
+        match = re.search(r'^(Chapter \d+([:\s\-].*)?)$', line, re.I)
+    return match.group(1) if match else None
+
+def new_title_match(line, title_pattern):
+    search_re, slug_re = cleanup.title_regexes(title_pattern)
+    match = search_re.search(line)
+    if not match and slug_re:
+        match = slug_re.search(line)
+    if not match:
+        match = cleanup.CHAPTER_TITLE_RE.search(line)
+    return match.group(1) if match else None
+
+TITLE_PATTERNS = ["", "Prologue", "Chapter 12", "Chapter 807"]
+
+def legacy_outputs(text):
+    return {
+        "clean": legacy_clean_text_node_content(text),
+        "format": legacy_format_html_content(text),
+        "smartypants": legacy_apply_smartypants(text),
+        "ad": legacy_contains_ad(text),
+        "titles": [legacy_title_match(text, p) for p in TITLE_PATTERNS],
+    }
+
+def new_outputs(text):
+    return {
+        "clean": cleanup.clean_text_node_content(text),
+        "format": cleanup.format_html_content(text),
+        "smartypants": cleanup.apply_smartypants(text),
+        "ad": cleanup.contains_ad(text),
+        "titles": [new_title_match(text, p) for p in TITLE_PATTERNS],
+    }
+
+EDGE_CASES = [
+    "", "plain text", "''", "‘'", "'‘", "’'", "'’", "‘‘", "’’", "'‘'", "‘''", "''‘’", "’‘", "‘’'",
+    "He said, “I’ll go.”", "<p>She thought, 'this is it.' Then left.</p>",
+    "<p>[Status Window] opened. [Skill: Sword]</p>", "<p>'don't stop' and 'it's fine'!</p>",
+    "Join our DISCORD server", "ko-fi.com/someone", "Support on Ko-fi", "Next Chapter >>",
+    "Chapter 12: The ‘Sword’ Path", "Chapter 12", "chapter 12 - lowercase", "Prologue", "Prologue: Before",
+    "Author's Q&A (3): Questions", "Author's Tidbit (2)", "Chapter 807: First", "Chapter 8071 nope",
+    "Dashes -- and --- and ellipses... here", "<em>'inner'</em> text\n'line start.'",
+]
+
+def random_corpus(count=500, seed=1234):
+    rng = random.Random(seed)
+    alphabet = list("abc XYZ.,!?-\n") + ["'", "‘", "’", "“", "”", '"', "[", "]", "<p>", "</p>", "<em>", "</em>", "don't", "Discord", "Chapter 5", "..."]
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 60))) for _ in range(count)]
+
+def synthetic_paragraphs(count=5000, seed=99):
+    """Prose-shaped paragraphs for timing when there is no local chapter cache."""
+    rng = random.Random(seed)
+    words = ["the", "elder", "spirit", "root", "sect", "cultivator", "sword", "qi", "mountain", "don't", "it's", "said", "looked", "at", "and", "a", "of"]
+    extras = ["“I’ll go,” he said.", "‘Strange,’ I thought.", "[Skill: Sword Aura]", "...", "--", "'really?'"]
+    paragraphs = []
+    for _ in range(count):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(10, 60)))
+        if rng.random() < 0.5:
+            sentence += " " + rng.choice(extras)
+        paragraphs.append(f"<p>{sentence.capitalize()}.</p>")
+    return paragraphs
+
+def chapter_paragraphs(limit=5000):
+    """Real paragraphs from the local chapter cache, if there is one."""
+    if not os.path.exists(CHAPTERS_DB):
+        return []
+    conn = sqlite3.connect(CHAPTERS_DB)
+    paragraphs = []
+    for (data,) in conn.execute("SELECT data FROM chapters"):
+        content = json.loads(data).get("content", "")
+        paragraphs.extend(p for p in content.split("\n") if p)
+        if len(paragraphs) >= limit:
+            break
+    conn.close()
+    return paragraphs[:limit]
+
+def write_golden():
+    corpus = EDGE_CASES + random_corpus()
+    golden = [{"input": text, **legacy_outputs(text)} for text in corpus]
+    with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, ensure_ascii=False, indent=1)
+    print(f"Wrote {len(golden)} golden cases to {GOLDEN_FILE}")
+
+def check_golden():
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    mismatches = 0
+    for case in golden:
+        expected = {k: v for k, v in case.items() if k != "input"}
+        actual = new_outputs(case["input"])
+        if actual != expected:
+            mismatches += 1
+            print(f"Mismatch for {case['input']!r}:\n  expected {expected}\n  actual   {actual}")
+    # Real chapter text is compared live against the legacy code
+    live = chapter_paragraphs()
+    for text in live:
+        if new_outputs(text) != legacy_outputs(text):
+            mismatches += 1
+            print(f"Mismatch for cached paragraph {text[:80]!r}")
+    print(f"Checked {len(golden)} golden cases and {len(live)} cached paragraphs: {mismatches} mismatches")
+    return mismatches == 0
+
+def paragraph_pass(texts, clean, contains_ad, title_match, fmt):
+    # Roughly what process_chapter_blocks does per paragraph
+    for text in texts:
+        contains_ad(text)
+        title_match(text, "Chapter 12")
+        fmt(clean(text))
+
+def benchmark(number=5):
+    texts = chapter_paragraphs() or synthetic_paragraphs()
+    legacy = timeit.timeit(lambda: paragraph_pass(texts, legacy_clean_text_node_content, legacy_contains_ad, legacy_title_match, legacy_format_html_content), number=number)
+    new = timeit.timeit(lambda: paragraph_pass(texts, cleanup.clean_text_node_content, cleanup.contains_ad, new_title_match, cleanup.format_html_content), number=number)
+    print(f"{len(texts)} paragraphs x {number}: legacy {legacy:.3f}s, compiled {new:.3f}s ({legacy / new:.1f}x)")
+
+if __name__ == "__main__":
+    if "--write-golden" in sys.argv:
+        write_golden()
+    else:
+        ok = check_golden()
+        benchmark()
+        sys.exit(0 if ok else 1)
@@ -0,0 +1,348 @@
+"""
+Local stand-in for the series on wetriedtls.com, for offline benchmarks.
+
+Serves a synthetic series page shaped like the real one: the "I understand" popup,
+the cover, a "Chapters list" tab filled from a paginated JSON listing API with
+numbered pagination buttons, and chapter pages with server-rendered #reader-container
+markup, ad paragraphs and the merged chapter-807-808 page. Chapter pages answer with
+ETag/Last-Modified and honour conditional requests.
+
+Latency and error rate are configurable; errors (503) are only injected into chapter
+pages so the metadata scan stays deterministic.
+
+    python -m benchmarks.fixture_site [--chapters=850] [--port=8000] [--latency=0.05] [--error-rate=0.0] [--series=1]
+
+series > 1 serves that many copies of the series under different slugs (see series_slugs),
+for multi-series runs. Scrape it with main.DEFAULT_SERIES.replace(base_url=site.base_url).
+"""
+import sys
+import json
+import html
+import time
+import zlib
+import struct
+import random
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+SERIES_SLUG = "a-regressors-tale-of-cultivation"
+SERIES_PATH = f"/series/{SERIES_SLUG}"
+LISTING_PATH = "/api/chapters/query"
+COVER_PATH = "/cover.png"
+MERGED_SLUG = "chapter-807-808"
+FIRST_RELEASE = datetime(2023, 1, 1, 12, 0)
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+AD_PARAGRAPHS = [
+    "Join our Discord for release updates!",
+    "Consider supporting us on Ko-fi to get chapters early.",
+    "Want more chapters? Check out our Patreon.",
+    "Next chapter",
+]
+SUBTITLE_WORDS = ["Sword", "Elder", "Foundation", "Pill", "Mountain", "Sect", "Qi", "Jade", "Formation", "Tribulation", "Spirit", "Lotus"]
+
+POPUP_HTML = """<div id="popup" style="position:fixed;inset:0;background:rgba(0,0,0,.6);z-index:10">
+<div style="background:#fff;margin:20vh auto;width:300px;padding:1em"><p>This series contains mature themes.</p>
+<button id="consent">I understand</button></div></div>
+<script>document.getElementById('consent').onclick = () => {
+  document.cookie = 'consent=1; path=/'; document.getElementById('popup').remove();
+};</script>"""
+
+SERIES_SCRIPT = """<script>
+const LISTING = '__LISTING__';
+let lastPage = 1;
+async function loadPage(n) {
+  const resp = await fetch(LISTING + '&page=' + n);
+  const payload = await resp.json();
+  lastPage = payload.meta.last_page;
+  document.getElementById('chapters').innerHTML = payload.data.map(c => {
+    const date = new Date(c.created_at);
+    const shown = String(date.getUTCMonth() + 1).padStart(2, '0') + '/' + String(date.getUTCDate()).padStart(2, '0') + '/' + date.getUTCFullYear();
+    return '<a href="__SERIES_PATH__/' + c.chapter_slug + '"><li>' +
+      '<div>' + c.chapter_name + '</div>' + (c.chapter_title ? '<div>' + c.chapter_title + '</div>' : '') +
+      '<div>' + shown + '</div>' + (c.price ? '<div>Paid</div>' : '') + '</li></a>';
+  }).join('');
+  const pages = [];
+  for (let i = 1; i <= lastPage; i++) pages.push('<li><button data-page="' + i + '">' + i + '</button></li>');
+  if (n < lastPage) pages.push('<li><button data-page="' + (n + 1) + '">Next</button></li>');
+  document.getElementById('pager').innerHTML = pages.join('');
+}
+document.getElementById('pager').onclick = e => {
+  const page = e.target.getAttribute('data-page');
+  if (page) loadPage(parseInt(page, 10));
+};
+document.getElementById('tab-chapters').onclick = () => {
+  document.getElementById('radix-:r1:-content-chapters_list').hidden = false;
+  loadPage(1);
+};
+</script>"""
+
+def cover_png(width=300, height=450):
+    """A small gradient PNG, built without Pillow so the fixture has no dependencies."""
+    rows = b"".join(
+        b"\x00" + b"".join(bytes((x * 255 // width, y * 255 // height, 128)) for x in range(width))
+        for y in range(height)
+    )
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 6)) + chunk(b"IEND", b"")
+
+class FixtureSite:
+    """
+    The synthetic series and an HTTP server for it, run in a background thread.
+
+    chapters: number of chapter numbers (807 and 808 share one page once there are 808).
+    paid: the newest chapters marked paid, which the scraper must skip.
+    latency: mean delay in seconds for listing and chapter requests (uniform +-50%).
+    error_rate: share of chapter page requests answered with 503.
+    series: number of series served; all have the same chapters.
+    """
+
+    def __init__(self, chapters=850, page_size=20, paid=3, latency=0.05, error_rate=0.0, seed=1, host="127.0.0.1", port=0,
+                 series=1):
+        self.series_slugs = [SERIES_SLUG] + [f"{SERIES_SLUG}-{n}" for n in range(2, series + 1)]
+        self.page_size = page_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+        self.server = None
+        self.thread = None
+        self.cover = cover_png()
+
+        # Oldest first; the listing shows them newest first like the site does
+        self.chapters = []
+        number = 1
+        while number <= chapters:
+            if number == 807 and chapters >= 808:
+                self.chapters.append({"slug": MERGED_SLUG, "number": 807, "name": "Chapter 807-808", "subtitle": None})
+                number = 809
+                continue
+            self.chapters.append({"slug": f"chapter-{number}", "number": number, "name": f"Chapter {number}",
+                                  "subtitle": self._subtitle(number)})
+            number += 1
+        for i, chapter in enumerate(self.chapters):
+            chapter["created_at"] = FIRST_RELEASE + timedelta(days=i)
+            chapter["paid"] = i >= len(self.chapters) - paid
+        self.by_slug = {c["slug"]: c for c in self.chapters}
+        self.pages = {}
+
+    def _subtitle(self, number):
+        rng = random.Random(self.seed * 100003 + number)
+        return f"The {rng.choice(SUBTITLE_WORDS)} of {rng.choice(SUBTITLE_WORDS)}" if number % 3 else None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.server.server_address[1]}"
+
+    @property
+    def series_url(self):
+        return self.base_url + SERIES_PATH
+
+    def free_chapters(self):
+        return [c for c in self.chapters if not c["paid"]]
+
+    def metadata_obj(self, series_slug=SERIES_SLUG):
+        """What a full metadata scan of one series produces, for runs that skip the browser."""
+        series_url = f"{self.base_url}/series/{series_slug}"
+        metadata = {}
+        for c in self.free_chapters():
+            title = f"{c['name']}: {c['subtitle']}" if c["subtitle"] else c["name"]
+            metadata[c["slug"]] = {
+                "url": f"{series_url}/{c['slug']}", "title": title,
+                "release_date": c["created_at"].strftime("%m/%d/%Y"), "slug": c["slug"],
+            }
+        return {"metadata": metadata, "order": [c["slug"] for c in self.free_chapters()], "cover_image_url": self.base_url + COVER_PATH}
+
+    # Pages
+
+    def series_page(self, series_slug=SERIES_SLUG):
+        listing = f"{LISTING_PATH}?series={series_slug}&perPage={self.page_size}"
+        script = SERIES_SCRIPT.replace("__LISTING__", listing).replace("__SERIES_PATH__", f"/series/{series_slug}")
+        return (
+            "<!DOCTYPE html><html><head><title>A Regressor's Tale of Cultivation</title></head><body>"
+            f"{POPUP_HTML}<main><div class=\"lg:col-span-3\"><div><img class=\"rounded\" src=\"{self.base_url}{COVER_PATH}\" width=\"300\" height=\"450\" alt=\"\"></div></div>"
+            "<div role=\"tablist\"><button id=\"tab-info\">Info</button><button id=\"tab-chapters\">Chapters list</button></div>"
+            "<div role=\"tabpanel\" id=\"radix-:r1:-content-chapters_list\" hidden><ul id=\"chapters\"></ul><ul id=\"pager\"></ul></div>"
+            f"</main>{script}</body></html>"
+        )
+
+    def listing(self, page):
+        newest_first = self.chapters[::-1]
+        last_page = max(1, -(-len(newest_first) // self.page_size))
+        entries = newest_first[(page - 1) * self.page_size:page * self.page_size]
+        return {
+            "data": [
+                {
+                    "chapter_slug": c["slug"], "chapter_name": c["name"], "chapter_title": c["subtitle"],
+                    "created_at": c["created_at"].isoformat() + "Z", "price": 50 if c["paid"] else 0,
+                }
+                for c in entries
+            ],
+            "meta": {"current_page": page, "last_page": last_page, "total": len(newest_first)},
+        }
+
+    def _paragraphs(self, rng, count):
+        paragraphs = []
+        for i in range(count):
+            kind = rng.random()
+            if kind < 0.15:
+                paragraphs.append(f"“I’ll see to it,” the {rng.choice(SUBTITLE_WORDS).lower()} elder said, and left without another word.")
+            elif kind < 0.25:
+                paragraphs.append(f"'Was it always like this?' I wondered, looking at the {rng.choice(SUBTITLE_WORDS).lower()}.")
+            elif kind < 0.3:
+                paragraphs.append(f"[Skill: {rng.choice(SUBTITLE_WORDS)} Art, Level {rng.randint(1, 9)}]")
+            else:
+                words = [rng.choice(SUBTITLE_WORDS).lower() for _ in range(rng.randint(25, 60))]
+                paragraphs.append(f"Paragraph {i}: " + " ".join(words) + ".")
+        for _ in range(rng.randint(1, 3)):
+            paragraphs.insert(rng.randrange(len(paragraphs) + 1), rng.choice(AD_PARAGRAPHS))
+        return paragraphs
+
+    def chapter_page(self, slug):
+        """The page body; cached, so the ETag is stable across requests."""
+        if slug in self.pages:
+            return self.pages[slug]
+        chapter = self.by_slug[slug]
+        rng = random.Random(self.seed * 100003 + chapter["number"] * 7)
+        if slug == MERGED_SLUG:
+            blocks = [f"Chapter 807: {self._subtitle(807) or 'The Last Day'}"] + self._paragraphs(rng, rng.randint(40, 80))
+            blocks += [f"Chapter 808: {self._subtitle(808) or 'Afterword'}"] + self._paragraphs(rng, rng.randint(40, 80))
+        else:
+            heading = f"{chapter['name']}: {chapter['subtitle']}" if chapter["subtitle"] else chapter["name"]
+            blocks = [heading] + self._paragraphs(rng, rng.randint(40, 80))
+        reader = "".join(f"<p>{html.escape(b, quote=False)}</p>" for b in blocks)
+        nav = "".join(f'<div class="nav-item"><a href="{SERIES_PATH}/chapter-{i}">Chapter {i}</a></div>' for i in range(50))
+        scripts = "".join(f'<script>self.__next_f.push([1,"{"x" * 2000}"])</script>' for _ in range(10))
+        page = (
+            f"<!DOCTYPE html><html><head><title>{html.escape(chapter['name'])}</title>{scripts}</head><body>"
+            f"{POPUP_HTML}<nav>{nav}</nav><main><div id=\"reader-container\">{reader}</div></main></body></html>"
+        ).encode("utf-8")
+        self.pages[slug] = page
+        return page
+
+    # Server
+
+    def _delay(self):
+        if self.latency:
+            with self.rng_lock:
+                delay = self.latency * self.rng.uniform(0.5, 1.5)
+            time.sleep(delay)
+
+    def _fails(self):
+        if not self.error_rate:
+            return False
+        with self.rng_lock:
+            return self.rng.random() < self.error_rate
+
+    def _count(self, kind, status):
+        key = f"{kind} {status}"
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def handle(self, path, query, headers):
+        """Returns (kind, status, content_type, body, extra headers) for one GET."""
+        if path == COVER_PATH:
+            return "cover", 200, "image/png", self.cover, {"ETag": '"cover"'}
+        if path == LISTING_PATH:
+            self._delay()
+            try:
+                page = max(1, int(query.get("page", ["1"])[0]))
+            except ValueError:
+                page = 1
+            return "listing", 200, "application/json", json.dumps(self.listing(page)).encode("utf-8"), {}
+        parts = path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "series" and parts[1] in self.series_slugs:
+            return "series", 200, "text/html; charset=utf-8", self.series_page(parts[1]).encode("utf-8"), {}
+        if len(parts) == 3 and parts[0] == "series" and parts[1] in self.series_slugs and parts[2] in self.by_slug:
+            self._delay()
+            if self._fails():
+                return "chapter", 503, "text/plain", b"Service Unavailable", {"Retry-After": "1"}
+            body = self.chapter_page(parts[2])
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            validators = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+            if headers.get("If-None-Match") == etag:
+                return "chapter", 304, None, b"", validators
+            return "chapter", 200, "text/html; charset=utf-8", body, validators
+        return "other", 404, "text/plain", b"Not Found", {}
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real site
+
+            def do_GET(self):
+                parts = urlparse(self.path)
+                kind, status, content_type, body, extra = site.handle(parts.path, parse_qs(parts.query), self.headers)
+                site._count(kind, status)
+                self.send_response(status)
+                if content_type:
+                    self.send_header("Content-Type", content_type)
+                for name, value in extra.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+def options(argv, defaults, usage=None):
+    """
+    Parses --name=value flags into a copy of defaults, converting to each default's type.
+    --help (or -h) prints usage, or the options and their defaults, and exits.
+    """
+    if "--help" in argv or "-h" in argv:
+        print(usage.strip() if usage else "Options: " + " ".join(f"--{k.replace('_', '-')}={v}" for k, v in defaults.items()))
+        sys.exit(0)
+    values = dict(defaults)
+    for arg in argv:
+        if not arg.startswith("--"):
+            continue
+        name, _, value = arg[2:].partition("=")
+        key = name.replace("-", "_")
+        if key not in values:
+            print(f"Warning: Unknown option {arg}")
+            continue
+        default = values[key]
+        if isinstance(default, bool):
+            values[key] = True
+        elif value:
+            values[key] = type(default)(value) if default is not None else float(value)
+    return values
+
+if __name__ == "__main__":
+    opts = options(sys.argv[1:], {"chapters": 850, "page_size": 20, "paid": 3, "latency": 0.05, "error_rate": 0.0, "port": 8000, "series": 1},
+                   usage=__doc__)
+    site = FixtureSite(opts["chapters"], opts["page_size"], opts["paid"], opts["latency"], opts["error_rate"], port=opts["port"],
+                       series=opts["series"])
+    site.start()
+    print(f"Serving {len(site.chapters)} chapters at {site.series_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
@@ -0,0 +1,77 @@
+"""
+Parse-time and memory comparison for chapter pages.
+
+Compares the original full-document 'html.parser' parse with the scoped parse in
+main.parse_chapter_html (HTML_PARSER plus a SoupStrainer on #reader-container),
+and checks that both produce identical chapter output.
+
+    python -m benchmarks.parse_bench [PAGES_DIR]
+
+PAGES_DIR holds saved chapter pages named <slug>.html (e.g. saved from the browser);
+without one, synthetic pages shaped like the site's are used.
+"""
+import os
+import sys
+import time
+import random
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main
+
+def reference_parse(content, slug):
+    soup = BeautifulSoup(content, 'html.parser')
+    container = soup.find(id="reader-container")
+    if not container:
+        return None
+    blocks = [
+        {"tag": p.name, "html": str(p), "texts": [str(t) for t in p.strings]}
+        for p in container.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+    ]
+    return main.process_chapter_blocks(blocks, slug)
+
+def synthetic_page(number, rng):
+    paragraphs = "\n".join(
+        f"<p>Paragraph {i}: he said, “I’ll go,” and the ‘elder’ nodded &amp; left. [Skill: Sword]</p>"
+        for i in range(rng.randint(60, 120))
+    )
+    chrome = "\n".join(f'<div class="nav-item"><a href="/series/x/chapter-{i}">Chapter {i}</a></div>' for i in range(300))
+    scripts = "\n".join(f'<script>self.__next_f.push([1,"{"x" * 2000}"])</script>' for _ in range(20))
+    return (
+        f"<!DOCTYPE html><html><head><title>Chapter {number}</title>{scripts}</head><body>"
+        f"<nav>{chrome}</nav><main><div id=\"reader-container\"><p>Chapter {number}: Title</p>{paragraphs}"
+        f"<p>Join our Discord!</p></div></main><footer>{chrome}</footer></body></html>"
+    )
+
+def load_pages(pages_dir):
+    if pages_dir:
+        pages = []
+        for name in sorted(os.listdir(pages_dir)):
+            if name.endswith(".html"):
+                with open(os.path.join(pages_dir, name), 'r', encoding='utf-8') as f:
+                    pages.append((name[:-5], f.read()))
+        return pages
+    rng = random.Random(7)
+    return [(f"chapter-{n}", synthetic_page(n, rng)) for n in range(1, 21)]
+
+def measure(parse, pages):
+    tracemalloc.start()
+    start = time.perf_counter()
+    outputs = [parse(content, slug) for slug, content in pages]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return outputs, elapsed, peak
+
+if __name__ == "__main__":
+    pages = load_pages(sys.argv[1] if len(sys.argv) > 1 else None)
+    ref_out, ref_time, ref_peak = measure(reference_parse, pages)
+    new_out, new_time, new_peak = measure(main.parse_chapter_html, pages)
+    mismatches = [slug for (slug, _), a, b in zip(pages, ref_out, new_out) if a != b]
+    print(f"{len(pages)} pages")
+    print(f"  html.parser, full tree: {ref_time:.3f}s, peak {ref_peak / 1024 / 1024:.1f} MiB")
+    print(f"  {main.HTML_PARSER}, scoped:         {new_time:.3f}s, peak {new_peak / 1024 / 1024:.1f} MiB")
+    print(f"  Output mismatches: {len(mismatches)}" + (f" ({', '.join(mismatches)})" if mismatches else ""))
+    sys.exit(1 if mismatches else 0)
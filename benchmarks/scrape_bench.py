@@ -0,0 +1,265 @@
+"""
+End-to-end scraper benchmark against the local fixture site (benchmarks/fixture_site.py).
+
+Runs the three stages of a full build in a scratch directory and records, per stage,
+wall time, peak RSS of this process and its children (Chromium, parse workers), and
+stage-specific numbers: chapters found by generate_metadata_async, chapters/sec and
+p50/p95 fetch latency for the chapter pipeline, and build time and size for create_epub.
+Results are written to JSON; --compare prints the change against an earlier run.
+
+--series=N updates N copies of the series at once through one main.ScrapeEngine (shared
+browser, concurrency and rate budget), the way `main.py --series=FILE` does; chapters/sec
+is then the total across series.
+
+--shards=K generates chapters in K worker processes (main.ShardedPipeline), each with its
+own browser and a 1/K share of the concurrency and rate budget.
+
+    python -m benchmarks.scrape_bench [--chapters=850] [--latency=0.05] [--error-rate=0.0]
+        [--max-rps=10] [--series=1] [--shards=1] [--http-only] [--output=PATH] [--compare=PATH] [--keep]
+
+--http-only skips the browser: metadata comes straight from the fixture and chapters
+are fetched with FETCH_BACKEND="http". --max-rps=0 lifts the request rate ceiling.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import main
+from benchmarks.fixture_site import FixtureSite, options
+
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+DEFAULTS = {
+    "chapters": 850, "page_size": 20, "paid": 3, "latency": 0.05, "error_rate": 0.0, "seed": 1,
+    "max_rps": main.MAX_REQUESTS_PER_SECOND, "series": 1, "shards": 1, "http_only": False, "output": "", "compare": "", "keep": False,
+}
+
+class PeakRss:
+    """
+    Peak RSS of this process plus its children while the block runs. Sampled with psutil
+    when it is installed; otherwise getrusage, which only sees children that have exited.
+    """
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = 0
+        self.source = "psutil" if main.psutil is not None else "getrusage"
+        self.stop = threading.Event()
+        self.thread = None
+
+    def _sample(self):
+        while not self.stop.is_set():
+            self.peak = max(self.peak, main.browser_rss_bytes())
+            self.stop.wait(self.interval)
+
+    def __enter__(self):
+        if self.source == "psutil":
+            self.thread = threading.Thread(target=self._sample, daemon=True)
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.thread is not None:
+            self.stop.set()
+            self.thread.join()
+            self.peak = max(self.peak, main.browser_rss_bytes())
+        else:
+            # ru_maxrss is in KiB on Linux
+            self.peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                         + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * 1024
+
+    @property
+    def peak_mb(self):
+        return round(self.peak / 1024 / 1024, 1)
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+def rounded(value, digits=3):
+    return round(value, digits) if value is not None else None
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+async def bench_metadata(site, session, series_list, opts):
+    if opts["http_only"]:
+        return [site.metadata_obj(series.slug) for series in series_list], {"skipped": True}
+    before = dict(site.stats)
+    with PeakRss() as rss:
+        start = time.perf_counter()
+        metadata_objs = await asyncio.gather(*(
+            main.generate_metadata_async(session=session, series=series) for series in series_list
+        ))
+        elapsed = time.perf_counter() - start
+    found = sum(len(m.get("order", [])) for m in metadata_objs)
+    return metadata_objs, {
+        "seconds": rounded(elapsed),
+        "chapters_found": found,
+        "chapters_expected": len(site.free_chapters()) * len(series_list),
+        "listing_requests": site.stats.get("listing 200", 0) - before.get("listing 200", 0),
+        "cover_found": all(m.get("cover_image_url") for m in metadata_objs),
+        "peak_rss_mb": rss.peak_mb,
+    }
+
+async def bench_chapters(engine, metadata_objs, stores):
+    runs = []
+    for metadata_obj, chapters_data in zip(metadata_objs, stores):
+        metadata = metadata_obj["metadata"]
+        items = [(metadata[slug]["url"], slug, metadata[slug].get("title")) for slug in metadata_obj["order"]]
+        runs.append((engine.pipeline(chapters_data), items))
+    with PeakRss() as rss:
+        start = time.perf_counter()
+        await asyncio.gather(*(pipeline.run(items) for pipeline, items in runs))
+        elapsed = time.perf_counter() - start
+    for pipeline, _ in runs:
+        print(pipeline.summary())
+    print(engine.limiter.summary())
+    total = sum(len(items) for _, items in runs)
+    failed = sum(len(pipeline.failed) for pipeline, _ in runs)
+    generated = total - failed
+    latencies = [latency for pipeline, _ in runs for latency in pipeline.fetch_latencies]
+    backends = [backend for pipeline, _ in runs for backend in pipeline.backend_report.values()]
+    return {
+        "seconds": rounded(elapsed),
+        "chapters": generated,
+        "failed": failed,
+        "chapters_per_sec": rounded(generated / elapsed if elapsed else 0.0, 2),
+        "fetch_p50_s": rounded(percentile(latencies, 50)),
+        "fetch_p95_s": rounded(percentile(latencies, 95)),
+        "fetch_max_s": rounded(max(latencies) if latencies else None),
+        "deferred_retries": sum(pipeline.retries for pipeline, _ in runs),
+        "circuit_trips": engine.breaker.trips + sum(getattr(pipeline, "breaker_trips", 0) for pipeline, _ in runs),
+        "shard_restarts": sum(getattr(pipeline, "restarts", 0) for pipeline, _ in runs),
+        "concurrency_peak": engine.limiter.peak_limit,
+        "concurrency_final": engine.limiter.limit,
+        "via_http": backends.count("http"),
+        "via_browser": backends.count("browser"),
+        "peak_rss_mb": rss.peak_mb,
+    }
+
+def bench_epub(series_list, metadata_objs, stores):
+    with PeakRss() as rss:
+        start = time.perf_counter()
+        for series, metadata_obj, chapters_data in zip(series_list, metadata_objs, stores):
+            main.create_epub(metadata_obj, chapters_data, incremental=False, series=series)
+        full = time.perf_counter() - start
+    # Second build with nothing changed: only the up-to-date check should run
+    start = time.perf_counter()
+    for series, metadata_obj, chapters_data in zip(series_list, metadata_objs, stores):
+        main.create_epub(metadata_obj, chapters_data, series=series)
+    noop = time.perf_counter() - start
+    return {
+        "seconds": rounded(full),
+        "noop_seconds": rounded(noop),
+        "epub_mb": round(sum(os.path.getsize(series.output_epub) for series in series_list) / 1024 / 1024, 2),
+        "writer": main.EPUB_WRITER,
+        "peak_rss_mb": rss.peak_mb,
+    }
+
+def fixture_series(site):
+    """A main.Series per series the fixture serves; the first is DEFAULT_SERIES pointed at the fixture."""
+    first = main.DEFAULT_SERIES.replace(base_url=site.base_url)
+    return [first] + [
+        first.replace(slug=slug, title=f"{first.title} {n}", data_dir=os.path.join(main.DATA_DIR, slug), output_epub=None, identifier=None)
+        for n, slug in enumerate(site.series_slugs[1:], 2)
+    ]
+
+async def run_benchmark(opts):
+    site = FixtureSite(opts["chapters"], opts["page_size"], opts["paid"], opts["latency"], opts["error_rate"], opts["seed"],
+                       series=opts["series"])
+    site.start()
+    series_list = fixture_series(site)
+    if opts["http_only"]:
+        main.FETCH_BACKEND = "http"
+
+    # main works relative to the current directory (data/, style.css, fonts/)
+    workdir = tempfile.mkdtemp(prefix="scrape-bench-")
+    for name in ("style.css", "fonts"):
+        if os.path.exists(os.path.join(REPO_DIR, name)):
+            os.symlink(os.path.join(REPO_DIR, name), os.path.join(workdir, name))
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    engine = main.ScrapeEngine(opts["shards"])
+    engine.limiter = main.AdaptiveConcurrency(main.CONCURRENCY_INITIAL, main.CONCURRENCY_MIN, main.CONCURRENCY_MAX, opts["max_rps"] or None)
+    stores = []
+    try:
+        for series in series_list:
+            main.ensure_dirs(series)
+            stores.append(main.load_chapter_store(series))
+        metadata_objs, metadata_result = await bench_metadata(site, engine.session, series_list, opts)
+        chapters_result = await bench_chapters(engine, metadata_objs, stores)
+        await engine.close()
+        # The cover downloads alongside the scan in a real run; fetch it untimed so the EPUB embeds it
+        async with httpx.AsyncClient() as client:
+            for series, metadata_obj in zip(series_list, metadata_objs):
+                await main.CoverCache(series.cover_dir).fetch(client, metadata_obj["cover_image_url"])
+        epub_result = bench_epub(series_list, metadata_objs, stores)
+    finally:
+        await engine.close()
+        for chapters_data in stores:
+            chapters_data.close()
+        os.chdir(previous_cwd)
+        site.stop()
+        if opts["keep"]:
+            print(f"Kept scratch directory {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "chapters": opts["chapters"], "series": opts["series"], "shards": opts["shards"], "latency": opts["latency"], "error_rate": opts["error_rate"],
+            "max_rps": opts["max_rps"], "http_only": opts["http_only"], "fetch_backend": main.FETCH_BACKEND,
+            "concurrency": [main.CONCURRENCY_MIN, main.CONCURRENCY_INITIAL, main.CONCURRENCY_MAX],
+            "parse_workers": main.PARSE_WORKERS, "cpu_count": os.cpu_count(), "rss_source": PeakRss().source,
+        },
+        "metadata": metadata_result,
+        "chapters": chapters_result,
+        "epub": epub_result,
+        "server_requests": dict(sorted(site.stats.items())),
+    }
+
+def compare(previous, current):
+    """Prints every numeric stage metric that both runs have, with the relative change."""
+    print(f"Compared with {previous.get('commit')} ({previous.get('timestamp')}):")
+    for stage in ("metadata", "chapters", "epub"):
+        for key, new in current.get(stage, {}).items():
+            old = previous.get(stage, {}).get(key)
+            if isinstance(new, bool) or not isinstance(new, (int, float)) or not isinstance(old, (int, float)):
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"  {stage}.{key}: {old} -> {new} ({change})")
+
+if __name__ == "__main__":
+    opts = options(sys.argv[1:], DEFAULTS, usage=__doc__)
+    results = asyncio.run(run_benchmark(opts))
+    output = opts["output"] or os.path.join(RESULTS_DIR, f"scrape-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps({stage: results[stage] for stage in ("metadata", "chapters", "epub")}, indent=2))
+    print(f"Results written to {output}")
+    if opts["compare"]:
+        with open(opts["compare"], 'r', encoding='utf-8') as f:
+            compare(json.load(f), results)
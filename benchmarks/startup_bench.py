@@ -0,0 +1,156 @@
+"""
+Startup-to-EPUB benchmark for `main.py --epub-only`.
+
+Fills a scratch directory with the cached state a real run leaves behind (data/metadata.json,
+the chapter store and the cover, all from the fixture site in benchmarks/fixture_site.py),
+then times fresh `main.py --epub-only` processes from launch to exit:
+
+    import     -- `import main` alone, plus which scraping modules it pulled in (should be none)
+    full       -- a full build (--force), every chapter rendered
+    style_edit -- a build after style.css changed; chapters are reused from the previous EPUB
+    noop       -- a build with nothing changed, which stops at the up-to-date check
+
+Each is the median of --runs processes. Results are written to JSON; --compare prints
+the change against an earlier run.
+
+    python -m benchmarks.startup_bench [--chapters=850] [--runs=3] [--output=PATH] [--compare=PATH] [--keep]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import main
+from benchmarks.fixture_site import FixtureSite, options
+from benchmarks.scrape_bench import RESULTS_DIR, git_commit, rounded
+
+DEFAULTS = {"chapters": 850, "runs": 3, "output": "", "compare": "", "keep": False}
+# Only the scraper needs these; an --epub-only run that imports one of them starts slower than it has to
+SCRAPER_MODULES = ("playwright", "bs4", "httpx", "smartypants", "ebooklib", "PIL")
+IMPORT_PROBE = (
+    "import sys, time, json; start = time.perf_counter(); import main; "
+    "print(json.dumps({'seconds': time.perf_counter() - start, "
+    "'loaded': [m for m in %r if m in sys.modules]}))" % (SCRAPER_MODULES,)
+)
+
+def populate(workdir, chapters):
+    """Writes the metadata, chapter store and cover a full scrape of the fixture site would leave behind."""
+    site = FixtureSite(chapters, latency=0)
+    site.start()
+    try:
+        series = main.DEFAULT_SERIES
+        metadata_obj = site.metadata_obj()
+        chapters_data = main.ChapterStore(os.path.join(workdir, series.chapters_db))
+        try:
+            for slug in metadata_obj["order"]:
+                title = metadata_obj["metadata"][slug]["title"]
+                result, fingerprint = main.process_raw_chapter("html", site.chapter_page(slug).decode("utf-8"), slug, title)
+                chapters_data.update(result, {slug: {"fingerprint": fingerprint}})
+        finally:
+            chapters_data.close()
+
+        async def fetch_cover():
+            async with httpx.AsyncClient() as client:
+                await main.CoverCache(os.path.join(workdir, series.cover_dir)).fetch(client, metadata_obj["cover_image_url"])
+
+        asyncio.run(fetch_cover())
+    finally:
+        site.stop()
+    with open(os.path.join(workdir, series.metadata_file), 'w', encoding='utf-8') as f:
+        json.dump(metadata_obj, f, ensure_ascii=False, indent=2)
+    return len(metadata_obj["order"])
+
+def timed_run(workdir, args):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable] + args, cwd=workdir, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with {proc.returncode}:\n{proc.stderr}")
+    return elapsed, proc.stdout
+
+def median_run(workdir, args, runs, before=None):
+    times = []
+    for _ in range(runs):
+        if before:
+            before()
+        elapsed, _ = timed_run(workdir, args)
+        times.append(elapsed)
+    return rounded(statistics.median(times))
+
+def run_benchmark(opts):
+    workdir = tempfile.mkdtemp(prefix="startup-bench-")
+    # style.css is copied, not linked: the style_edit stage changes it
+    shutil.copy(os.path.join(REPO_DIR, "style.css"), workdir)
+    if os.path.exists(os.path.join(REPO_DIR, "fonts")):
+        os.symlink(os.path.join(REPO_DIR, "fonts"), os.path.join(workdir, "fonts"))
+    os.makedirs(os.path.join(workdir, main.DATA_DIR))
+    main_py = os.path.join(REPO_DIR, "main.py")
+    style_path = os.path.join(workdir, "style.css")
+    edits = [0]
+
+    def edit_style():
+        edits[0] += 1
+        with open(style_path, 'a', encoding='utf-8') as f:
+            f.write(f"\n/* edit {edits[0]} */\n")
+
+    try:
+        print(f"Populating {workdir} with {opts['chapters']} fixture chapters...")
+        entries = populate(workdir, opts["chapters"])
+        _, probe = timed_run(workdir, ["-c", f"import sys; sys.path.insert(0, {REPO_DIR!r}); " + IMPORT_PROBE])
+        probe = json.loads(probe)
+        results = {
+            "import_seconds": rounded(probe["seconds"]),
+            "scraper_modules_loaded": probe["loaded"],
+            "full_seconds": median_run(workdir, [main_py, "--epub-only", "--force"], opts["runs"]),
+            "style_edit_seconds": median_run(workdir, [main_py, "--epub-only"], opts["runs"], before=edit_style),
+            "noop_seconds": median_run(workdir, [main_py, "--epub-only"], opts["runs"]),
+            "epub_mb": round(os.path.getsize(os.path.join(workdir, main.DEFAULT_SERIES.output_epub)) / 1024 / 1024, 2),
+        }
+    finally:
+        if opts["keep"]:
+            print(f"Kept scratch directory {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {"chapters": opts["chapters"], "entries": entries, "runs": opts["runs"], "writer": main.EPUB_WRITER},
+        "startup": results,
+    }
+
+def compare(previous, current):
+    print(f"Compared with {previous.get('commit')} ({previous.get('timestamp')}):")
+    for key, new in current["startup"].items():
+        old = previous.get("startup", {}).get(key)
+        if isinstance(new, bool) or not isinstance(new, (int, float)) or not isinstance(old, (int, float)):
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"  startup.{key}: {old} -> {new} ({change})")
+
+if __name__ == "__main__":
+    opts = options(sys.argv[1:], DEFAULTS, usage=__doc__)
+    results = run_benchmark(opts)
+    output = opts["output"] or os.path.join(RESULTS_DIR, f"startup-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results["startup"], indent=2))
+    print(f"Results written to {output}")
+    if results["startup"]["scraper_modules_loaded"]:
+        print(f"Warning: importing main loaded {', '.join(results['startup']['scraper_modules_loaded'])}")
+    if opts["compare"]:
+        with open(opts["compare"], 'r', encoding='utf-8') as f:
+            compare(json.load(f), results)
@@ -0,0 +1,130 @@
+import re
+
+# chapter-12, merged pages such as chapter-807-808, and sub-chapters such as chapter-12-5
+CHAPTER_SLUG_RE = re.compile(r"^chapter-(\d+)(?:-(\d+))?$")
+# Side sequences numbered on their own: (kind, slug pattern, title pattern)
+SEQUENCES = [
+    ("qa", re.compile(r"(?:^|-)(?:q-?a|q-and-a)(?:-.*)?-(\d+)$"), re.compile(r"Q&A \((\d+)\)")),
+    ("tidbit", re.compile(r"(?:^|-)tidbits?(?:-.*)?-(\d+)$"), re.compile(r"Tidbit \((\d+)\)")),
+]
+
+def parse_entry(slug, title=None):
+    """
+    (kind, first, last, part) for a chapter-list entry: ("chapter", 807, 808, 0) for the merged
+    chapter-807-808, ("chapter", 12, 12, 5) for the sub-chapter chapter-12-5 (N-M with M <= N),
+    ("qa", 3, 3, 0) for the third Author's Q&A. None for anything else.
+    """
+    match = CHAPTER_SLUG_RE.match(slug)
+    if match:
+        first = int(match.group(1))
+        second = int(match.group(2)) if match.group(2) else None
+        if second is None:
+            return ("chapter", first, first, 0)
+        if second > first:
+            return ("chapter", first, second, 0)
+        return ("chapter", first, first, second)
+    for kind, slug_re, title_re in SEQUENCES:
+        match = slug_re.search(slug) or (title_re.search(title) if title else None)
+        if match:
+            number = int(match.group(1))
+            return (kind, number, number, 0)
+    return None
+
+class ChapterIndex:
+    """
+    The chapters of one series by number, built from metadata["metadata"] and the previous
+    `order` (or the order the scan found them in).
+
+    Chapters sort by number, sub-chapters (chapter-12-5) right after their chapter. Q&A,
+    Tidbit and unrecognised entries have no place in the chapter numbering, so each stays
+    right after the chapter it followed in the given order. Every sequence is checked for
+    numbers nobody covers (gaps) and numbers more than one entry claims (duplicates, e.g.
+    chapter-807 next to chapter-807-808); sub-chapters neither fill a gap nor duplicate
+    their chapter.
+    """
+
+    def __init__(self, metadata, order=()):
+        # Slugs in the given order first, then any the order is missing
+        slugs = [slug for slug in dict.fromkeys(order) if slug in metadata]
+        listed = set(slugs)
+        slugs += [slug for slug in metadata if slug not in listed]
+        self.entries = {}
+        self.keys = {}
+        self.covered = {}
+        anchor = (-1, 0)
+        for position, slug in enumerate(slugs):
+            entry = parse_entry(slug, metadata[slug].get("title"))
+            self.entries[slug] = entry
+            if entry is not None and not entry[3]:
+                kind, first, last, _ = entry
+                numbers = self.covered.setdefault(kind, {})
+                for number in range(first, last + 1):
+                    numbers.setdefault(number, []).append(slug)
+            if entry is not None and entry[0] == "chapter":
+                anchor = (entry[1], entry[3])
+                self.keys[slug] = (*anchor, 0, position)
+            else:
+                self.keys[slug] = (*anchor, 1, position)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, slug):
+        return slug in self.entries
+
+    def order(self):
+        """Every slug, oldest first."""
+        return sorted(self.entries, key=self.keys.__getitem__)
+
+    def gaps(self):
+        """{kind: [number, ...]} of numbers missing between the lowest and highest one seen."""
+        gaps = {}
+        for kind, numbers in self.covered.items():
+            missing = [n for n in range(min(numbers), max(numbers) + 1) if n not in numbers]
+            if missing:
+                gaps[kind] = missing
+        return gaps
+
+    def duplicates(self):
+        """{kind: {number: [slug, ...]}} of numbers covered by more than one entry."""
+        duplicates = {}
+        for kind, numbers in self.covered.items():
+            claimed = {n: slugs for n, slugs in numbers.items() if len(slugs) > 1}
+            if claimed:
+                duplicates[kind] = claimed
+        return duplicates
+
+    def slug_template(self, kind):
+        """A format string for slugs of `kind` ("chapter-{}"), from an entry already in the index."""
+        if kind == "chapter":
+            return "chapter-{}"
+        for slug, entry in self.entries.items():
+            if entry is not None and entry[0] == kind and entry[1] == entry[2] and not entry[3] and slug.endswith(f"-{entry[1]}"):
+                return slug[:-len(str(entry[1]))] + "{}"
+        return None
+
+    def missing_slugs(self):
+        """The slugs the gaps would most likely have, for fetching them directly."""
+        slugs = []
+        for kind, numbers in self.gaps().items():
+            template = self.slug_template(kind)
+            if template is not None:
+                slugs += [template.format(n) for n in numbers]
+        return slugs
+
+    def summary(self):
+        chapters = self.covered.get("chapter", {})
+        line = f"Chapter index: {len(self.entries)} entries"
+        if chapters:
+            line += f", chapters {min(chapters)}-{max(chapters)}"
+        gaps = self.gaps()
+        if gaps:
+            missing = self.missing_slugs()
+            line += "; missing " + ", ".join(f"{len(numbers)} {kind}" for kind, numbers in gaps.items())
+            if missing:
+                line += f" ({', '.join(missing[:10])}{', ...' if len(missing) > 10 else ''})"
+        duplicates = self.duplicates()
+        if duplicates:
+            line += "; duplicated " + ", ".join(
+                f"{kind} {n} ({' / '.join(slugs)})" for kind, claimed in duplicates.items() for n, slugs in claimed.items())
+        return line
@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+import sqlite3
+import time
+
+
+class ChapterStore:
+    """
+    Append-only chapter cache backed by SQLite in WAL mode.
+
+    Behaves like the old chapters.json dict for the operations main.py needs
+    (`in`, `[]`, `update`, `get`), but every write is a single small
+    transaction instead of a rewrite of the whole file, and chapter bodies are
+    only read from disk when a caller actually asks for them.
+    """
+
+    def __init__(self, db_path, legacy_json_path=None):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is crash-safe in WAL mode; only the last commit can be lost on power failure
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS chapters (
+                slug TEXT PRIMARY KEY,
+                title TEXT,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                content_hash TEXT
+            )"""
+        )
+        # Upstream fingerprints are keyed by source slug (the listing entry), not by stored chapter
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS fingerprints (
+                slug TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                checked_at REAL NOT NULL
+            )"""
+        )
+        self._add_content_hashes()
+        self.conn.commit()
+        if legacy_json_path:
+            self.migrate_from_json(legacy_json_path)
+
+    def _add_content_hashes(self):
+        """Upgrades stores created before the content_hash column existed."""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(chapters)")]
+        if "content_hash" not in columns:
+            self.conn.execute("ALTER TABLE chapters ADD COLUMN content_hash TEXT")
+        missing = self.conn.execute("SELECT slug, data FROM chapters WHERE content_hash IS NULL").fetchall()
+        if missing:
+            self.conn.executemany(
+                "UPDATE chapters SET content_hash = ? WHERE slug = ?",
+                [(self._hash(data), slug) for slug, data in missing],
+            )
+
+    @staticmethod
+    def _hash(data):
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def migrate_from_json(self, json_path):
+        """One-time import of an existing chapters.json. The file is renamed afterwards so it is not imported twice."""
+        if not os.path.exists(json_path):
+            return
+        with open(json_path, 'r', encoding='utf-8') as f:
+            try:
+                legacy = json.load(f)
+            except json.JSONDecodeError as e:
+                print(f"Warning: Could not migrate {json_path}: {e}")
+                return
+        # Existing rows win: the store may already hold newer content than a stale json file
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO chapters (slug, title, data, updated_at, content_hash) VALUES (?, ?, ?, ?, ?)",
+                [self._row(slug, ch) for slug, ch in legacy.items()],
+            )
+        os.replace(json_path, json_path + ".migrated")
+        print(f"Migrated {len(legacy)} chapters from {json_path} to {self.db_path}.")
+
+    @classmethod
+    def _row(cls, slug, ch):
+        data = json.dumps(ch, ensure_ascii=False)
+        return (slug, ch.get("title"), data, time.time(), cls._hash(data))
+
+    def __contains__(self, slug):
+        return self.conn.execute("SELECT 1 FROM chapters WHERE slug = ?", (slug,)).fetchone() is not None
+
+    def __getitem__(self, slug):
+        row = self.conn.execute("SELECT data FROM chapters WHERE slug = ?", (slug,)).fetchone()
+        if row is None:
+            raise KeyError(slug)
+        return json.loads(row[0])
+
+    def __setitem__(self, slug, ch):
+        self.update({slug: ch})
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM chapters").fetchone()[0]
+
+    def __bool__(self):
+        return self.conn.execute("SELECT 1 FROM chapters LIMIT 1").fetchone() is not None
+
+    def get(self, slug, default=None):
+        try:
+            return self[slug]
+        except KeyError:
+            return default
+
+    def update(self, chapters, fingerprints=None):
+        """Write one or more chapters (and optionally their source fingerprints) in a single atomic transaction."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chapters (slug, title, data, updated_at, content_hash) VALUES (?, ?, ?, ?, ?)",
+                [self._row(slug, ch) for slug, ch in chapters.items()],
+            )
+            if fingerprints:
+                self._write_fingerprints(fingerprints)
+
+    def fingerprints(self):
+        """Return {source slug: {"fingerprint", "etag", "last_modified"}} for change detection."""
+        return {
+            slug: {"fingerprint": fp, "etag": etag, "last_modified": last_modified}
+            for slug, fp, etag, last_modified in self.conn.execute(
+                "SELECT slug, fingerprint, etag, last_modified FROM fingerprints"
+            )
+        }
+
+    def set_fingerprints(self, fingerprints):
+        with self.conn:
+            self._write_fingerprints(fingerprints)
+
+    def _write_fingerprints(self, fingerprints):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO fingerprints (slug, fingerprint, etag, last_modified, checked_at) VALUES (?, ?, ?, ?, ?)",
+            [(slug, fp["fingerprint"], fp.get("etag"), fp.get("last_modified"), now) for slug, fp in fingerprints.items()],
+        )
+
+    def set_title(self, slug, title):
+        ch = self[slug]
+        ch["title"] = title
+        self.update({slug: ch})
+
+    def titles(self):
+        """Return {slug: title} without reading any chapter bodies."""
+        return dict(self.conn.execute("SELECT slug, title FROM chapters"))
+
+    def hashes(self):
+        """Return {slug: hash of the stored chapter}, to detect changes without reading bodies."""
+        return dict(self.conn.execute("SELECT slug, content_hash FROM chapters"))
+
+    def close(self):
+        self.conn.close()
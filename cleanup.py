@@ -0,0 +1,68 @@
+import re
+from functools import lru_cache
+
+AD_KEYWORDS = ["Discord", "Ko-fi", "Patreon", "Want more chapters", "Next chapter", "Previous chapter", "Consider supporting", "buymeacoffee", "TranslatingNovice", "Z0Rel", "BlueMangoAde"]
+# One pass over the lowercased text instead of one `in` check per keyword
+AD_KEYWORD_RE = re.compile("|".join(re.escape(kw.lower()) for kw in AD_KEYWORDS))
+
+GENERIC_TITLE_PATTERN = r"(Chapter \d+|Author's Q&A \(\d+\)|Author's Tidbit \(\d+\))"
+CHAPTER_TITLE_RE = re.compile(r'^(Chapter \d+([:\s\-].*)?)$', re.I)
+
+# Italicize single quoted sentences
+# Pattern looks for single quotes wrapping content.
+# Inner content allows:
+# 1. Any non-quote non-tag-start character: [^'<]
+# 2. An apostrophe that is sandwiched between word characters (e.g. don't, it's): (?<=\w)'(?=\w)
+ITALIC_RE = re.compile(r"(?<=[ >\n])'((?:[^'<]|(?<=\w)'(?=\w))+?)'(?=[ <.,;:!?\n])")
+# Bold square bracketed content
+BOLD_RE = re.compile(r"\[(.*?)\]")
+TAG_SPLIT_RE = re.compile(r'(<[^>]*>)')
+
+
+def contains_ad(text):
+    return AD_KEYWORD_RE.search(text.lower()) is not None
+
+@lru_cache(maxsize=None)
+def title_regexes(title_pattern):
+    """
+    Compiled title matchers for a slug's title pattern ("" when the slug has none).
+    Returns (search_re, slug_re); slug_re is None without a title pattern.
+    """
+    search_pattern = title_pattern if title_pattern else GENERIC_TITLE_PATTERN
+    search_re = re.compile(rf'^({search_pattern}([:\s\-].*)?)$', re.I)
+    slug_re = re.compile(rf'^({title_pattern}(\s+.*)?)$', re.I) if title_pattern else None
+    return search_re, slug_re
+
+def clean_text_node_content(text):
+    # 1. Handle mixed/double-single quotes -> double quotes
+    # The user requested 'double single quotes' be fixed to double quotes.
+    # We treat mixed artifacts (like ‘' or ’' or ‘' etc) as double quotes too.
+    # Chained str.replace is kept on purpose: on paragraph-sized strings it measures
+    # several times faster than str.translate or a single alternation regex
+    # (see benchmarks/cleanup_bench.py), and the replacement order matters for inputs like '‘'.
+    text = text.replace("‘'", '"').replace("'‘", '"')
+    text = text.replace("’'", '"').replace("'’", '"')
+    text = text.replace("‘‘", '"').replace("’’", '"')
+    text = text.replace("''", '"')
+
+    # 2. Normalize remaining smart quotes to straight quotes to ensure clean slate
+    text = text.replace('“', '"').replace('”', '"')
+    text = text.replace('‘', "'").replace('’', "'")
+    return text
+
+@lru_cache(maxsize=None)
+def _smartypants():
+    """(smartypants function, attributes), imported on first use so building the EPUB alone never loads it."""
+    import smartypants
+    # q=quotes, d=dashes, e=ellipses, u=unicode (no HTML entities)
+    # We process the final HTML string, so skipping entities is safer/cleaner.
+    return smartypants.smartypants, smartypants.Attr.q | smartypants.Attr.d | smartypants.Attr.e | smartypants.Attr.u
+
+def apply_smartypants(text):
+    convert, attr = _smartypants()
+    return convert(text, attr=attr)
+
+def format_html_content(text):
+    text = ITALIC_RE.sub(r"<em>'\1'</em>", text)
+    text = BOLD_RE.sub(r"<strong>[\1]</strong>", text)
+    return text
@@ -0,0 +1,225 @@
+import time
+import asyncio
+from collections import deque
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on in-flight requests, plus a global requests-per-second ceiling.
+
+    The limit grows by one after a full window (as many successes as the current limit)
+    while latency stays close to the baseline, shrinks by one after a full window of
+    inflated latency, and is cut by decrease_factor on a timeout or a throttling response
+    (429/5xx). Cuts happen at most once per cooldown, so a burst of failures from requests
+    that were already in flight counts as one congestion event.
+    Latency baselines are kept per kind ("http", "browser"): the two differ by an order
+    of magnitude and must not be compared with each other.
+
+    The baseline is the median of the last baseline_window latencies, not the lowest ever
+    seen, and latency only counts as inflated once the recent average is both
+    latency_tolerance times the baseline and latency_slack seconds above it. Against a fast
+    server, ordinary jitter is many times the minimum but nowhere near the slack.
+    """
+
+    def __init__(self, initial, minimum, maximum, max_rps=None,
+                 latency_tolerance=2.0, decrease_factor=0.5, cooldown=5.0, log=print,
+                 baseline_window=100, latency_slack=0.05):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self.max_rps = max_rps
+        self.latency_tolerance = latency_tolerance
+        self.baseline_window = baseline_window
+        self.latency_slack = latency_slack
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.log = log
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+        self.rate_lock = asyncio.Lock()
+        self.next_request_at = 0.0
+        self.successes = 0
+        self.slow_streak = 0
+        self.last_decrease = float("-inf")
+        self.baseline = {}
+        self.samples = {}
+        self.ewma = {}
+        self.events = {"ok": 0, "slow": 0, "timeout": 0, "throttled": 0}
+        self.decisions = []
+        self.peak_limit = self.limit
+        self.low_limit = self.limit
+        # The loop only holds weak references to tasks; these are kept until they have run
+        self.wake_tasks = set()
+
+    async def acquire(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self):
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def slot(self):
+        """async with limiter.slot(): ... holds one in-flight slot."""
+        return _Slot(self)
+
+    async def throttle(self):
+        """Waits until the requests-per-second ceiling allows one more request."""
+        if not self.max_rps:
+            return
+        async with self.rate_lock:
+            now = time.monotonic()
+            wait = self.next_request_at - now
+            self.next_request_at = max(now, self.next_request_at) + 1.0 / self.max_rps
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_success(self, latency, kind="http"):
+        self.events["ok"] += 1
+        samples = self.samples.setdefault(kind, deque(maxlen=self.baseline_window))
+        samples.append(latency)
+        baseline = sorted(samples)[len(samples) // 2]
+        self.baseline[kind] = baseline
+        ewma = self.ewma.get(kind, latency) * 0.8 + latency * 0.2
+        self.ewma[kind] = ewma
+        if ewma > max(baseline * self.latency_tolerance, baseline + self.latency_slack):
+            # Queueing somewhere upstream: stop growing, and back off gently if it persists
+            self.events["slow"] += 1
+            self.successes = 0
+            self.slow_streak += 1
+            if self.slow_streak >= self.limit and self.limit > self.minimum:
+                self.slow_streak = 0
+                self._set_limit(self.limit - 1, f"{kind} latency {ewma:.2f}s vs baseline {baseline:.2f}s")
+            return
+        self.slow_streak = 0
+        self.successes += 1
+        if self.successes >= self.limit and self.limit < self.maximum:
+            self.successes = 0
+            self._set_limit(self.limit + 1, f"{kind} latency {ewma:.2f}s near baseline {baseline:.2f}s")
+
+    def record_timeout(self, kind="http"):
+        self.events["timeout"] += 1
+        self._decrease(f"{kind} timeout")
+
+    def record_status(self, status, latency=None, kind="http"):
+        """Feeds an HTTP status back: 429 and 5xx count as throttling, anything else as a success."""
+        if status == 429 or status >= 500:
+            self.events["throttled"] += 1
+            self._decrease(f"{kind} HTTP {status}")
+        elif latency is not None:
+            self.record_success(latency, kind)
+
+    def _decrease(self, reason):
+        self.successes = 0
+        self.slow_streak = 0
+        now = time.monotonic()
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self._set_limit(max(self.minimum, int(self.limit * self.decrease_factor)), reason)
+
+    def _set_limit(self, limit, reason):
+        if limit == self.limit:
+            return
+        self.log(f"Concurrency {self.limit} -> {limit} ({reason}, {self.in_flight} in flight)")
+        self.decisions.append((time.monotonic(), self.limit, limit, reason))
+        self.limit = limit
+        self.peak_limit = max(self.peak_limit, limit)
+        self.low_limit = min(self.low_limit, limit)
+        if self.in_flight < limit:
+            # notify_all needs the condition's lock, which can't be taken from this synchronous call
+            task = asyncio.get_running_loop().create_task(self._wake())
+            self.wake_tasks.add(task)
+            task.add_done_callback(self._wake_done)
+
+    async def _wake(self):
+        async with self.condition:
+            self.condition.notify_all()
+
+    def _wake_done(self, task):
+        self.wake_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.log(f"Waking requests blocked on the old limit failed: {task.exception()!r}")
+
+    def summary(self):
+        return (f"Concurrency: final limit {self.limit} (range {self.low_limit}-{self.peak_limit}, bounds {self.minimum}-{self.maximum}), "
+                f"{len(self.decisions)} changes; {self.events['ok']} ok, {self.events['slow']} slow, "
+                f"{self.events['timeout']} timeouts, {self.events['throttled']} throttled")
+
+class _Slot:
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    async def __aenter__(self):
+        await self.limiter.acquire()
+        return self.limiter
+
+    async def __aexit__(self, *exc):
+        await self.limiter.release()
+
+class CircuitBreaker:
+    """
+    Pauses every fetch worker when the recent failure rate spikes.
+
+    Opens when at least `threshold` of the last `window` outcomes failed and stays open for
+    `pause` seconds. It then lets a single probe through (half-open): a success closes it,
+    a failure reopens it for twice as long, up to max_pause.
+    """
+
+    def __init__(self, window=20, threshold=0.5, min_samples=10, pause=30.0, max_pause=300.0, log=print):
+        self.outcomes = deque(maxlen=window)
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.pause = pause
+        self.max_pause = max_pause
+        self.log = log
+        self.state = "closed"
+        self.current_pause = pause
+        self.reopen_at = 0.0
+        self.probe_in_flight = False
+        self.trips = 0
+        self.paused_for = 0.0
+
+    async def wait(self):
+        """Returns once a request may be sent."""
+        while self.state != "closed":
+            now = time.monotonic()
+            if self.state == "open":
+                if now < self.reopen_at:
+                    await asyncio.sleep(self.reopen_at - now)
+                    continue
+                self.state = "half_open"
+                self.log("Circuit half-open: sending one probe request.")
+            if not self.probe_in_flight:
+                self.probe_in_flight = True
+                return
+            await asyncio.sleep(0.5)
+
+    def record(self, success):
+        if self.state == "half_open":
+            # Results of requests sent before the circuit opened can land here too; the first one decides
+            self.probe_in_flight = False
+            if success:
+                self.state = "closed"
+                self.outcomes.clear()
+                self.current_pause = self.pause
+                self.log("Circuit closed: probe succeeded, resuming.")
+            else:
+                self._open("probe failed", self.current_pause * 2)
+            return
+        if self.state == "open":
+            return
+        self.outcomes.append(success)
+        failures = self.outcomes.count(False)
+        if len(self.outcomes) >= self.min_samples and failures / len(self.outcomes) >= self.threshold:
+            self._open(f"{failures} of the last {len(self.outcomes)} fetches failed", self.pause)
+
+    def _open(self, reason, pause):
+        self.current_pause = min(pause, self.max_pause)
+        self.state = "open"
+        self.reopen_at = time.monotonic() + self.current_pause
+        self.outcomes.clear()
+        self.trips += 1
+        self.paused_for += self.current_pause
+        self.log(f"Circuit open for {self.current_pause:.0f}s: {reason}.")
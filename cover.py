@@ -0,0 +1,153 @@
+import os
+import io
+import json
+import asyncio
+import hashlib
+
+COVER_MAX_SIZE = (1264, 1680)  # Fits 6"-7" e-ink screens (Kindle Paperwhite, Kobo Clara) without upscaling
+COVER_JPEG_QUALITY = 85
+SOURCE_MEDIA_TYPES = {
+    ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png",
+    ".webp": "image/webp", ".gif": "image/gif",
+}
+MEDIA_TYPE_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+
+def convert_cover(data):
+    """
+    Re-encodes a downloaded cover for e-readers: JPEG (PNG if it has transparency), no larger
+    than COVER_MAX_SIZE. Returns (bytes, media_type), or None when Pillow is not installed.
+    """
+    try:
+        # Imported here so runs that only read the cached cover don't pay for loading Pillow
+        from PIL import Image
+    except ImportError:
+        return None  # Optional: without Pillow the cover is embedded as downloaded
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        img = img.convert("RGBA" if has_alpha else "RGB")
+        img.thumbnail(COVER_MAX_SIZE, Image.LANCZOS)
+        out = io.BytesIO()
+        if has_alpha:
+            img.save(out, "PNG", optimize=True)
+            return out.getvalue(), "image/png"
+        # Baseline JPEG: several e-ink readers fail to render progressive covers
+        img.save(out, "JPEG", quality=COVER_JPEG_QUALITY, optimize=True, progressive=False)
+        return out.getvalue(), "image/jpeg"
+
+class CoverCache:
+    """
+    Downloaded and converted covers, keyed by source URL.
+
+    index.json remembers each URL's ETag/Last-Modified so later runs revalidate with a
+    conditional request and only download and convert again when the image changed.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                try:
+                    self.index = json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Warning: Ignoring corrupt cover index {self.index_path}")
+        self.tasks = {}
+
+    def _key(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, url):
+        """Returns (path, media_type) of the cached cover for url, or None."""
+        entry = self.index.get(url)
+        if not entry:
+            return None
+        path = os.path.join(self.cache_dir, entry["image"])
+        if not os.path.exists(path):
+            return None
+        return path, entry["media_type"]
+
+    def start(self, client, url, force=False):
+        """Starts fetching url in the background (once per URL); await wait() for the result."""
+        if url not in self.tasks:
+            self.tasks[url] = asyncio.create_task(self.fetch(client, url, force))
+        return self.tasks[url]
+
+    async def wait(self, url):
+        task = self.tasks.get(url)
+        if task is None:
+            return self.get(url)
+        try:
+            return await task
+        except Exception as e:
+            print(f"Warning: Cover download failed: {e}")
+            return self.get(url)
+
+    async def fetch(self, client, url, force=False):
+        """
+        Downloads url unless the cached copy is still current. Returns (path, media_type)
+        or None; network errors fall back to whatever is cached.
+        """
+        entry = self.index.get(url)
+        cached = self.get(url)
+        headers = {}
+        if cached and not force:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            resp = await client.get(url, headers=headers, follow_redirects=True)
+        except Exception as e:
+            print(f"Error downloading cover image: {e}")
+            return cached
+        if resp.status_code == 304 and cached:
+            print("Cover image unchanged.")
+            return cached
+        if resp.status_code != 200:
+            print(f"Failed to download cover image: Status {resp.status_code}")
+            return cached
+
+        key = self._key(url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        converted = None
+        try:
+            # Decoding and resizing is CPU work; keep it off the event loop
+            converted = await asyncio.to_thread(convert_cover, resp.content)
+        except Exception as e:
+            print(f"Warning: Could not convert cover image, embedding it as downloaded: {e}")
+        if converted:
+            data, media_type = converted
+        else:
+            data = resp.content
+            content_type = resp.headers.get("content-type", "").split(";")[0].strip()
+            media_type = content_type if content_type in MEDIA_TYPE_EXTENSIONS else \
+                SOURCE_MEDIA_TYPES.get(os.path.splitext(resp.url.path)[1].lower(), "image/jpeg")
+
+        image_name = f"{key}{MEDIA_TYPE_EXTENSIONS[media_type]}"
+        tmp_path = os.path.join(self.cache_dir, image_name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.cache_dir, image_name))
+        if entry and entry["image"] != image_name:
+            old_path = os.path.join(self.cache_dir, entry["image"])
+            if os.path.exists(old_path):
+                os.remove(old_path)
+
+        self.index[url] = {
+            "image": image_name,
+            "media_type": media_type,
+            "etag": resp.headers.get("etag"),
+            "last_modified": resp.headers.get("last-modified"),
+        }
+        self._save_index()
+        print(f"Cover image downloaded ({len(resp.content) // 1024} KiB -> {len(data) // 1024} KiB {media_type}).")
+        return os.path.join(self.cache_dir, image_name), media_type
@@ -0,0 +1,288 @@
+import os
+import sys
+import shutil
+import zipfile
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+
+import lxml.html
+from lxml import etree
+
+FOLDER_NAME = "EPUB"
+CONTAINER_XML = """<?xml version="1.0" encoding="utf-8"?>
+<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container" version="1.0">
+  <rootfiles>
+    <rootfile full-path="EPUB/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+# epub:prefix ebooklib puts on every chapter document
+CHAPTER_EPUB_PREFIX = "z3998: http://www.daisy.org/z3998/2012/vocab/structure/#"
+
+def html_fragment_to_xhtml(fragment):
+    """Parses an HTML fragment and serializes it as well-formed XHTML body markup."""
+    parts = lxml.html.fragments_fromstring(fragment) if fragment.strip() else []
+    out = []
+    for part in parts:
+        if isinstance(part, str):
+            out.append(escape(part))
+        else:
+            out.append(etree.tostring(part, encoding="unicode", method="xml", with_tail=True))
+    return "".join(out)
+
+def render_xhtml(title, body, lang="en", css_href=None, epub_prefix=None):
+    css_link = f'\n    <link href={quoteattr(css_href)} rel="stylesheet" type="text/css"/>' if css_href else ""
+    prefix = f" epub:prefix={quoteattr(epub_prefix)}" if epub_prefix else ""
+    return f"""<?xml version='1.0' encoding='utf-8'?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops"{prefix} lang="{lang}" xml:lang="{lang}">
+  <head>
+    <title>{escape(title)}</title>{css_link}
+  </head>
+  <body>{body}</body>
+</html>
+""".encode('utf-8')
+
+class StreamingEpubWriter:
+    """
+    Writes an EPUB 3 (with an EPUB 2 NCX) straight into a zip file.
+
+    Chapters are written as they are added, so only one chapter body is in memory at
+    a time; the OPF, NCX and nav are produced on close() from the small per-chapter
+    records (id, file name, title). The archive is built under a temporary name and
+    moved into place on close(), so a failed build never clobbers the previous book.
+    """
+
+    def __init__(self, path, identifier, title, language="en", authors=(), description=None):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.identifier = identifier
+        self.title = title
+        self.language = language
+        self.authors = list(authors)
+        self.description = description
+        self.manifest = []  # (id, href, media_type, properties)
+        self.spine = []
+        self.toc = []  # (href, title)
+        self.cover_page = None
+        self.zip = zipfile.ZipFile(self.tmp_path, "w", zipfile.ZIP_DEFLATED)
+        # The mimetype entry must come first and be stored uncompressed
+        self.zip.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        self.zip.writestr("META-INF/container.xml", CONTAINER_XML)
+
+    def _arcname(self, href):
+        return f"{FOLDER_NAME}/{href}"
+
+    def add_item(self, uid, href, media_type, data=None, source_path=None, properties=None):
+        """Adds a non-spine resource (CSS, font, image) from bytes or from a file on disk."""
+        if source_path is not None:
+            self.zip.write(source_path, self._arcname(href))
+        else:
+            self.zip.writestr(self._arcname(href), data)
+        self.manifest.append((uid, href, media_type, properties))
+
+    def set_cover(self, href, data, media_type, caption=None):
+        """Adds the cover image and a cover page; caption (e.g. "Volume 2") is shown under the image."""
+        self.add_item("cover-img", href, media_type, data=data, properties="cover-image")
+        body = f'<img src={quoteattr(href)} alt="Cover" style="height: 100%"/>'
+        if caption:
+            body = f'<div style="text-align: center"><img src={quoteattr(href)} alt="Cover" style="max-height: 90%"/><p>{escape(caption)}</p></div>'
+        self.zip.writestr(self._arcname("cover.xhtml"), render_xhtml("Cover", body, self.language))
+        self.manifest.append(("cover", "cover.xhtml", "application/xhtml+xml", None))
+        self.cover_page = "cover.xhtml"
+
+    def add_chapter(self, uid, href, title, xhtml):
+        """Writes one rendered chapter and records it in the spine and table of contents."""
+        self.zip.writestr(self._arcname(href), xhtml)
+        self._record_chapter(uid, href, title)
+
+    def copy_chapter(self, source_zip, uid, href, title):
+        """Streams an already-rendered chapter from a previous archive. Returns False if it isn't there."""
+        try:
+            info = source_zip.getinfo(self._arcname(href))
+        except KeyError:
+            return False
+        with source_zip.open(info) as src, self.zip.open(self._arcname(href), "w") as dst:
+            shutil.copyfileobj(src, dst)
+        self._record_chapter(uid, href, title)
+        return True
+
+    def _record_chapter(self, uid, href, title):
+        self.manifest.append((uid, href, "application/xhtml+xml", None))
+        self.spine.append(uid)
+        self.toc.append((href, title))
+
+    def _nav(self):
+        items = "\n".join(f'        <li><a href={quoteattr(href)}>{escape(title)}</a></li>' for href, title in self.toc)
+        landmarks = ""
+        if self.cover_page:
+            landmarks = f"""
+    <nav epub:type="landmarks" hidden="">
+      <ol>
+        <li><a epub:type="cover" href="{self.cover_page}">Cover</a></li>
+      </ol>
+    </nav>"""
+        body = f"""
+    <nav epub:type="toc" id="id" role="doc-toc">
+      <h2>{escape(self.title)}</h2>
+      <ol>
+{items}
+      </ol>
+    </nav>{landmarks}
+  """
+        return render_xhtml(self.title, body, self.language)
+
+    def _ncx(self):
+        points = "\n".join(
+            f"""    <navPoint id="np{i}" playOrder="{i}">
+      <navLabel><text>{escape(title)}</text></navLabel>
+      <content src={quoteattr(href)}/>
+    </navPoint>"""
+            for i, (href, title) in enumerate(self.toc, 1)
+        )
+        return f"""<?xml version='1.0' encoding='utf-8'?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
+  <head>
+    <meta name="dtb:uid" content={quoteattr(self.identifier)}/>
+    <meta name="dtb:depth" content="1"/>
+    <meta name="dtb:totalPageCount" content="0"/>
+    <meta name="dtb:maxPageNumber" content="0"/>
+  </head>
+  <docTitle><text>{escape(self.title)}</text></docTitle>
+  <navMap>
+{points}
+  </navMap>
+</ncx>
+""".encode('utf-8')
+
+    def _opf(self):
+        modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        metadata = [
+            f'    <dc:identifier id="id">{escape(self.identifier)}</dc:identifier>',
+            f'    <dc:title>{escape(self.title)}</dc:title>',
+            f'    <dc:language>{escape(self.language)}</dc:language>',
+            f'    <meta property="dcterms:modified">{modified}</meta>',
+        ]
+        metadata += [f'    <dc:creator>{escape(author)}</dc:creator>' for author in self.authors]
+        if self.description:
+            metadata.append(f'    <dc:description>{escape(self.description)}</dc:description>')
+        if self.cover_page:
+            metadata.append('    <meta name="cover" content="cover-img"/>')
+
+        manifest = [
+            '    <item href="nav.xhtml" id="nav" media-type="application/xhtml+xml" properties="nav"/>',
+            '    <item href="toc.ncx" id="ncx" media-type="application/x-dtbncx+xml"/>',
+        ]
+        for uid, href, media_type, properties in self.manifest:
+            props = f" properties={quoteattr(properties)}" if properties else ""
+            manifest.append(f"    <item href={quoteattr(href)} id={quoteattr(uid)} media-type={quoteattr(media_type)}{props}/>")
+
+        spine = ['    <itemref idref="nav"/>'] + [f"    <itemref idref={quoteattr(uid)}/>" for uid in self.spine]
+        if self.cover_page:
+            # Out of the reading order, but in the spine: the landmarks nav and <guide> link to it
+            spine.insert(0, '    <itemref idref="cover" linear="no"/>')
+        guide = ""
+        if self.cover_page:
+            guide = f'\n  <guide>\n    <reference href="{self.cover_page}" title="Cover" type="cover"/>\n  </guide>'
+
+        nl = "\n"
+        return f"""<?xml version='1.0' encoding='utf-8'?>
+<package xmlns="http://www.idpf.org/2007/opf" unique-identifier="id" version="3.0">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">
+{nl.join(metadata)}
+  </metadata>
+  <manifest>
+{nl.join(manifest)}
+  </manifest>
+  <spine toc="ncx">
+{nl.join(spine)}
+  </spine>{guide}
+</package>
+""".encode('utf-8')
+
+    def close(self):
+        self.zip.writestr(self._arcname("nav.xhtml"), self._nav())
+        self.zip.writestr(self._arcname("toc.ncx"), self._ncx())
+        self.zip.writestr(self._arcname("content.opf"), self._opf())
+        self.zip.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.zip.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+OPF_NS = {"opf": "http://www.idpf.org/2007/opf"}
+
+def validate_epub(path):
+    """
+    Structural checks along the lines of epubcheck's container/package/content rules.
+    Returns a list of problems; an empty list means the book passed.
+    """
+    problems = []
+    with zipfile.ZipFile(path) as zf:
+        infos = zf.infolist()
+        names = set(zf.namelist())
+        if not infos or infos[0].filename != "mimetype":
+            problems.append("mimetype is not the first entry")
+        elif infos[0].compress_type != zipfile.ZIP_STORED:
+            problems.append("mimetype entry is compressed")
+        elif zf.read("mimetype") != b"application/epub+zip":
+            problems.append("mimetype has the wrong content")
+
+        try:
+            container = etree.fromstring(zf.read("META-INF/container.xml"))
+        except (KeyError, etree.XMLSyntaxError) as e:
+            return problems + [f"META-INF/container.xml unreadable: {e}"]
+        rootfile = container.find(".//{urn:oasis:names:tc:opendocument:xmlns:container}rootfile")
+        opf_path = rootfile.get("full-path") if rootfile is not None else None
+        if not opf_path or opf_path not in names:
+            return problems + [f"package document {opf_path} missing"]
+
+        opf = etree.fromstring(zf.read(opf_path))
+        base = os.path.dirname(opf_path)
+        ids = set()
+        nav_found = False
+        for item in opf.iterfind("opf:manifest/opf:item", OPF_NS):
+            uid, href, media_type = item.get("id"), item.get("href"), item.get("media-type")
+            if uid in ids:
+                problems.append(f"duplicate manifest id {uid}")
+            ids.add(uid)
+            full = f"{base}/{href}" if base else href
+            if full not in names:
+                problems.append(f"manifest item {href} missing from archive")
+                continue
+            if "nav" in (item.get("properties") or "").split():
+                nav_found = True
+            if media_type == "application/xhtml+xml":
+                # Parse one document at a time to keep memory bounded
+                try:
+                    etree.fromstring(zf.read(full))
+                except etree.XMLSyntaxError as e:
+                    problems.append(f"{href} is not well-formed XHTML: {e}")
+        if not nav_found:
+            problems.append("no manifest item with properties=\"nav\"")
+        spine_hrefs = set()
+        hrefs = {item.get("id"): item.get("href") for item in opf.iterfind("opf:manifest/opf:item", OPF_NS)}
+        for itemref in opf.iterfind("opf:spine/opf:itemref", OPF_NS):
+            if itemref.get("idref") not in ids:
+                problems.append(f"spine references unknown id {itemref.get('idref')}")
+            spine_hrefs.add(hrefs.get(itemref.get("idref")))
+        for reference in opf.iterfind("opf:guide/opf:reference", OPF_NS):
+            href = (reference.get("href") or "").split("#")[0]
+            if href not in spine_hrefs:
+                problems.append(f"{href} is linked from the guide but not in the spine (RSC-011)")
+        if opf.find("opf:metadata/{http://purl.org/dc/elements/1.1/}identifier", OPF_NS) is None:
+            problems.append("missing dc:identifier")
+    return problems
+
+if __name__ == "__main__":
+    # Usage: python epub_writer.py book.epub [...]
+    failed = False
+    for epub_path in sys.argv[1:]:
+        issues = validate_epub(epub_path)
+        print(f"{epub_path}: {'OK' if not issues else f'{len(issues)} problems'}")
+        for issue in issues:
+            print(f"  {issue}")
+        failed = failed or bool(issues)
+    sys.exit(1 if failed else 0)
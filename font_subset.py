@@ -0,0 +1,97 @@
+import os
+import re
+import html
+import hashlib
+
+try:
+    from fontTools import subset as ft_subset
+except ImportError:
+    ft_subset = None  # Optional: without fontTools the full font files are embedded
+
+RULE_RE = re.compile(r"([^{}]+)\{([^}]*)\}")
+FAMILY_RE = re.compile(r"font-family\s*:\s*([^;]+)", re.I)
+SRC_URL_RE = re.compile(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)", re.I)
+TAG_RE = re.compile(r"<[^>]*>")
+HEADING_RE = re.compile(r"<h([1-6])\b[^>]*>(.*?)</h\1\s*>", re.I | re.S)
+
+# Which text a selector's font-family applies to. Anything not listed is assumed to
+# cover all text, which can only make a subset larger, never drop a needed glyph.
+# "titles" is chapter titles plus the h1-h6 headings chapters keep in their body.
+SELECTOR_TEXT = {**{f"h{level}": "titles" for level in range(1, 7)}, ".date": "dates"}
+# Always kept so punctuation added by the reader UI or a later title fix still renders
+BASE_CODEPOINTS = frozenset(range(0x20, 0x7f))
+
+def available():
+    return ft_subset is not None
+
+def text_chars(content):
+    """The distinct characters in an HTML fragment's text, as a sorted string (small enough for a manifest)."""
+    return "".join(sorted(set(html.unescape(TAG_RE.sub("", content)))))
+
+def heading_chars(content):
+    """The distinct characters in the text of an HTML fragment's <h1>-<h6> elements, like text_chars."""
+    return text_chars("".join(match.group(2) for match in HEADING_RE.finditer(content)))
+
+def _families(value):
+    return [f.strip().strip("'\"") for f in value.split(",") if f.strip()]
+
+def font_codepoints(style, glyphs):
+    """
+    Maps each @font-face src file name in style to the code points it has to cover.
+    glyphs holds sets of characters under "all", "titles" and "dates".
+    """
+    face_files = {}
+    family_text = {}
+    for selector, body in RULE_RE.findall(style):
+        selector = selector.strip()
+        family = FAMILY_RE.search(body)
+        if not family:
+            continue
+        if selector.lower() == "@font-face":
+            src = SRC_URL_RE.search(body)
+            if src:
+                face_files.setdefault(_families(family.group(1))[0], []).append(os.path.basename(src.group(1)))
+            continue
+        kinds = {SELECTOR_TEXT.get(s.strip(), "all") for s in selector.split(",")}
+        for name in _families(family.group(1)):
+            family_text.setdefault(name, set()).update(kinds)
+
+    everything = glyphs["all"] | glyphs["titles"] | glyphs["dates"]
+    codepoints = {}
+    for name, files in face_files.items():
+        kinds = family_text.get(name, set())
+        chars = everything if "all" in kinds else set().union(*(glyphs[k] for k in kinds))
+        cps = set(BASE_CODEPOINTS) | {ord(c) for c in chars}
+        for file_name in files:
+            codepoints.setdefault(file_name, set()).update(cps)
+    return codepoints
+
+def subset_font(local_path, codepoints, cache_dir):
+    """
+    Returns the path of a copy of the font reduced to codepoints. Subsets are cached under
+    cache_dir by a hash of the source font and glyph set, so unchanged books reuse them.
+    """
+    st = os.stat(local_path)
+    key = hashlib.sha1(
+        f"{os.path.basename(local_path)}:{st.st_size}:{st.st_mtime_ns}:{','.join(map(str, sorted(codepoints)))}".encode('utf-8')
+    ).hexdigest()[:16]
+    stem, ext = os.path.splitext(os.path.basename(local_path))
+    out_path = os.path.join(cache_dir, f"{stem}-{key}{ext}")
+    if os.path.exists(out_path):
+        return out_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    options = ft_subset.Options()
+    options.layout_features = ["*"]  # Keep contextual alternates (FoglihtenNo07calt) and kerning
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    options.drop_tables += ["FFTM"]  # FontForge timestamp; fontTools can't subset it and warns otherwise
+    font = ft_subset.load_font(local_path, options)
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    tmp_path = out_path + ".tmp"
+    ft_subset.save_font(font, tmp_path, options)
+    font.close()
+    os.replace(tmp_path, out_path)
+    return out_path
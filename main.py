@@ -2,22 +2,93 @@ import os
 import json
 import asyncio
 import re
-import smartypants
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-from ebooklib import epub
-import httpx
+import time
+import hashlib
+import heapq
+import random
+import zipfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
+# Playwright, BeautifulSoup, httpx and ebooklib are imported by the functions that use them,
+# so an --epub-only run never loads the scraping stack
+try:
+    import psutil
+except ImportError:
+    psutil = None  # Optional: only needed for RSS-based context recycling
+from chapter_store import ChapterStore
+import font_subset
+import profiler
+from cover import CoverCache
+from concurrency import AdaptiveConcurrency, CircuitBreaker
+from series import Series, load_series
+from chapter_index import ChapterIndex
+from epub_writer import CHAPTER_EPUB_PREFIX, StreamingEpubWriter, html_fragment_to_xhtml, render_xhtml
+from cleanup import (
+    AD_KEYWORDS, CHAPTER_TITLE_RE, TAG_SPLIT_RE, contains_ad, title_regexes,
+    clean_text_node_content, apply_smartypants, format_html_content,
+)
 
 BASE_URL = "https://wetriedtls.com"
-SERIES_URL = f"{BASE_URL}/series/a-regressors-tale-of-cultivation"
-DATA_DIR = "data"
-METADATA_FILE = os.path.join(DATA_DIR, "metadata.json")
-CHAPTERS_FILE = os.path.join(DATA_DIR, "chapters.json")
-OUTPUT_EPUB = "A_Regressors_Tale_of_Cultivation.epub"
-CONCURRENCY_LIMIT = 10  # Adjust based on system resources
-MAX_RETRIES = 3
+DATA_DIR = "data"  # Shared caches; the default series keeps its files here too, other series get DATA_DIR/<slug>
+EPUB_LAYOUT_VERSION = 2  # Bump when the chapter XHTML layout changes to force a full rebuild
+EPUB_WRITER = "native"  # "native" streams chapters into the zip; "ebooklib" builds the whole book in memory
+SUBSET_FONTS = True  # Embed only the glyphs the book uses (needs fontTools; full fonts are embedded without it)
+FONT_CACHE_DIR = os.path.join(DATA_DIR, "font_cache")
+VOLUME_SIZE = None  # Entries of `order` per volume EPUB (--volume-size=N); None builds a single book
+VOLUME_RANGES = []  # Explicit (start, stop) slices of `order`, one volume each; overrides VOLUME_SIZE
+VOLUME_WORKERS = min(4, os.cpu_count() or 1)  # Processes building volume EPUBs concurrently
+# In-flight chapter fetches start at CONCURRENCY_INITIAL and are adjusted at runtime (AIMD) within these bounds
+CONCURRENCY_INITIAL = 8
+CONCURRENCY_MIN = 2
+CONCURRENCY_MAX = 24
+MAX_REQUESTS_PER_SECOND = 10.0  # Global ceiling on chapter page requests; None disables it
+MAX_RETRIES = 3  # Attempts per chapter; failed attempts wait in a deferred queue instead of holding a worker
+RETRY_BASE_DELAY = 5.0  # Seconds before the first retry, doubled per attempt, with +-50% jitter
+RETRY_MAX_DELAY = 120.0
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")  # --profile reports (JSON summary plus per-chapter CSV)
+PROFILE_RSS_INTERVAL = 1.0  # Seconds between memory samples while profiling (needs psutil)
+PARSE_WORKERS = os.cpu_count() or 1  # Processes for chapter cleanup
+PIPELINE_QUEUE_SIZE = CONCURRENCY_MAX * 2  # Bound on raw pages waiting between stages
+PERSIST_BATCH_SIZE = 20  # Chapters per store transaction
+PERSIST_INTERVAL = 2.0  # Max seconds a finished chapter waits for its batch
+PIPELINE_REPORT_INTERVAL = 10  # Seconds between queue depth reports
+SHARDS = 1  # Processes for chapter generation (--shards=K), each with its own browser; 1 runs the pipeline in this process
+SHARD_RESTARTS = 2  # Times the unfinished chapters of a shard that died are handed to a new shard
+# Module settings a shard process copies from the coordinator, which may have changed them at runtime
+SHARD_SETTINGS = ("FETCH_BACKEND", "EXTRACTION_MODE", "HTML_PARSER", "BLOCK_RESOURCES", "MAX_RETRIES",
+                  "RETRY_BASE_DELAY", "RETRY_MAX_DELAY", "PAGE_RECYCLE_AFTER", "CONTEXT_RSS_LIMIT_MB")
+LISTING_CONCURRENCY = 5  # Parallel chapter-list page fetches when the listing API is found
+PAGE_RECYCLE_AFTER = 200  # Navigations per BrowserContext before it is replaced
+CONTEXT_RSS_LIMIT_MB = 1500  # Recycle the context when Chromium grows past this (needs psutil)
+# "auto": plain HTTP first, browser only when the reader container isn't server-rendered
+# "http": HTTP only, "browser": always use Playwright
+FETCH_BACKEND = "auto"
+# HTTP statuses that mean "slow down": retried later, never answered with a heavier browser fetch
+THROTTLE_STATUSES = {429, 503}
+# Answers to a guessed chapter slug (--fill-gaps) that mean the chapter does not exist
+MISSING_STATUSES = {404, 410}
+# Request interception: what the scraper never needs from the site
+BLOCK_RESOURCES = True  # Set to False to measure a run without interception
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_DOMAINS = [
+    "googletagmanager.com", "google-analytics.com", "googlesyndication.com", "doubleclick.net",
+    "adservice.google.com", "amazon-adsystem.com", "facebook.net", "cloudflareinsights.com",
+    "hotjar.com", "clarity.ms", "scorecardresearch.com", "pubmatic.com", "disqus.com",
+]
+# Requests matching these are never blocked (Next.js bundles that render the popup and the reader)
+ALLOWED_URL_PATTERNS = [re.compile(r"/_next/static/(chunks|css)/")]
+# Browser extraction: "evaluate" pulls only the reader's blocks out of the page in one call,
+# "content" serializes the whole DOM and parses it with BeautifulSoup
+EXTRACTION_MODE = "evaluate"
+# BeautifulSoup backend for chapter pages ("lxml" or the pure-Python "html.parser")
+HTML_PARSER = "lxml"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 
-DESCRIPTION = """On the way to a company workshop, we fell into a world of immortal cultivators while still in the car.
+DEFAULT_DESCRIPTION = """On the way to a company workshop, we fell into a world of immortal cultivators while still in the car.
 
 Those with spiritual roots and unique abilities were all called to join cultivation sects, living prosperously.
 
@@ -27,9 +98,20 @@ That’s what I thought.
 
 Until I regressed."""
 
-def ensure_dirs():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+# The series this script was written for; --series=FILE updates a list of series instead (see series.py)
+DEFAULT_SERIES = Series(
+    slug="a-regressors-tale-of-cultivation",
+    title="A Regressor's Tale of Cultivation",
+    author="엄청난 (Tremendous)",
+    data_dir=DATA_DIR,
+    description=DEFAULT_DESCRIPTION,
+    output_epub="A_Regressors_Tale_of_Cultivation.epub",
+    identifier="rtoc",
+    base_url=BASE_URL,
+)
+
+def ensure_dirs(series=None):
+    os.makedirs((series or DEFAULT_SERIES).data_dir, exist_ok=True)
 
 def load_json(filepath):
     if os.path.exists(filepath):
@@ -38,17 +120,381 @@ def load_json(filepath):
     return {}
 
 def save_json(filepath, data):
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Write to a temp file and swap it in so a crash never leaves a half-written file behind
+    tmp_path = filepath + ".tmp"
+    with profiler.span("save_json"):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, filepath)
+
+def load_chapter_store(series=None):
+    series = series or DEFAULT_SERIES
+    return ChapterStore(series.chapters_db, legacy_json_path=series.chapters_file)
+
+class ResourceStats:
+    """Per-run counters for blocked requests, transferred bytes and page load times."""
+
+    def __init__(self):
+        self.blocked_by_type = {}
+        self.blocked_by_domain = {}
+        self.allowed_requests = 0
+        self.bytes_loaded = 0
+        self.page_loads = []
+
+    def record_blocked(self, resource_type, domain=None):
+        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+        if domain:
+            self.blocked_by_domain[domain] = self.blocked_by_domain.get(domain, 0) + 1
+
+    def record_page_load(self, seconds):
+        self.page_loads.append(seconds)
+
+    def merge(self, other):
+        """Adds the counters of another ResourceStats, e.g. one a shard process sent back."""
+        for name, n in other.blocked_by_type.items():
+            self.blocked_by_type[name] = self.blocked_by_type.get(name, 0) + n
+        for domain, n in other.blocked_by_domain.items():
+            self.blocked_by_domain[domain] = self.blocked_by_domain.get(domain, 0) + n
+        self.allowed_requests += other.allowed_requests
+        self.bytes_loaded += other.bytes_loaded
+        self.page_loads.extend(other.page_loads)
+
+    def summary(self):
+        blocked = sum(self.blocked_by_type.values())
+        lines = [f"Requests: {self.allowed_requests} loaded ({self.bytes_loaded / 1024 / 1024:.1f} MiB), {blocked} blocked"]
+        if self.blocked_by_type:
+            lines.append("  Blocked by type: " + ", ".join(f"{t}={n}" for t, n in sorted(self.blocked_by_type.items())))
+        if self.blocked_by_domain:
+            lines.append("  Blocked by domain: " + ", ".join(f"{d}={n}" for d, n in sorted(self.blocked_by_domain.items())))
+        if self.page_loads:
+            avg = sum(self.page_loads) / len(self.page_loads)
+            lines.append(f"  Average chapter page load: {avg:.2f}s over {len(self.page_loads)} pages")
+        return "\n".join(lines)
+
+def blocked_domain(url):
+    host = urlparse(url).hostname or ""
+    for domain in BLOCKED_DOMAINS:
+        if host == domain or host.endswith("." + domain):
+            return domain
+    return None
+
+async def install_resource_blocking(target, stats, allow_types=()):
+    """
+    Aborts unneeded requests on a Page or BrowserContext.
+    allow_types lets a caller keep a resource type it needs (e.g. images on the series page for the cover).
+    """
+    async def on_request_finished(request):
+        stats.allowed_requests += 1
+        try:
+            sizes = await request.sizes()
+            stats.bytes_loaded += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        except Exception:
+            pass
+
+    target.on("requestfinished", on_request_finished)
+
+    if not BLOCK_RESOURCES:
+        return
+
+    async def handle_route(route):
+        request = route.request
+        url = request.url
+        if any(p.search(url) for p in ALLOWED_URL_PATTERNS):
+            await route.continue_()
+            return
+        domain = blocked_domain(url)
+        if domain:
+            stats.record_blocked(request.resource_type, domain)
+            await route.abort()
+        elif request.resource_type in BLOCKED_RESOURCE_TYPES and request.resource_type not in allow_types:
+            stats.record_blocked(request.resource_type)
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await target.route("**/*", handle_route)
+
+def browser_rss_bytes():
+    """RSS of this process plus all child processes (the Playwright driver and Chromium)."""
+    if psutil is None:
+        return 0
+    total = 0
+    proc = psutil.Process()
+    for p in [proc] + proc.children(recursive=True):
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+class BrowserSession:
+    """
+    One Playwright/Chromium instance shared by the metadata scan and chapter generation.
+
+    The browser is launched on first use. Once the popup has been dismissed, the
+    context's cookies and local storage are kept so every later context starts
+    with the consent already given.
+    """
+
+    def __init__(self, resource_stats=None):
+        self.resource_stats = resource_stats if resource_stats is not None else ResourceStats()
+        self.playwright = None
+        self.browser = None
+        self.storage_state = None
+        self.lock = asyncio.Lock()
+
+    async def get_browser(self):
+        async with self.lock:
+            if self.browser is None:
+                print("Launching browser...")
+                with profiler.span("browser_launch"):
+                    from playwright.async_api import async_playwright
+                    self.playwright = await async_playwright().start()
+                    self.browser = await self.playwright.chromium.launch(headless=True)
+        return self.browser
+
+    async def new_context(self, allow_types=()):
+        browser = await self.get_browser()
+        context = await browser.new_context(storage_state=self.storage_state)
+        await install_resource_blocking(context, self.resource_stats, allow_types=allow_types)
+        return context
+
+    async def remember_consent(self, context):
+        try:
+            self.storage_state = await context.storage_state()
+        except Exception as e:
+            print(f"Warning: Could not save browser consent state: {e}")
+
+    def consent_cookies(self):
+        """The remembered cookies as a plain dict, for the HTTP fetch backend."""
+        if not self.storage_state:
+            return {}
+        return {c["name"]: c["value"] for c in self.storage_state.get("cookies", [])}
+
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+class PagePool:
+    """
+    Warm pages shared by the chapter workers.
+
+    Pages are reused across chapters instead of being opened and closed per attempt.
+    The BrowserContext is replaced after PAGE_RECYCLE_AFTER navigations or when memory
+    passes CONTEXT_RSS_LIMIT_MB; the old context is closed once its last page comes back.
+    Contexts come from the shared BrowserSession, so no context is created until
+    the first acquire().
+    """
+
+    RSS_CHECK_EVERY = 20
+
+    def __init__(self, session, size=CONCURRENCY_MAX, recycle_after=None, rss_limit_mb=None):
+        # Read at construction, not bound as defaults, so settings changed at runtime (or copied into a shard) apply
+        if recycle_after is None:
+            recycle_after = PAGE_RECYCLE_AFTER
+        if rss_limit_mb is None:
+            rss_limit_mb = CONTEXT_RSS_LIMIT_MB
+        self.session = session
+        self.size = size
+        self.recycle_after = recycle_after
+        self.rss_limit = rss_limit_mb * 1024 * 1024 if rss_limit_mb else 0
+        self.context = None
+        self.context_uses = 0
+        self.idle = []
+        self.in_use = {}
+        self.crashed = set()
+        self.lock = asyncio.Lock()
+        self.recycles = 0
+        self.peak_rss = 0
+
+    async def _new_context(self):
+        self.context = await self.session.new_context()
+        self.context_uses = 0
+
+    def _needs_recycle(self):
+        if self.context_uses >= self.recycle_after:
+            return True
+        if self.rss_limit and self.context_uses % self.RSS_CHECK_EVERY == 0:
+            rss = browser_rss_bytes()
+            self.peak_rss = max(self.peak_rss, rss)
+            if rss > self.rss_limit:
+                print(f"Memory at {rss / 1024 / 1024:.0f} MiB, recycling browser context.")
+                return True
+        return False
+
+    async def _recycle(self):
+        old_context = self.context
+        idle, self.idle = self.idle, []
+        for page in idle:
+            await self._close_page(page)
+        await self._new_context()
+        self.recycles += 1
+        if old_context is not None and old_context not in self.in_use.values():
+            await old_context.close()
+
+    async def _close_page(self, page):
+        self.crashed.discard(page)
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def acquire(self):
+        async with self.lock:
+            if self.context is None:
+                await self._new_context()
+            elif self.context_uses and self._needs_recycle():
+                await self._recycle()
+            self.context_uses += 1
+
+            page = None
+            while self.idle:
+                candidate = self.idle.pop()
+                if candidate.is_closed() or candidate in self.crashed:
+                    await self._close_page(candidate)
+                    continue
+                page = candidate
+                break
+            if page is None:
+                page = await self.context.new_page()
+                page.on("crash", lambda crashed_page: self.crashed.add(crashed_page))
+            self.in_use[page] = self.context
+            return page
+
+    async def release(self, page, broken=False):
+        """Returns a page to the pool. Broken or crashed pages are closed and replaced on demand."""
+        async with self.lock:
+            context = self.in_use.pop(page, None)
+            reusable = (
+                not broken
+                and context is self.context
+                and page not in self.crashed
+                and not page.is_closed()
+                and len(self.idle) < self.size
+            )
+            if reusable:
+                self.idle.append(page)
+                return
+            await self._close_page(page)
+            # Last page of a retired context: the context can go now
+            if context is not None and context is not self.context and context not in self.in_use.values():
+                await context.close()
+
+    async def close(self):
+        if self.context is not None:
+            self.peak_rss = max(self.peak_rss, browser_rss_bytes())
+            for page in self.idle:
+                await self._close_page(page)
+            self.idle = []
+            await self.context.close()
+            self.context = None
+
+    def summary(self):
+        line = f"Page pool: {self.recycles} context recycles"
+        if psutil is not None and self.peak_rss:
+            line += f", peak memory {self.peak_rss / 1024 / 1024:.0f} MiB"
+        return line
+
+CHAPTER_LIST_PANEL = 'div[role="tabpanel"][id*="-content-chapters_list"]'
+# Content the popup is raced against, once hydrated: server-rendered markup shows up before the popup does,
+# hydrated markup only after the popup has had its chance to render
+PAGE_READY_SELECTOR = f'{CHAPTER_LIST_PANEL}, #reader-container'
+PAGE_HYDRATED_JS = '''selector => {
+    const node = document.querySelector(selector);
+    if (!node) return false;
+    // Pages without React (e.g. the benchmark fixture) are ready once loaded
+    if (!(self.__next_f || self.__NEXT_DATA__ || self.next)) return document.readyState === 'complete';
+    return Object.keys(node).some(key => key.startsWith('__reactFiber$') || key.startsWith('__reactProps$'));
+}'''
+# Upper bound on the race; only reached if neither the popup nor hydrated content ever shows
+POPUP_TIMEOUT_MS = 5000
+
+async def timed_wait(label, awaitable):
+    """Awaits a readiness condition and logs how long it actually took."""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        print(f"Waited {time.perf_counter() - start:.2f}s for {label}")
+
+async def wait_for_dom_quiet(page, selector, quiet_ms=250, timeout_ms=5000):
+    """
+    Resolves once the element matching selector has gone quiet_ms without a DOM mutation
+    (or after timeout_ms). Used instead of a fixed sleep while a list finishes populating.
+    """
+    return await page.evaluate('''([selector, quietMs, timeoutMs]) => new Promise(resolve => {
+        const target = document.querySelector(selector);
+        if (!target) return resolve(false);
+        let quietTimer = setTimeout(done, quietMs);
+        const deadline = setTimeout(done, timeoutMs);
+        const observer = new MutationObserver(() => {
+            clearTimeout(quietTimer);
+            quietTimer = setTimeout(done, quietMs);
+        });
+        function done() {
+            observer.disconnect();
+            clearTimeout(quietTimer);
+            clearTimeout(deadline);
+            resolve(true);
+        }
+        observer.observe(target, {childList: true, subtree: true, characterData: true});
+    })''', [selector, quiet_ms, timeout_ms])
+
+async def wait_for_list_change(page, previous_first_slug, link_selector, timeout_ms=10000):
+    """
+    Waits until the first chapter link (matching link_selector) in the list differs from previous_first_slug.
+    Returns False on timeout instead of raising, so callers can decide how to proceed.
+    """
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    if not previous_first_slug:
+        return True
+    try:
+        await page.wait_for_function('''([panelSelector, linkSelector, previous]) => {
+            const panel = document.querySelector(panelSelector);
+            const link = panel && panel.querySelector(linkSelector);
+            if (!link) return false;
+            const slug = link.getAttribute('href').split('/').pop();
+            return slug && slug !== previous;
+        }''', arg=[CHAPTER_LIST_PANEL, link_selector, previous_first_slug], timeout=timeout_ms)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+async def popup_or_ready(page, button, ready_selector=PAGE_READY_SELECTOR):
+    """
+    Races the popup's button becoming visible against ready_selector being hydrated.
+    Returns True if the popup showed, False once the page proved it has none (or on timeout).
+    """
+    popup = asyncio.ensure_future(button.wait_for(state="visible", timeout=POPUP_TIMEOUT_MS))
+    ready = asyncio.ensure_future(page.wait_for_function(PAGE_HYDRATED_JS, arg=ready_selector, timeout=POPUP_TIMEOUT_MS))
+    pending = {popup, ready}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if popup in done and popup.exception() is None:
+                return True
+            if ready in done and ready.exception() is None:
+                # Both may have settled in the same poll
+                return await button.is_visible()
+        return False
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
 
 async def handle_popup(page, wait_for_visible=False):
     try:
-        # Wait a moment for dynamic content or popups to appear
         # The 'I understand' button might take a second to render
         button = page.locator("button").filter(has_text=re.compile(r"I understand", re.I)).first
         
         if wait_for_visible:
-            await button.wait_for(state="visible", timeout=5000)
+            if not await timed_wait("popup or hydrated page", popup_or_ready(page, button)):
+                print("No popup shown.")
+                return
             print("Found 'I understand' popup. Clicking...")
             await button.click()
             # Wait for the popup to disappear
@@ -60,21 +506,125 @@ async def handle_popup(page, wait_for_visible=False):
     except Exception:
         pass
 
-async def generate_metadata_async(max_pages=40, existing_metadata=None, force_full_scan=False):
+def listing_page_url(source_url, page_num):
+    parts = urlparse(source_url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    query["page"] = [str(page_num)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+def listing_items_from_json(payload, series_path):
+    """
+    Converts a chapter-list API response into the same {href, text, isPaid} items the DOM scan produces,
+    with hrefs under series_path. Returns (items, last_page); last_page is None if the response doesn't report it.
+    """
+    if isinstance(payload, list):
+        entries, meta = payload, {}
+    elif isinstance(payload, dict):
+        entries = payload.get("data") or payload.get("chapters") or []
+        meta = payload.get("meta") or {}
+    else:
+        return [], None
+
+    items = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        slug = entry.get("chapter_slug") or entry.get("slug")
+        if not slug:
+            continue
+        # Rebuild the text the chapter list shows: title, optional subtitle, release date
+        name = entry.get("chapter_name") or entry.get("name") or slug
+        lines = [name]
+        subtitle = entry.get("chapter_title")
+        if subtitle and subtitle != name:
+            lines.append(subtitle)
+        created_at = entry.get("created_at")
+        if created_at:
+            try:
+                lines.append(datetime.fromisoformat(created_at.replace("Z", "+00:00")).strftime("%m/%d/%Y"))
+            except ValueError:
+                pass
+        is_paid = bool(entry.get("price")) or bool(entry.get("is_paid"))
+        items.append({"href": f"{series_path}/{slug}", "text": "\n".join(lines), "isPaid": is_paid})
+
+    last_page = meta.get("last_page") or meta.get("lastPage") or meta.get("total_pages")
+    return items, int(last_page) if last_page else None
+
+async def find_listing_source(responses, series_path):
+    """Returns the URL of the first captured response that looks like a chapter-list page, or None."""
+    for response in responses:
+        try:
+            items, _ = listing_items_from_json(await response.json(), series_path)
+        except Exception:
+            continue
+        if items:
+            return response.url
+    return None
+
+async def scan_listing_api(page, source_url, series_path, process_items, max_pages, force_full_scan):
+    """
+    Fetches chapter-list pages straight from the listing API, LISTING_CONCURRENCY at a time.
+    Pages are still processed in order so the stop-when-known logic matches the click-through scan.
+    """
+    print(f"Found chapter list source: {source_url}")
+    semaphore = asyncio.Semaphore(LISTING_CONCURRENCY)
+
+    async def fetch(page_num):
+        async with semaphore:
+            resp = await page.request.get(listing_page_url(source_url, page_num))
+            if not resp.ok:
+                raise RuntimeError(f"HTTP {resp.status} for listing page {page_num}")
+            return listing_items_from_json(await resp.json(), series_path)
+
+    last_page = max_pages
+    page_num = 1
+    # Page 1 alone first: on incremental runs it is usually the only page needed
+    batch_size = 1
+    while page_num <= last_page:
+        batch = list(range(page_num, min(page_num + batch_size, last_page + 1)))
+        results = await asyncio.gather(*(fetch(n) for n in batch))
+        for n, (items, reported_last_page) in zip(batch, results):
+            if reported_last_page:
+                last_page = min(max_pages, reported_last_page)
+            print(f"Generating metadata page {n}...")
+            if not items:
+                print("No more chapters found. Stopping.")
+                return True
+            new_links, all_known, _ = process_items(items)
+            print(f"Found {new_links} chapter links on page {n}")
+            if all_known and not force_full_scan and new_links > 0:
+                print("All chapters on this page are already known. Stopping metadata scan.")
+                return True
+        page_num += len(batch)
+        batch_size = LISTING_CONCURRENCY
+    return True
+
+async def generate_metadata_async(max_pages=40, existing_metadata=None, force_full_scan=False, session=None, on_cover_url=None,
+                                  series=None):
+    series = series or DEFAULT_SERIES
     if existing_metadata is None:
         existing_metadata = {}
-    print("Checking for new chapters...")
+    owns_session = session is None
+    if owns_session:
+        session = BrowserSession()
+    print(f"Checking for new chapters of {series.title}...")
     metadata = existing_metadata.get("metadata", {}).copy()
     ordered_slugs = existing_metadata.get("order", []).copy()
     
-    # Track new chapters found
+    # Track new chapters found; the set answers the per-link "seen this scan?" check
     new_slugs = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        await page.goto(SERIES_URL)
+    new_slug_set = set()
+    # Images stay allowed here: the cover <img> must render to be detected
+    context = await session.new_context(allow_types={"image"})
+    try:
+        page = await context.new_page()
+        with profiler.span("navigation"):
+            await page.goto(series.url)
         
-        await handle_popup(page, wait_for_visible=True)
+        with profiler.span("handle_popup"):
+            await handle_popup(page, wait_for_visible=True)
+        # Keep the consent cookies for the chapter workers
+        await session.remember_consent(context)
         
         # Extract cover image URL
         cover_image_url = None
@@ -94,6 +644,18 @@ async def generate_metadata_async(max_pages=40, existing_metadata=None, force_fu
                         cover_image_url = unquote(match.group(1))
         except Exception as e:
             print(f"Warning: Could not find cover image: {e}")
+        if cover_image_url and on_cover_url:
+            # Lets the caller download the cover while the chapter list is still being scanned
+            on_cover_url(cover_image_url)
+
+        # Capture the requests the chapter list loads from so later pages can be fetched directly
+        listing_responses = []
+
+        def on_response(response):
+            if response.request.resource_type in ("xhr", "fetch") and "page=" in response.url:
+                listing_responses.append(response)
+
+        page.on("response", on_response)
 
         # Click on "Chapters list" tab
         try:
@@ -102,21 +664,21 @@ async def generate_metadata_async(max_pages=40, existing_metadata=None, force_fu
                 await tab.click()
                 print("Clicked 'Chapters list' tab.")
                 # Specific selector to ensure we are waiting for the actual list content
-                list_selector = 'div[role="tabpanel"][id*="-content-chapters_list"] a[href*="/series/a-regressors-tale-of-cultivation/"]'
-                await page.wait_for_selector(list_selector, timeout=20000)
-                # Small safety sleep to allow more links to populate
-                await asyncio.sleep(1)
+                list_selector = f'{CHAPTER_LIST_PANEL} {series.link_selector}'
+                await timed_wait("chapter list", page.wait_for_selector(list_selector, timeout=20000))
+                # Let the remaining links populate: returns as soon as the panel stops changing
+                await timed_wait("chapter list to settle", wait_for_dom_quiet(page, CHAPTER_LIST_PANEL))
         except Exception as e:
             print(f"Warning: Could not click chapters list tab or wait for content: {e}")
 
         async def extract_current_page():
             # Use evaluate to extract data directly from the DOM, which is more robust than inner_html+BS4
             # especially for dynamic frameworks like Next.js
-            chapters_data = await page.evaluate('''() => {
-                const container = document.querySelector('div[role="tabpanel"][id*="-content-chapters_list"]');
+            chapters_data = await page.evaluate('''([panelSelector, linkSelector]) => {
+                const container = document.querySelector(panelSelector);
                 if (!container) return [];
                 
-                const links = Array.from(container.querySelectorAll('a[href*="/series/a-regressors-tale-of-cultivation/"]'));
+                const links = Array.from(container.querySelectorAll(linkSelector));
                 return links.map(link => {
                     const href = link.getAttribute('href');
                     const text = link.innerText;
@@ -131,8 +693,11 @@ async def generate_metadata_async(max_pages=40, existing_metadata=None, force_fu
                     
                     return { href, text, isPaid };
                 });
-            }''')
+            }''', [CHAPTER_LIST_PANEL, series.link_selector])
 
+            return process_listing_items(chapters_data)
+
+        def process_listing_items(chapters_data):
             links_found = 0
             all_already_known = True
             
@@ -140,7 +705,7 @@ async def generate_metadata_async(max_pages=40, existing_metadata=None, force_fu
                 href = item['href']
                 slug = href.split('/')[-1]
                 
-                if not slug or slug == 'a-regressors-tale-of-cultivation':
+                if not slug or slug == series.slug:
                     continue
                 
                 if item['isPaid']:
@@ -217,9 +782,10 @@ async def generate_metadata_async(max_pages=40, existing_metadata=None, force_fu
                 if slug not in metadata:
                     all_already_known = False
                     new_slugs.append(slug)
+                    new_slug_set.add(slug)
 
                 metadata[slug] = {
-                    "url": BASE_URL + href if href.startswith('/') else href,
+                    "url": series.base_url + href if href.startswith('/') else href,
                     "title": clean_title,
                     "release_date": release_date,
                     "slug": slug
@@ -230,7 +796,7 @@ async def generate_metadata_async(max_pages=40, existing_metadata=None, force_fu
             first_slug = None
             for item in chapters_data:
                 slug = item['href'].split('/')[-1]
-                if slug and slug != 'a-regressors-tale-of-cultivation':
+                if slug and slug != series.slug:
                     first_slug = slug
                     break
 
@@ -239,314 +805,1121 @@ async def generate_metadata_async(max_pages=40, existing_metadata=None, force_fu
             
             for item in chapters_data:
                  slug = item['href'].split('/')[-1]
-                 if slug and slug != 'a-regressors-tale-of-cultivation' and not item['isPaid']:
+                 if slug and slug != series.slug and not item['isPaid']:
                      page_valid_links_count += 1
                      # If this slug WAS added to new_slugs just now, it means it wasn't known before
-                     if slug in new_slugs: 
+                     if slug in new_slug_set:
                          all_known_on_this_page = False
                      
             return page_valid_links_count, all_known_on_this_page, first_slug
 
-        current_page_first_slug = None
+        scanned_via_api = False
+        listing_source = await find_listing_source(listing_responses, series.path)
+        if listing_source:
+            try:
+                scanned_via_api = await scan_listing_api(page, listing_source, series.path, process_listing_items, max_pages, force_full_scan)
+            except Exception as e:
+                print(f"Warning: Direct chapter list fetch failed, falling back to pagination clicks: {e}")
+
+        if not scanned_via_api:
+            current_page_first_slug = None
         
-        for p_idx in range(1, max_pages + 1):
-            print(f"Generating metadata page {p_idx}...")
+            for p_idx in range(1, max_pages + 1):
+                print(f"Generating metadata page {p_idx}...")
             
-            # If we just navigated, ensure the content has actually changed
-            retries = 0
-            while True:
-                new_links, all_known, first_slug = await extract_current_page()
+                # If we just navigated, ensure the content has actually changed
+                retries = 0
+                while True:
+                    new_links, all_known, first_slug = await extract_current_page()
                 
-                # If we have a previous slug to compare against, and they are the same,
-                # it means the page hasn't updated yet.
-                if current_page_first_slug and first_slug == current_page_first_slug and retries < 5:
-                    print(f"Page content hasn't changed yet, waiting... ({retries+1}/5)")
-                    await asyncio.sleep(2)
-                    retries += 1
-                    continue
-                break
+                    # If we have a previous slug to compare against, and they are the same,
+                    # it means the page hasn't updated yet.
+                    if current_page_first_slug and first_slug == current_page_first_slug and retries < 5:
+                        print(f"Page content hasn't changed yet, waiting... ({retries+1}/5)")
+                        await wait_for_list_change(page, current_page_first_slug, series.link_selector, timeout_ms=2000)
+                        retries += 1
+                        continue
+                    break
             
-            current_page_first_slug = first_slug
+                current_page_first_slug = first_slug
 
-            if new_links > 0:
-                print(f"Found {new_links} chapter links on page {p_idx}")
+                if new_links > 0:
+                    print(f"Found {new_links} chapter links on page {p_idx}")
             
-            if all_known and not force_full_scan and new_links > 0:
-                print("All chapters on this page are already known. Stopping metadata scan.")
-                break
+                if all_known and not force_full_scan and new_links > 0:
+                    print("All chapters on this page are already known. Stopping metadata scan.")
+                    break
             
-            # If we found 0 links on the first page, something is wrong (likely blocked)
-            if new_links == 0 and p_idx == 1:
-                print("Warning: No chapters found on textual scan of page 1. The page might be loading or blocked.")
-                # We don't break here to allow trying pagination or seeing if content loads late
-            elif new_links == 0 and all_known:
-                 # Standard end of list (empty page at end)
-                 print("No more chapters found. Stopping.")
-                 break
+                # If we found 0 links on the first page, something is wrong (likely blocked)
+                if new_links == 0 and p_idx == 1:
+                    print("Warning: No chapters found on textual scan of page 1. The page might be loading or blocked.")
+                    # We don't break here to allow trying pagination or seeing if content loads late
+                elif new_links == 0 and all_known:
+                     # Standard end of list (empty page at end)
+                     print("No more chapters found. Stopping.")
+                     break
 
-            try:
-                next_page_num = str(p_idx + 1)
-                # Broader selector for pagination numbers
-                next_button = page.locator("li a, li button, button").filter(has_text=re.compile(f"^{next_page_num}$")).first
-                if await next_button.is_visible():
-                    await next_button.click()
-                    # Initial wait for click to register
-                    await asyncio.sleep(1)
-                else:
-                    # Broader selector for Next button
-                    next_button = page.locator("li a, li button, button, a").filter(has_text=re.compile(r"^>$|Next", re.I)).first
+                try:
+                    next_page_num = str(p_idx + 1)
+                    # Broader selector for pagination numbers
+                    next_button = page.locator("li a, li button, button").filter(has_text=re.compile(f"^{next_page_num}$")).first
                     if await next_button.is_visible():
                         await next_button.click()
-                        await asyncio.sleep(1)
+                        await timed_wait(f"page {next_page_num}", wait_for_list_change(page, current_page_first_slug, series.link_selector))
                     else:
-                        print(f"No more pagination buttons found at page {p_idx}.")
-                        break
-            except Exception as e:
-                print(f"Error navigating to next page: {e}")
-                # Try to handle popup in case it appeared late
-                await handle_popup(page, wait_for_visible=True)
-                break
+                        # Broader selector for Next button
+                        next_button = page.locator("li a, li button, button, a").filter(has_text=re.compile(r"^>$|Next", re.I)).first
+                        if await next_button.is_visible():
+                            await next_button.click()
+                            await timed_wait(f"page {next_page_num}", wait_for_list_change(page, current_page_first_slug, series.link_selector))
+                        else:
+                            print(f"No more pagination buttons found at page {p_idx}.")
+                            break
+                except Exception as e:
+                    print(f"Error navigating to next page: {e}")
+                    # Try to handle popup in case it appeared late
+                    await handle_popup(page, wait_for_visible=True)
+                    break
                 
-        await browser.close()
+    finally:
+        await context.close()
+        if owns_session:
+            await session.close()
         
     # Websites often list newest first. Chapter order should be oldest first for the EPUB.
-    # We prepended new ones (descending), so we need to reverse them and extend the old list.
-    if new_slugs:
-        new_slugs.reverse()
-        ordered_slugs.extend(new_slugs)
+    # The scan saw new ones newest first; reversed after the old order, they place the
+    # Q&A/Tidbit entries the index can't number, and the index sorts everything else.
+    new_slugs.reverse()
+    index = ChapterIndex(metadata, ordered_slugs + new_slugs)
+    print(index.summary())
+    
+    return {"metadata": metadata, "order": index.order(), "cover_image_url": cover_image_url}
+
+# Returns the reader's block elements as [{tag, html, texts}], or null without a reader container.
+# texts holds the raw text nodes so block_text() can reproduce BeautifulSoup's get_text(sep, strip=True).
+READER_BLOCKS_JS = '''() => {
+    const container = document.querySelector('#reader-container');
+    if (!container) return null;
+    return Array.from(container.querySelectorAll('p, h1, h2, h3, h4, h5, h6')).map(el => {
+        const texts = [];
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) texts.push(walker.currentNode.data);
+        return {tag: el.tagName.toLowerCase(), html: el.outerHTML, texts};
+    });
+}'''
+
+@lru_cache(maxsize=None)
+def reader_strainer():
+    from bs4 import SoupStrainer
+    return SoupStrainer(id="reader-container")
+
+def block_text(block, separator):
+    """Equivalent of Tag.get_text(separator, strip=True) for an extracted block."""
+    return separator.join(t.strip() for t in block["texts"] if t.strip())
+
+def clean_block(block):
+    """Applies clean_text_node_content to every text node of a block, leaving the markup alone."""
+    parts = TAG_SPLIT_RE.split(block["html"])
+    for i in range(0, len(parts), 2):
+        # Browser serialization escapes U+00A0; BeautifulSoup writes it out literally
+        parts[i] = clean_text_node_content(parts[i].replace("&nbsp;", "\xa0"))
+    return {
+        "tag": block["tag"],
+        "html": "".join(parts),
+        "texts": [clean_text_node_content(t) for t in block["texts"]],
+    }
+
+def reader_blocks(content):
+    """The reader's block elements from a full chapter page, shaped like READER_BLOCKS_JS output, or None."""
+    # Only the reader container is turned into a tree; the rest of the page is skipped while parsing
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, HTML_PARSER, parse_only=reader_strainer())
+    container = soup.find(id="reader-container")
     
-    return {"metadata": metadata, "order": ordered_slugs, "cover_image_url": cover_image_url}
-
-def clean_text_node_content(text):
-    # 1. Handle mixed/double-single quotes -> double quotes
-    # The user requested 'double single quotes' be fixed to double quotes.
-    # We treat mixed artifacts (like ‘' or ’' or ‘' etc) as double quotes too.
-    text = text.replace("‘'", '"').replace("'‘", '"')
-    text = text.replace("’'", '"').replace("'’", '"')
-    text = text.replace("‘‘", '"').replace("’’", '"')
-    text = text.replace("''", '"')
-
-    # 2. Normalize remaining smart quotes to straight quotes to ensure clean slate
-    text = text.replace('“', '"').replace('”', '"')
-    text = text.replace('‘', "'").replace('’', "'")
-    return text
-
-def apply_smartypants(text):
-    if smartypants:
-        # q=quotes, d=dashes, e=ellipses, u=unicode (no HTML entities)
-        # We process the final HTML string, so skipping entities is safer/cleaner.
-        attr = smartypants.Attr.q | smartypants.Attr.d | smartypants.Attr.e | smartypants.Attr.u
-        return smartypants.smartypants(text, attr=attr)
-    return text
-
-def format_html_content(text):
-    # Italicize single quoted sentences
-    # Pattern looks for single quotes wrapping content.
-    # Inner content allows:
-    # 1. Any non-quote non-tag-start character: [^'<]
-    # 2. An apostrophe that is sandwiched between word characters (e.g. don't, it's): (?<=\w)'(?=\w)
-    pattern_italic = r"(?<=[ >\n])'((?:[^'<]|(?<=\w)'(?=\w))+?)'(?=[ <.,;:!?\n])"
+    if not container:
+        return None
+
+    return [
+        {"tag": p.name, "html": str(p), "texts": [str(t) for t in p.strings]}
+        for p in container.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+    ]
+
+def parse_chapter_html(content, slug, meta_title=None):
+    """
+    Extracts and cleans the chapter text from a full chapter page.
+    Returns {slug: {"content", "title"}} (two entries for the merged 807-808 page),
+    or None if the page has no #reader-container.
+    """
+    blocks = reader_blocks(content)
+    if blocks is None:
+        return None
+    return process_chapter_blocks(blocks, slug, meta_title)
+
+def reader_fingerprint(blocks):
+    """
+    Hash of the reader text as served, before any cleanup. Built from block tags and text
+    nodes rather than markup, so the HTTP and browser backends fingerprint a chapter the same.
+    """
+    h = hashlib.sha1()
+    for block in blocks:
+        h.update(block["tag"].encode('utf-8'))
+        h.update(b"\x1f")
+        h.update("\x1f".join(block["texts"]).encode('utf-8'))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+def raw_fingerprint(kind, raw):
+    """reader_fingerprint for fetch_chapter_raw output, or None if it has no reader content."""
+    blocks = raw if kind == "blocks" else reader_blocks(raw)
+    return reader_fingerprint(blocks) if blocks is not None else None
+
+def process_chapter_blocks(p_tags, slug, meta_title=None):
+    """
+    Title detection, ad filtering, cleanup and the 807-808 split, run over the
+    reader's block elements as produced by READER_BLOCKS_JS or parse_chapter_html.
+    """
+    title_pattern = ""
+    if slug == "chapter-0":
+        title_pattern = "Prologue"
+    elif slug.startswith("chapter-"):
+        ch_num = slug.split("-")[-1]
+        if ch_num.isdigit():
+            title_pattern = f"Chapter {ch_num}"
     
-    # Use a callback to wrap in em tags
-    text = re.sub(pattern_italic, r"<em>'\1'</em>", text)
+    # Extract title BEFORE filtering (to ensure we capture it even if the line has ads)
+    title = meta_title if meta_title else slug
+    found_title = False
+    title_search_re, title_slug_re = title_regexes(title_pattern)
     
-    # Bold square bracketed content
-    pattern_bold = r"\[(.*?)\]"
-    text = re.sub(pattern_bold, r"<strong>[\1]</strong>", text)
+    # Look for title in the first few raw paragraphs
+    for p in p_tags[:10]:
+        text_with_newlines = block_text(p, "\n")
+        lines = [l.strip() for l in text_with_newlines.split("\n") if l.strip()]
+        
+        for line in lines:
+            match = title_search_re.search(line)
+            if not match and title_slug_re:
+                match = title_slug_re.search(line)
+
+            if not match:
+                match = CHAPTER_TITLE_RE.search(line)
+
+            if match:
+                potential_title = match.group(1).strip()
+                # Clean the potential title from ads if they are inextricably linked (rare in regex mismatch but possible)
+                # We use the raw text for detection, but we want a clean title string.
+                for kw in AD_KEYWORDS:
+                    if kw in potential_title:
+                        potential_title = potential_title.split(kw)[0].strip()
+                
+                if len(potential_title) >= 8 or slug == "chapter-0":
+                    title = potential_title
+                    found_title = True
+                    break
+        if found_title: break
     
-    return text
+    cleaned_p_tags = []
+    for p in p_tags:
+        text = block_text(p, " ")
+        
+        # Check for critical split markers for the 807-808 case
+        is_split_marker = False
+        if slug == "chapter-807-808":
+            if "Chapter 807" in text or "Chapter 808" in text or "Afterword" in text:
+                is_split_marker = True
 
-async def generate_chapter_content_async(context, url, slug, meta_title=None):
-    for attempt in range(MAX_RETRIES):
-        page = await context.new_page()
+        # If it contains an ad keyword, remove it, UNLESS it's a critical split marker
+        if contains_ad(text) and not is_split_marker:
+            continue
+        
+        if not text:
+            continue
+                            
+        cleaned_p_tags.append(p)
+
+    # Apply textual cleanup to the text nodes of the valid blocks
+    cleaned_p_tags = [clean_block(p) for p in cleaned_p_tags]
+
+    if slug == "chapter-807-808":
+        ch807_content, ch808_content = [], []
+        title807, title808 = "Chapter 807", "Chapter 808"
+        current_ch = 807
+        for p in cleaned_p_tags:
+            text_with_newlines = block_text(p, "\n")
+            lines = [l.strip() for l in text_with_newlines.split("\n") if l.strip()]
+            
+            found_807_in_p = False
+            found_808_in_p = False
+
+            for line in lines:
+                match807 = re.search(r'Chapter 807[:\s\-].*$', line, re.I)
+                # Fix: Anchor Afterword to start of line to avoid matching usage in sentences
+                match808 = re.search(r'(Chapter 808[:\s\-].*|^Afterword(?:[:\s\.\-].*)?)$', line, re.I)
+                
+                if match807:
+                    title807 = match807.group(0).strip()
+                    found_807_in_p = True
+                if match808:
+                    current_ch = 808
+                    title808 = match808.group(0).strip()
+                    found_808_in_p = True
+            
+            if current_ch == 807: 
+                if not found_807_in_p:
+                    ch807_content.append(p["html"])
+            else: 
+                if not found_808_in_p:
+                    ch808_content.append(p["html"])
+        
+        content807 = format_html_content("\n".join(ch807_content))
+        content808 = format_html_content("\n".join(ch808_content))
+        with profiler.span("smartypants", slug):
+            content807 = apply_smartypants(content807)
+            content808 = apply_smartypants(content808)
+        
+        return {
+            "chapter-807": {"content": content807, "title": title807, "source_slug": slug},
+            "chapter-808": {"content": content808, "title": title808, "source_slug": slug}
+        }
+    
+    # Remove the first paragraph if it is identical to the title
+    # This logic happens AFTER title extraction, so we don't break title detection.
+    if cleaned_p_tags:
+        first_p_text = block_text(cleaned_p_tags[0], " ")
+        # Clean up the texts for comparison (remove smart quotes or extra spaces if any)
+        clean_first_p = clean_text_node_content(first_p_text).replace('"', '').replace("'", "").lower().strip()
+        clean_title = clean_text_node_content(title).replace('"', '').replace("'", "").lower().strip()
+        
+        # Check for exact match or if title is "Chapter X: Title" and first line is "Title" etc
+        # Or if first line is "Chapter X" and title is "Chapter X"
+        if clean_first_p == clean_title or clean_title in clean_first_p:
+            # Remove the first paragraph
+            cleaned_p_tags.pop(0)
+
+    # Serialize first to get plain HTML with straight quotes
+    final_content = "\n".join([p["html"] for p in cleaned_p_tags])
+    
+    # Apply italicization (looks for straight '...')
+    final_content = format_html_content(final_content)
+    
+    # Apply smart quotes (converts straight quotes to curly, preserving tags)
+    with profiler.span("smartypants", slug):
+        final_content = apply_smartypants(final_content)
+    
+    return {slug: {"content": final_content, "title": title}}
+
+def http_validators(resp):
+    return {"etag": resp.headers.get("etag"), "last_modified": resp.headers.get("last-modified")}
+
+def is_throttled(error):
+    """True for an httpx.HTTPStatusError carrying one of THROTTLE_STATUSES."""
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in THROTTLE_STATUSES
+
+# Any quoting and spacing of the reader container's id attribute
+READER_ID_RE = re.compile(r"""\bid\s*=\s*["']?reader-container(?![\w-])""")
+
+def html_has_reader(html):
+    # Cheap pre-check before handing the page to BeautifulSoup
+    return READER_ID_RE.search(html) is not None
+
+async def limited_get(client, url, limiter=None, headers=None):
+    """client.get, reported to the concurrency controller: rate ceiling before, latency, status and timeouts after."""
+    import httpx
+    if limiter is None:
+        return await client.get(url, headers=headers)
+    await limiter.throttle()
+    start = time.perf_counter()
+    try:
+        resp = await client.get(url, headers=headers)
+    except httpx.TimeoutException:
+        limiter.record_timeout("http")
+        raise
+    limiter.record_status(resp.status_code, time.perf_counter() - start, "http")
+    return resp
+
+async def fetch_chapter_html_http(client, url, limiter=None):
+    """
+    Fetches the server-rendered chapter page. Returns (html, validators); html is None
+    if the reader container is not in it.
+    """
+    resp = await limited_get(client, url, limiter)
+    resp.raise_for_status()
+    html = resp.text
+    if not html_has_reader(html):
+        return None, None
+    return html, http_validators(resp)
+
+async def fetch_chapter_raw_browser(page_pool, url, slug, resource_stats=None, limiter=None, attempt=None):
+    """
+    Loads a chapter in a pooled page and returns its raw material for process_raw_chapter:
+    ("blocks", [...]) in "evaluate" extraction mode, ("html", str) in "content" mode, or None.
+    With attempt set, makes only that one attempt (the pipeline schedules retries itself);
+    otherwise retries in place up to MAX_RETRIES times.
+    """
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    attempts = range(MAX_RETRIES) if attempt is None else [attempt]
+    for attempt in attempts:
+        page = await page_pool.acquire()
+        broken = False
+        raw = None
         try:
             if attempt == 0:
                 print(f"Generating {slug}")
             else:
                 print(f"Retrying {slug} (Attempt {attempt + 1})")
             timeout = 30000 + (attempt * 10000)
-            await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
-            await handle_popup(page)
+            if limiter is not None:
+                await limiter.throttle()
+            load_start = time.perf_counter()
+            with profiler.span("navigation", slug):
+                response = await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+            if limiter is not None and response is not None:
+                limiter.record_status(response.status, time.perf_counter() - load_start, "browser")
+            with profiler.span("handle_popup", slug):
+                await handle_popup(page)
             
             try:
-                await page.wait_for_selector("#reader-container", timeout=10000)
+                with profiler.span("wait_for_selector", slug):
+                    await page.wait_for_selector("#reader-container", timeout=10000)
             except Exception:
-                await page.close()
-                continue
-                
-            content = await page.content()
-            soup = BeautifulSoup(content, 'html.parser')
-            container = soup.find(id="reader-container")
-            
-            if not container:
-                await page.close()
                 continue
+            if resource_stats is not None:
+                resource_stats.record_page_load(time.perf_counter() - load_start)
                 
-            p_tags = container.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-            ad_keywords = ["Discord", "Ko-fi", "Patreon", "Want more chapters", "Next chapter", "Previous chapter", "Consider supporting", "buymeacoffee", "TranslatingNovice", "Z0Rel", "BlueMangoAde"]
-            
-            title_pattern = ""
-            if slug == "chapter-0":
-                title_pattern = "Prologue"
-            elif slug.startswith("chapter-"):
-                ch_num = slug.split("-")[-1]
-                if ch_num.isdigit():
-                    title_pattern = f"Chapter {ch_num}"
-            
-            # Extract title BEFORE filtering (to ensure we capture it even if the line has ads)
-            title = meta_title if meta_title else slug
-            found_title = False
-            title_search_pattern = title_pattern if title_pattern else r"(Chapter \d+|Author's Q&A \(\d+\)|Author's Tidbit \(\d+\))"
-            
-            # Look for title in the first few raw paragraphs
-            for p in p_tags[:10]:
-                text_with_newlines = p.get_text("\n", strip=True)
-                lines = [l.strip() for l in text_with_newlines.split("\n") if l.strip()]
-                
-                for line in lines:
-                    match = re.search(rf'^({title_search_pattern}([:\s\-].*)?)$', line, re.I)
-                    if not match and title_pattern:
-                        match = re.search(rf'^({title_pattern}(\s+.*)?)$', line, re.I)
+            with profiler.span("extract", slug):
+                if EXTRACTION_MODE == "evaluate":
+                    blocks = await page.evaluate(READER_BLOCKS_JS)
+                    if blocks is not None:
+                        raw = ("blocks", blocks)
+                else:
+                    raw = ("html", await page.content())
 
-                    if not match:
-                        match = re.search(r'^(Chapter \d+([:\s\-].*)?)$', line, re.I)
+        except PlaywrightTimeoutError:
+            print(f"Timeout on chapter {slug}, attempt {attempt + 1}")
+            if limiter is not None:
+                limiter.record_timeout("browser")
+            # A page stuck mid-navigation is not worth reusing
+            broken = True
+            continue
+        except Exception as e:
+            print(f"Error on chapter {slug}: {e}")
+            broken = True
+            continue
+        finally:
+            await page_pool.release(page, broken=broken)
 
-                    if match:
-                        potential_title = match.group(1).strip()
-                        # Clean the potential title from ads if they are inextricably linked (rare in regex mismatch but possible)
-                        # We use the raw text for detection, but we want a clean title string.
-                        for kw in ad_keywords:
-                            if kw in potential_title:
-                                potential_title = potential_title.split(kw)[0].strip()
-                        
-                        if len(potential_title) >= 8 or slug == "chapter-0":
-                            title = potential_title
-                            found_title = True
-                            break
-                if found_title: break
+        if raw is not None:
+            return raw
             
-            cleaned_p_tags = []
-            for p in p_tags:
-                text = p.get_text(" ", strip=True)
-                
-                # Check for critical split markers for the 807-808 case
-                is_split_marker = False
-                if slug == "chapter-807-808":
-                    if "Chapter 807" in text or "Chapter 808" in text or "Afterword" in text:
-                        is_split_marker = True
+    return None
+
+async def fetch_chapter_raw(page_pool, url, slug, http_client=None, backend_report=None, resource_stats=None, validators=None, limiter=None,
+                            attempt=None):
+    """
+    Network half of chapter generation, using the configured fetch backend.
+    With an http_client, the plain HTTP page is tried first and the browser is only used
+    for chapters whose reader container is not server-rendered, or when the HTTP request
+    never got an answer (connection error, timeout).
+    HTTP validators (ETag/Last-Modified) of pages served over HTTP are recorded in validators.
+    A throttling status (THROTTLE_STATUSES) or a 5xx is raised instead: the limiter has already seen it,
+    and the caller's deferred retry is the right answer, not a second request through the browser.
+    Any other 4xx returns None, as in "http" mode; the browser would get the same answer.
+    """
+    import httpx
+    if backend_report is None:
+        backend_report = {}
+
+    if http_client is not None:
+        try:
+            with profiler.span("http_fetch", slug):
+                content, page_validators = await fetch_chapter_html_http(http_client, url, limiter)
+            if content:
+                print(f"Fetched {slug} (http)")
+                backend_report[slug] = "http"
+                if validators is not None:
+                    validators[slug] = page_validators
+                return ("html", content)
+        except httpx.HTTPStatusError as e:
+            if is_throttled(e) or e.response.status_code >= 500:
+                raise
+            print(f"HTTP fetch failed for {slug}: {e}")
+            return None
+        except httpx.TransportError as e:
+            print(f"HTTP fetch failed for {slug}: {e}")
+        if FETCH_BACKEND == "http":
+            return None
+        print(f"Falling back to browser for {slug}")
+
+    raw = await fetch_chapter_raw_browser(page_pool, url, slug, resource_stats, limiter, attempt)
+    if raw:
+        backend_report[slug] = "browser"
+    return raw
+
+def process_raw_chapter(kind, raw, slug, meta_title=None):
+    """
+    CPU-bound half of chapter generation. Module-level so it can run in a worker process.
+    Returns (result, fingerprint of the raw reader content); both are None without reader content.
+    """
+    if kind == "blocks":
+        blocks = raw
+    else:
+        with profiler.span("parse", slug):
+            blocks = reader_blocks(raw)
+    if blocks is None:
+        return None, None
+    with profiler.span("cleanup", slug):
+        result = process_chapter_blocks(blocks, slug, meta_title)
+    return result, reader_fingerprint(blocks)
+
+def process_raw_chapter_profiled(kind, raw, slug, meta_title=None):
+    """process_raw_chapter for a profiled run; also returns the spans recorded in the worker process."""
+    with profiler.collect() as spans:
+        result = process_raw_chapter(kind, raw, slug, meta_title)
+    return result, spans
+
+class ChapterPipeline:
+    """
+    Chapter generation as three stages connected by bounded queues:
+
+    fetch   -- CONCURRENCY_MAX tasks doing network I/O, of which the AdaptiveConcurrency limiter lets
+               `limiter.limit` run at once; a slot is freed as soon as the raw page is in hand
+    parse   -- cleanup and formatting in a ProcessPoolExecutor sized to the cores
+    persist -- one task writing finished chapters (and their source fingerprints) to the store in batches
+
+    A failed attempt does not hold its fetch slot: the chapter goes to a deferred queue with
+    exponential backoff and jitter, and is fed back once the main queue has drained. A
+    CircuitBreaker pauses all fetches while the failure rate is high.
 
-                # If it contains an ad keyword, remove it, UNLESS it's a critical split marker
-                if any(kw.lower() in text.lower() for kw in ad_keywords) and not is_split_marker:
+    Queue depths are printed every PIPELINE_REPORT_INTERVAL seconds, and summary()
+    reports how busy each stage was.
+    """
+
+    def __init__(self, page_pool, chapters_data, http_client=None, resource_stats=None,
+                 fetch_workers=CONCURRENCY_MAX, parse_workers=PARSE_WORKERS, limiter=None, breaker=None, executor=None,
+                 batch_size=PERSIST_BATCH_SIZE):
+        self.page_pool = page_pool
+        self.chapters_data = chapters_data
+        self.http_client = http_client
+        self.resource_stats = resource_stats
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        # A process pool shared with other pipelines; without one, run() starts its own
+        self.executor = executor
+        self.batch_size = batch_size
+        self.backend_report = {}
+        self.validators = {}
+        # Raw pages already fetched by check_for_updates; their fetch is skipped
+        self.prefetched = {}
+        self.failed = []
+        self.errors = {}
+        self.attempts = {}
+        # Heap of (ready_at, seq, item) waiting out their backoff
+        self.deferred = []
+        self.deferred_seq = 0
+        self.retries = 0
+        # Seconds per successful fetch, for benchmarks
+        self.fetch_latencies = []
+        self.breaker = breaker or CircuitBreaker()
+        self.fetch_queue = asyncio.Queue()
+        self.parse_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.persist_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        if limiter is None:
+            limiter = AdaptiveConcurrency(min(CONCURRENCY_INITIAL, fetch_workers), CONCURRENCY_MIN, fetch_workers, MAX_REQUESTS_PER_SECOND)
+        self.limiter = limiter
+        # Slugs whose HTTP page had no usable container; their retry goes straight to the browser
+        self.browser_only = set()
+        self.busy = {"fetch": 0.0, "parse": 0.0, "persist": 0.0}
+        self.peak_depth = {"fetch": 0, "parse": 0, "persist": 0}
+        self.remaining = 0
+        self.done = asyncio.Event()
+        self.started = None
+
+    def _finish(self, count=1):
+        self.remaining -= count
+        if self.remaining <= 0:
+            self.done.set()
+
+    def _retry_or_fail(self, item, reason):
+        """Defers another attempt with exponential backoff and jitter, or gives up after MAX_RETRIES."""
+        slug = item[1]
+        attempt = self.attempts.get(slug, 0) + 1
+        self.attempts[slug] = attempt
+        if attempt < MAX_RETRIES:
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            print(f"Deferring {slug} for {delay:.0f}s ({reason}); attempt {attempt + 1} of {MAX_RETRIES} comes later.")
+            self.deferred_seq += 1
+            heapq.heappush(self.deferred, (time.monotonic() + delay, self.deferred_seq, item))
+            self.retries += 1
+            return
+        print(f"Failed to generate {slug} after {attempt} attempts: {reason}")
+        self.failed.append(slug)
+        self.errors[slug] = reason
+        profiler.note(slug, status="failed", attempts=attempt)
+        self._finish()
+
+    async def _fetch_worker(self):
+        while True:
+            item = await self.fetch_queue.get()
+            url, slug, meta_title = item
+            try:
+                raw = self.prefetched.pop(slug, None)
+                if raw is None:
+                    await self.breaker.wait()
+                    async with self.limiter.slot():
+                        start = time.perf_counter()
+                        http_client = None if slug in self.browser_only else self.http_client
+                        try:
+                            with profiler.span("fetch", slug):
+                                raw = await fetch_chapter_raw(self.page_pool, url, slug, http_client, self.backend_report,
+                                                              self.resource_stats, self.validators, self.limiter,
+                                                              attempt=self.attempts.get(slug, 0))
+                        finally:
+                            elapsed = time.perf_counter() - start
+                            self.busy["fetch"] += elapsed
+                    self.breaker.record(raw is not None)
+                    if raw is not None:
+                        self.fetch_latencies.append(elapsed)
+                if raw is None:
+                    self._retry_or_fail(item, "no reader content fetched")
+                else:
+                    await self.parse_queue.put((url, slug, meta_title, raw))
+                    self._sample_depths()
+            except Exception as e:
+                self.breaker.record(False)
+                self._retry_or_fail(item, f"{type(e).__name__}: {e}")
+            finally:
+                self.fetch_queue.task_done()
+
+    async def _retry_scheduler(self):
+        """Feeds deferred chapters back once the main queue has drained and their backoff has passed."""
+        while True:
+            if self.deferred and self.fetch_queue.empty():
+                wait = self.deferred[0][0] - time.monotonic()
+                if wait <= 0:
+                    _, _, item = heapq.heappop(self.deferred)
+                    self.fetch_queue.put_nowait(item)
                     continue
-                
-                if not text:
+                await asyncio.sleep(min(wait, 1.0))
+            else:
+                await asyncio.sleep(0.5)
+
+    async def _parse_worker(self, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            url, slug, meta_title, (kind, raw) = await self.parse_queue.get()
+            try:
+                start = time.perf_counter()
+                if profiler.active() is None:
+                    result, fingerprint = await loop.run_in_executor(executor, process_raw_chapter, kind, raw, slug, meta_title)
+                else:
+                    (result, fingerprint), spans = await loop.run_in_executor(
+                        executor, process_raw_chapter_profiled, kind, raw, slug, meta_title)
+                    profiler.active().merge(spans)
+                self.busy["parse"] += time.perf_counter() - start
+                if result:
+                    validators = self.validators.get(slug) if kind == "html" else None
+                    await self.persist_queue.put((slug, result, {"fingerprint": fingerprint, **(validators or {})}))
+                    self._sample_depths()
+                elif kind == "html" and slug not in self.browser_only and FETCH_BACKEND != "http":
+                    self.browser_only.add(slug)
+                    await self.fetch_queue.put((url, slug, meta_title))
+                else:
+                    self._retry_or_fail((url, slug, meta_title), "no reader content")
+            except Exception as e:
+                # A cleanup error is a bug, not a site hiccup; retrying would fail the same way
+                print(f"Failed to process {slug}: {e}")
+                self.failed.append(slug)
+                self.errors[slug] = f"{type(e).__name__}: {e}"
+                self._finish()
+            finally:
+                self.parse_queue.task_done()
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        start = time.perf_counter()
+        chapters = {}
+        fingerprints = {}
+        for slug, result, fingerprint in batch:
+            chapters.update(result)
+            fingerprints[slug] = fingerprint
+        with profiler.span("persist"):
+            self.chapters_data.update(chapters, fingerprints)
+        self.busy["persist"] += time.perf_counter() - start
+        for slug, _, _ in batch:
+            profiler.note(slug, status="ok", backend=self.backend_report.get(slug, "prefetched"),
+                          attempts=self.attempts.get(slug, 0) + 1)
+        profiler.count("chapters", len(batch))
+        self._finish(len(batch))
+
+    async def _persist_worker(self):
+        batch = []
+        try:
+            while True:
+                try:
+                    # Block indefinitely for the first result, then flush at most PERSIST_INTERVAL later
+                    timeout = PERSIST_INTERVAL if batch else None
+                    result = await asyncio.wait_for(self.persist_queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    self._flush(batch)
+                    batch = []
                     continue
-                                    
-                cleaned_p_tags.append(p)
+                batch.append(result)
+                self.persist_queue.task_done()
+                if len(batch) >= self.batch_size or len(batch) >= self.remaining:
+                    self._flush(batch)
+                    batch = []
+        except asyncio.CancelledError:
+            self._flush(batch)
+            raise
 
-            # Apply textual cleanup to the valid tags in-place
-            for p in cleaned_p_tags:
-                for text_node in p.find_all(string=True, recursive=True):
-                    cleaned_text = clean_text_node_content(str(text_node))
-                    if cleaned_text != str(text_node):
-                        text_node.replace_with(cleaned_text)
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(PIPELINE_REPORT_INTERVAL)
+            self._sample_depths()
+            print(f"Pipeline: {self.fetch_queue.qsize()} waiting to fetch, {len(self.deferred)} deferred, {self.parse_queue.qsize()} to parse, "
+                  f"{self.persist_queue.qsize()} to persist, {self.remaining} chapters left, "
+                  f"{self.limiter.in_flight}/{self.limiter.limit} fetches in flight")
 
-            await page.close()
+    def _sample_depths(self):
+        for name, queue in (("fetch", self.fetch_queue), ("parse", self.parse_queue), ("persist", self.persist_queue)):
+            self.peak_depth[name] = max(self.peak_depth[name], queue.qsize())
 
-            if slug == "chapter-807-808":
-                ch807_content, ch808_content = [], []
-                title807, title808 = "Chapter 807", "Chapter 808"
-                current_ch = 807
-                for p in cleaned_p_tags:
-                    text_with_newlines = p.get_text("\n", strip=True)
-                    lines = [l.strip() for l in text_with_newlines.split("\n") if l.strip()]
-                    
-                    found_807_in_p = False
-                    found_808_in_p = False
+    async def run(self, items, prefetched=None, validators=None):
+        """
+        Generates every (url, slug, meta_title) in items and returns once all are persisted or failed.
+        prefetched maps slugs to raw pages that are already in hand and go straight to parsing;
+        validators holds the HTTP validators those pages were served with.
+        """
+        if not items:
+            return
+        self.prefetched = dict(prefetched or {})
+        self.validators.update(validators or {})
+        self.remaining = len(items)
+        self.started = time.perf_counter()
+        for item in items:
+            self.fetch_queue.put_nowait(item)
+        self._sample_depths()
 
-                    for line in lines:
-                        match807 = re.search(r'Chapter 807[:\s\-].*$', line, re.I)
-                        # Fix: Anchor Afterword to start of line to avoid matching usage in sentences
-                        match808 = re.search(r'(Chapter 808[:\s\-].*|^Afterword(?:[:\s\.\-].*)?)$', line, re.I)
-                        
-                        if match807:
-                            title807 = match807.group(0).strip()
-                            found_807_in_p = True
-                        if match808:
-                            current_ch = 808
-                            title808 = match808.group(0).strip()
-                            found_808_in_p = True
-                    
-                    if current_ch == 807: 
-                        if not found_807_in_p:
-                            ch807_content.append(str(p))
-                    else: 
-                        if not found_808_in_p:
-                            ch808_content.append(str(p))
-                
-                content807 = apply_smartypants(format_html_content("\n".join(ch807_content)))
-                content808 = apply_smartypants(format_html_content("\n".join(ch808_content)))
-                
-                return {
-                    "chapter-807": {"content": content807, "title": title807, "source_slug": slug},
-                    "chapter-808": {"content": content808, "title": title808, "source_slug": slug}
-                }
-            
-            # Remove the first paragraph if it is identical to the title
-            # This logic happens AFTER title extraction, so we don't break title detection.
-            if cleaned_p_tags:
-                first_p_text = cleaned_p_tags[0].get_text(" ", strip=True)
-                # Clean up the texts for comparison (remove smart quotes or extra spaces if any)
-                clean_first_p = clean_text_node_content(first_p_text).replace('"', '').replace("'", "").lower().strip()
-                clean_title = clean_text_node_content(title).replace('"', '').replace("'", "").lower().strip()
-                
-                # Check for exact match or if title is "Chapter X: Title" and first line is "Title" etc
-                # Or if first line is "Chapter X" and title is "Chapter X"
-                if clean_first_p == clean_title or clean_title in clean_first_p:
-                    # Remove the first paragraph
-                    cleaned_p_tags.pop(0)
-
-            # Serialize first to get plain HTML with straight quotes
-            final_content = "\n".join([str(p) for p in cleaned_p_tags])
-            
-            # Apply italicization (looks for straight '...')
-            final_content = format_html_content(final_content)
-            
-            # Apply smart quotes (converts straight quotes to curly, preserving tags)
-            final_content = apply_smartypants(final_content)
-            
-            return {slug: {"content": final_content, "title": title}}
+        if self.executor is not None:
+            await self._run_stages(self.executor)
+            return
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as executor:
+            await self._run_stages(executor)
 
-        except PlaywrightTimeoutError:
-            print(f"Timeout on chapter {slug}, attempt {attempt + 1}")
-            await page.close()
-        except Exception as e:
-            print(f"Error on chapter {slug}: {e}")
-            await page.close()
-            
-    return None
+    async def _run_stages(self, executor):
+        tasks = [asyncio.create_task(self._fetch_worker()) for _ in range(self.fetch_workers)]
+        tasks += [asyncio.create_task(self._parse_worker(executor)) for _ in range(self.parse_workers)]
+        tasks.append(asyncio.create_task(self._persist_worker()))
+        tasks.append(asyncio.create_task(self._retry_scheduler()))
+        tasks.append(asyncio.create_task(self._monitor()))
+        try:
+            await self.done.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-async def worker(context, queue, chapters_data, semaphore):
-    while True:
-        item = await queue.get()
-        url, slug, meta_title = item
-        async with semaphore:
-            result = await generate_chapter_content_async(context, url, slug, meta_title)
-            if result:
-                chapters_data.update(result)
-                save_json(CHAPTERS_FILE, chapters_data)
-            else:
-                print(f"Failed to generate {slug} after retries.")
-        queue.task_done()
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9) if self.started else 1e-9
+        # Fetch utilization is measured against the largest limit the controller allowed
+        workers = {"fetch": self.limiter.peak_limit, "parse": self.parse_workers, "persist": 1}
+        parts = [
+            f"{name} {self.busy[name] / (elapsed * workers[name]) * 100:.0f}% busy (peak queue {self.peak_depth[name]})"
+            for name in ("fetch", "parse", "persist")
+        ]
+        line = "Pipeline utilization: " + ", ".join(parts)
+        line += f"; {self.retries} deferred retries, {len(self.failed)} failed"
+        if self.breaker.trips:
+            line += f", circuit opened {self.breaker.trips} times ({self.breaker.paused_for:.0f}s paused)"
+        return line
+
+class ShardSink:
+    """
+    Takes the place of the ChapterStore in a shard process: every chapter the shard's pipeline
+    finishes is sent straight to the coordinator, which owns the store.
+    """
+
+    def __init__(self, shard_id, conn):
+        self.shard_id = shard_id
+        self.conn = conn
+        self.backend_report = {}
+
+    def update(self, chapters, fingerprints=None):
+        fingerprints = fingerprints or {}
+        backends = {slug: self.backend_report.get(slug, "prefetched") for slug in fingerprints}
+        self.conn.send(("chapters", self.shard_id, chapters, fingerprints, backends))
+
+def _exit_with_parent(parent_pid):
+    """Initializer for a shard's parse workers: a killed shard can't shut its pool down, so they leave on their own."""
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(1)
+        os._exit(1)
+
+    threading.Thread(target=watch, daemon=True).start()
+
+def apply_shard_settings(settings):
+    """Copies the coordinator's SHARD_SETTINGS (and PARSE_WORKERS) into this shard process."""
+    globals().update(settings)
+
+def shard_engine(storage_state, limits):
+    """The ScrapeEngine of one shard: its own browser and clients, with the shard's share of the limits."""
+    engine = ScrapeEngine()
+    engine.session.storage_state = storage_state
+    engine.limiter = AdaptiveConcurrency(*limits)
+    return engine
+
+def run_shard(shard_id, items, prefetched, validators, conn, storage_state, settings, limits, profile=False):
+    """Entry point of a ShardedPipeline worker process."""
+    apply_shard_settings(settings)
+    if profile:
+        profiler.enable(rss_interval=None)
+    try:
+        asyncio.run(_run_shard(shard_id, items, prefetched, validators, conn, storage_state, limits))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+async def _run_shard(shard_id, items, prefetched, validators, conn, storage_state, limits):
+    engine = shard_engine(storage_state, limits)
+    # Spawned, not forked: a forked worker would inherit the pipe and hide this shard's exit from the coordinator
+    engine.executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                          initializer=_exit_with_parent, initargs=(os.getpid(),))
+    sink = ShardSink(shard_id, conn)
+    # Each chapter goes to the coordinator as soon as it is parsed, so a killed shard loses nothing it finished
+    pipeline = ChapterPipeline(engine.page_pool, sink, engine.http_client(), engine.resource_stats, fetch_workers=engine.limiter.maximum,
+                               parse_workers=PARSE_WORKERS, limiter=engine.limiter, breaker=engine.breaker, executor=engine.executor, batch_size=1)
+    sink.backend_report = pipeline.backend_report
+    try:
+        await pipeline.run(items, prefetched, validators)
+    finally:
+        await engine.close()
+    print(f"Shard {shard_id}: {pipeline.summary()}")
+    run_profile = profiler.disable()
+    conn.send(("done", shard_id, {
+        "failed": pipeline.failed,
+        "errors": pipeline.errors,
+        "attempts": {slug: pipeline.attempts.get(slug, 1) for slug in pipeline.failed},
+        "retries": pipeline.retries,
+        "fetch_latencies": pipeline.fetch_latencies,
+        "breaker": (pipeline.breaker.trips, pipeline.breaker.paused_for),
+        "resource_stats": engine.resource_stats,
+        "spans": run_profile.spans if run_profile else [],
+    }))
+
+class ShardedPipeline:
+    """
+    Chapter generation split across `shards` processes, for runs bound by one Chromium's
+    renderer or one interpreter's CPU rather than by the site.
+
+    The pending chapters are dealt round-robin to the shards. Each shard runs a ChapterPipeline
+    with its own browser, HTTP client, parse workers and a 1/shards share of the limiter's
+    concurrency and request-rate budget, and sends every finished chapter back over a pipe.
+    The coordinator (this process) owns the store: it persists chapters in batches as they
+    arrive and aggregates progress, failures and fetch backends.
+
+    A shard that exits without reporting (killed, crashed) loses only the chapters it had
+    not sent yet; those go to a new shard, at most SHARD_RESTARTS times per run, and are
+    recorded as failed after that.
+    """
+
+    def __init__(self, chapters_data, shards=SHARDS, storage_state=None, limiter=None, resource_stats=None, lock=None):
+        self.chapters_data = chapters_data
+        self.shards = shards
+        self.storage_state = storage_state
+        limiter = limiter or AdaptiveConcurrency(CONCURRENCY_INITIAL, CONCURRENCY_MIN, CONCURRENCY_MAX, MAX_REQUESTS_PER_SECOND)
+        self.limits = (
+            -(-limiter.limit // shards),
+            max(1, limiter.minimum // shards),
+            -(-limiter.maximum // shards),
+            limiter.max_rps / shards if limiter.max_rps else None,
+        )
+        self.resource_stats = resource_stats
+        # Series that share an engine run their shards one at a time, so the rate budget still holds
+        self.lock = lock or asyncio.Lock()
+        self.context = multiprocessing.get_context("spawn")
+        self.workers = {}
+        self.inbox = None
+        self.stopping = False
+        self.prefetched = {}
+        self.validators = {}
+        self.backend_report = {}
+        self.failed = []
+        self.errors = {}
+        self.attempts = {}
+        self.retries = 0
+        self.restarts = 0
+        self.fetch_latencies = []
+        self.breaker_trips = 0
+        self.breaker_paused = 0.0
+        self.total = 0
+        self.completed = 0
+        self.started = None
+
+    def _start_shard(self, items):
+        shard_id = len(self.workers)
+        slugs = {slug for _, slug, _ in items}
+        receiver, sender = self.context.Pipe(duplex=False)
+        settings = {name: globals()[name] for name in SHARD_SETTINGS}
+        settings["PARSE_WORKERS"] = max(1, PARSE_WORKERS // self.shards)
+        process = self.context.Process(
+            target=run_shard, name=f"shard-{shard_id}",
+            args=(shard_id, items, {s: raw for s, raw in self.prefetched.items() if s in slugs},
+                  {s: v for s, v in self.validators.items() if s in slugs},
+                  sender, self.storage_state, settings, self.limits, profiler.active() is not None),
+        )
+        process.start()
+        # The shard now holds the only write end, so the pipe reports EOF once it exits
+        sender.close()
+        self.workers[shard_id] = {"process": process, "conn": receiver, "pending": {item[1]: item for item in items},
+                                  "closed": False, "report": None}
+
+    def _receive(self, loop):
+        """Runs in a thread: forwards shard messages to the event loop, then ("exited", id) once a shard's pipe closes."""
+        from multiprocessing.connection import wait
+        while not self.stopping:
+            conns = {w["conn"]: shard_id for shard_id, w in list(self.workers.items()) if not w["closed"]}
+            if not conns:
+                time.sleep(0.1)
+                continue
+            for conn in wait(list(conns), timeout=0.5):
+                shard_id = conns[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    self.workers[shard_id]["closed"] = True
+                    message = ("exited", shard_id)
+                loop.call_soon_threadsafe(self.inbox.put_nowait, message)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        chapters = {}
+        fingerprints = {}
+        for shard_chapters, shard_fingerprints in batch:
+            chapters.update(shard_chapters)
+            fingerprints.update(shard_fingerprints)
+        with profiler.span("persist"):
+            self.chapters_data.update(chapters, fingerprints)
+        for slug in fingerprints:
+            profiler.note(slug, status="ok", backend=self.backend_report.get(slug))
+        profiler.count("chapters", len(fingerprints))
+        self.completed += len(fingerprints)
+
+    def _shard_exited(self, shard_id):
+        shard = self.workers[shard_id]
+        process = shard["process"]
+        process.join()
+        shard["conn"].close()
+        report = shard["report"]
+        if report is not None:
+            for slug in report["failed"]:
+                shard["pending"].pop(slug, None)
+                self.failed.append(slug)
+                self.errors[slug] = report["errors"].get(slug)
+                self.attempts[slug] = report["attempts"].get(slug, 1)
+                profiler.note(slug, status="failed", attempts=self.attempts[slug])
+            self.retries += report["retries"]
+            self.fetch_latencies.extend(report["fetch_latencies"])
+            self.breaker_trips += report["breaker"][0]
+            self.breaker_paused += report["breaker"][1]
+            if self.resource_stats is not None:
+                self.resource_stats.merge(report["resource_stats"])
+            if profiler.active() is not None:
+                profiler.active().merge(report["spans"])
+        unfinished = list(shard["pending"].values())
+        if not unfinished:
+            return
+        print(f"Shard {shard_id} exited with code {process.exitcode} before finishing {len(unfinished)} chapters.")
+        if self.restarts < SHARD_RESTARTS:
+            self.restarts += 1
+            print(f"Handing them to shard {len(self.workers)}.")
+            self._start_shard(unfinished)
+            return
+        for _, slug, _ in unfinished:
+            self.failed.append(slug)
+            self.errors[slug] = f"shard exited with code {process.exitcode}"
+            profiler.note(slug, status="failed")
+
+    def _running(self):
+        return sum(1 for w in self.workers.values() if not w["closed"])
+
+    def _report(self):
+        print(f"Shards: {self._running()} running, {self.completed}/{self.total} chapters persisted, "
+              f"{len(self.failed)} failed, {self.restarts} restarts")
+
+    async def _coordinate(self):
+        batch = []
+        batch_started = last_report = time.monotonic()
+        exited = 0
+        while exited < len(self.workers):
+            try:
+                timeout = max(0.0, batch_started + PERSIST_INTERVAL - time.monotonic()) if batch else PIPELINE_REPORT_INTERVAL
+                message = await asyncio.wait_for(self.inbox.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                message = None
+            if message is not None:
+                kind, shard_id = message[0], message[1]
+                shard = self.workers[shard_id]
+                if kind == "chapters":
+                    _, _, chapters, fingerprints, backends = message
+                    if not batch:
+                        batch_started = time.monotonic()
+                    batch.append((chapters, fingerprints))
+                    self.backend_report.update(backends)
+                    for slug in fingerprints:
+                        shard["pending"].pop(slug, None)
+                elif kind == "done":
+                    shard["report"] = message[2]
+                elif kind == "exited":
+                    # Everything the shard sent is in hand; persist it before deciding what it left unfinished
+                    self._flush(batch)
+                    batch = []
+                    self._shard_exited(shard_id)
+                    exited += 1
+            if batch and (len(batch) >= PERSIST_BATCH_SIZE or time.monotonic() - batch_started >= PERSIST_INTERVAL):
+                self._flush(batch)
+                batch = []
+            if time.monotonic() - last_report >= PIPELINE_REPORT_INTERVAL:
+                self._report()
+                last_report = time.monotonic()
+        self._flush(batch)
+
+    async def run(self, items, prefetched=None, validators=None):
+        """Same contract as ChapterPipeline.run: returns once every item is persisted or failed."""
+        if not items:
+            return
+        async with self.lock:
+            self.started = time.perf_counter()
+            self.total = len(items)
+            self.prefetched = dict(prefetched or {})
+            self.validators = dict(validators or {})
+            self.inbox = asyncio.Queue()
+            self.stopping = False
+            shards = min(self.shards, len(items))
+            print(f"Splitting {len(items)} chapters across {shards} shards.")
+            for i in range(shards):
+                self._start_shard(items[i::shards])
+            receiver = threading.Thread(target=self._receive, args=(asyncio.get_running_loop(),), daemon=True)
+            receiver.start()
+            try:
+                await self._coordinate()
+            finally:
+                self.stopping = True
+                for shard in self.workers.values():
+                    if shard["process"].is_alive():
+                        shard["process"].terminate()
+                for shard in self.workers.values():
+                    shard["process"].join(timeout=10)
+                receiver.join()
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9) if self.started else 1e-9
+        line = (f"Sharded pipeline: {self.completed} chapters across {min(self.shards, self.total)} shards "
+                f"({self.completed / elapsed:.1f}/s); {self.retries} deferred retries, {len(self.failed)} failed")
+        if self.restarts:
+            line += f", {self.restarts} shard restarts"
+        if self.breaker_trips:
+            line += f", circuit opened {self.breaker_trips} times ({self.breaker_paused:.0f}s paused)"
+        return line
+
+async def revalidate_chapter(page_pool, url, slug, stored, http_client=None, resource_stats=None, limiter=None):
+    """
+    Cheap upstream check of one already generated chapter: a conditional request when validators
+    are known, otherwise a fetch and a fingerprint of the raw reader content (no cleanup).
+    Returns (status, raw, fingerprint record) with status one of
+    "not_modified", "unchanged", "changed", "baseline" (nothing stored to compare) or "failed".
+    """
+    import httpx
+    raw = None
+    validators = None
+    if http_client is not None:
+        headers = {}
+        if stored and stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored and stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+        try:
+            resp = await limited_get(http_client, url, limiter, headers)
+            if resp.status_code == 304 and stored:
+                return "not_modified", None, None
+            resp.raise_for_status()
+            if html_has_reader(resp.text):
+                raw = ("html", resp.text)
+                validators = http_validators(resp)
+        except httpx.HTTPError as e:
+            print(f"HTTP revalidation failed for {slug}: {e}")
+            if not isinstance(e, httpx.TransportError):
+                # The site answered (throttled, missing, erroring); the browser would get the same answer
+                return "failed", None, None
+    if raw is None and FETCH_BACKEND != "http":
+        raw = await fetch_chapter_raw_browser(page_pool, url, slug, resource_stats, limiter)
+    if raw is None:
+        return "failed", None, None
+
+    fingerprint = await asyncio.to_thread(raw_fingerprint, *raw)
+    if fingerprint is None:
+        return "failed", None, None
+    record = {"fingerprint": fingerprint, **(validators or {})}
+    if not stored:
+        return "baseline", None, record
+    if fingerprint == stored["fingerprint"]:
+        return "unchanged", None, record
+    return "changed", raw, record
+
+async def check_for_updates(page_pool, chapters_data, items, http_client=None, resource_stats=None, limiter=None):
+    """
+    Revalidates already generated chapters in parallel and reports upstream edits.
+    Returns (changed items, {slug: raw page}, {slug: HTTP validators}) so changed
+    chapters can go through the pipeline without being fetched again.
+    """
+    print(f"Checking {len(items)} generated chapters for upstream changes...")
+    stored = chapters_data.fingerprints()
+    if limiter is None:
+        limiter = AdaptiveConcurrency(CONCURRENCY_INITIAL, CONCURRENCY_MIN, CONCURRENCY_MAX, MAX_REQUESTS_PER_SECOND)
+    counts = dict.fromkeys(("not_modified", "unchanged", "changed", "baseline", "failed"), 0)
+    prefetched = {}
+    validators = {}
+    records = {}
+
+    async def check(item):
+        url, slug, _ = item
+        async with limiter.slot():
+            try:
+                status, raw, record = await revalidate_chapter(page_pool, url, slug, stored.get(slug), http_client, resource_stats, limiter)
+            except Exception as e:
+                print(f"Failed to check {slug}: {e}")
+                status, raw, record = "failed", None, None
+        counts[status] += 1
+        if status == "changed":
+            prefetched[slug] = raw
+            validators[slug] = {k: v for k, v in record.items() if k != "fingerprint"}
+        elif record:
+            records[slug] = record
 
-def embed_fonts(book, style_content):
+    await asyncio.gather(*(check(item) for item in items))
+    # Changed chapters get their new fingerprint when the pipeline persists them
+    if records:
+        chapters_data.set_fingerprints(records)
+
+    changed = [item for item in items if item[1] in prefetched]
+    print(f"Update check: {counts['not_modified']} not modified (304), {counts['unchanged']} unchanged, "
+          f"{counts['changed']} changed, {counts['baseline']} fingerprinted for the first time, {counts['failed']} failed.")
+    if changed:
+        print(f"Changed upstream: {', '.join(slug for _, slug, _ in changed)}")
+    return changed, prefetched, validators
+
+def find_fonts(style_content):
     """
-    Embeds fonts into the EPUB book and updates CSS if necessary.
-    Returns the (potentially modified) style content.
+    Locates the fonts style.css asks for and updates the CSS if a file has a different extension.
+    Returns (style_content, [(uid, file_name, mime, local_path), ...]).
     """
     fonts_dir = "fonts"
     if not os.path.exists(fonts_dir):
-        return style_content
+        return style_content, []
 
     # Map of Expected Filename in EPUB (from CSS) -> Possible local filenames
     desired_fonts = {
@@ -555,7 +1928,8 @@ def embed_fonts(book, style_content):
         "NotoSerifTC-Regular.ttf": ["NotoSerifTC-Regular.ttf", "NotoSerifTC.ttf"],
         "Huakang.ttf": ["Huakang.ttf", "Huakang running script.ttf"],
     }
-    
+
+    fonts = []
     for epub_name, candidate_names in desired_fonts.items():
         found_path = None
         # 1. Try exact matches from candidate list
@@ -564,7 +1938,7 @@ def embed_fonts(book, style_content):
             if os.path.exists(p):
                 found_path = p
                 break
-        
+
         # 2. Try lenient search if not found
         if not found_path:
             for f_name in os.listdir(fonts_dir):
@@ -575,205 +1949,778 @@ def embed_fonts(book, style_content):
                     break
 
         if found_path:
-            with open(found_path, 'rb') as f:
-                font_data = f.read()
-                
             # Determine mime type
             mime = "application/font-sfnt"
             actual_ext = os.path.splitext(found_path)[1].lower()
             if actual_ext == ".otf":
                 mime = "application/vnd.ms-opentype"
-            
+
             # Handle extension mismatch (e.g. found .ttf but CSS expects .otf)
             expected_ext = os.path.splitext(epub_name)[1].lower()
             final_filename = epub_name
-            
+
             if actual_ext != expected_ext:
                 final_filename = os.path.splitext(epub_name)[0] + actual_ext
                 style_content = style_content.replace(epub_name, final_filename)
-                
-            font_item = epub.EpubItem(
-                uid=f"font_{epub_name.replace('.', '_')}",
-                file_name=f"fonts/{final_filename}",
-                media_type=mime,
-                content=font_data
-            )
-            book.add_item(font_item)
+
+            fonts.append((f"font_{epub_name.replace('.', '_')}", f"fonts/{final_filename}", mime, found_path))
         else:
             print(f"Warning: Font {epub_name} requested by CSS but not found in {fonts_dir}.")
-            
-    return style_content
 
-def create_epub(metadata_obj, chapters_data):
-    print("Generating EPUB...")
-    metadata = metadata_obj.get("metadata", {})
-    ordered_slugs = metadata_obj.get("order", [])
-    cover_image_url = metadata_obj.get("cover_image_url")
-    
-    book = epub.EpubBook()
-    book.set_identifier("rtoc")
-    book.set_title("A Regressor's Tale of Cultivation")
-    book.set_language("en")
-    book.add_author("엄청난 (Tremendous)")
-    book.add_metadata('DC', 'description', DESCRIPTION)
+    return style_content, fonts
 
-    # Handle cover image
-    cover_path = os.path.join(DATA_DIR, "cover.webp")
-    if os.path.exists(cover_path):
-        with open(cover_path, 'rb') as f:
-            book.set_cover("cover.webp", f.read())
-    elif cover_image_url:
-        print("Warning: Cover image URL found but local image missing. Run without --force to potentially skip download if already existing (not applicable here), or check generation logs.")
+def new_glyph_usage(volume):
+    """Characters the book's text needs, grouped by the CSS scopes font_subset distinguishes."""
+    return {
+        "all": set(volume["title"]) | set("Cover") | set(volume["cover_caption"] or ""),
+        "titles": set(),
+        "dates": set("Released: "),
+    }
 
-    style_path = "style.css"
-    with open(style_path, 'r', encoding='utf-8') as f:
-        style = f.read()
-    
-    # Embed fonts and update style if needed
-    style = embed_fonts(book, style)
+def record_glyphs(glyphs, entry, chars, heading_chars):
+    glyphs["titles"].update(entry["title"])
+    glyphs["titles"].update(heading_chars)
+    glyphs["dates"].update(entry["release_date"])
+    glyphs["all"].update(chars)
 
-    nav_css = epub.EpubItem(uid="style_nav", file_name="style/nav.css", media_type="text/css", content=style)
-    book.add_item(nav_css)
+def subset_fonts(style_content, fonts, glyphs):
+    """
+    Swaps each font for a subset holding only the glyphs the book uses.
+    Returns fonts unchanged when SUBSET_FONTS is off or fontTools is missing.
+    """
+    if not SUBSET_FONTS or not fonts:
+        return fonts
+    if not font_subset.available():
+        print("Warning: fontTools is not installed; embedding full fonts.")
+        return fonts
+    codepoints = font_subset.font_codepoints(style_content, glyphs)
+    subset = []
+    for uid, file_name, mime, local_path in fonts:
+        cps = codepoints.get(os.path.basename(file_name))
+        if cps is not None:
+            try:
+                local_path = font_subset.subset_font(local_path, cps, FONT_CACHE_DIR)
+            except Exception as e:
+                print(f"Warning: Could not subset {file_name}, embedding the full font: {e}")
+        subset.append((uid, file_name, mime, local_path))
+    return subset
 
-    chapters = []
-    
-    for slug in ordered_slugs:
+def embed_fonts(book, fonts):
+    """Embeds fonts (as returned by find_fonts or subset_fonts) into an ebooklib book."""
+    from ebooklib import epub
+    for uid, file_name, mime, local_path in fonts:
+        with open(local_path, 'rb') as f:
+            book.add_item(epub.EpubItem(uid=uid, file_name=file_name, media_type=mime, content=f.read()))
+
+def chapter_chars(entry, previous, content, chapters_data):
+    """
+    Distinct text characters of a chapter and of its in-body headings, from the previous
+    manifest when the chapter was reused.
+    """
+    if content is None and previous and previous.get("chars") is not None and previous.get("heading_chars") is not None:
+        return previous["chars"], previous["heading_chars"]
+    if content is None:
+        content = chapters_data[entry["slug"]].get("content", "")
+    return font_subset.text_chars(content), font_subset.heading_chars(content)
+
+def chapter_body_html(title, release_date, content):
+    return f'<h1>{title}</h1><div class="date">Released: {release_date}</div>{content}'
+
+def render_chapter_xhtml(book, nav_css, title, release_date, content, file_name):
+    """Renders a chapter to the exact XHTML bytes ebooklib would write for it."""
+    from ebooklib import epub
+    ch_html = epub.EpubHtml(title=title, file_name=file_name, lang='en')
+    ch_html.book = book
+    ch_html.content = chapter_body_html(title, release_date, content)
+    ch_html.add_item(nav_css)
+    return ch_html.get_content()
+
+def render_chapter_xhtml_native(title, release_date, content):
+    """Renders a chapter for the streaming writer: one lxml parse, no ebooklib objects."""
+    body = html_fragment_to_xhtml(chapter_body_html(title, release_date, content))
+    return render_xhtml(title, body, lang="en", css_href="style/nav.css", epub_prefix=CHAPTER_EPUB_PREFIX)
+
+def epub_chapter_entries(metadata_obj, chapters_data):
+    """
+    Yields one lightweight record per chapter in reading order; bodies are left in the store.
+    source_hash covers everything that goes into the rendered XHTML.
+    """
+    metadata = metadata_obj.get("metadata", {})
+    content_hashes = chapters_data.hashes()
+    stored_titles = chapters_data.titles()
+    for slug in metadata_obj.get("order", []):
         # Special case: 807-808 page needs to map to two entries
         target_slugs = [slug]
         if slug == "chapter-807-808":
             target_slugs = ["chapter-807", "chapter-808"]
-            
+
         for t_slug in target_slugs:
-            if t_slug not in chapters_data:
+            if t_slug not in content_hashes:
                 continue
-                
-            ch_info = chapters_data[t_slug]
+
             meta = metadata.get(slug, {}) # Always use the source slug for meta
             release_date = meta.get("release_date", "Unknown")
-            title = ch_info.get("title", meta.get("title", t_slug))
-            content = ch_info.get("content", "")
+            title = stored_titles[t_slug]
+            if title is None:
+                title = meta.get("title", t_slug)
 
             # Sanitize file name
             safe_slug = re.sub(r'[^a-zA-Z0-9-]', '_', t_slug)
-            ch_html = epub.EpubHtml(title=title, file_name=f'{safe_slug}.xhtml', lang='en')
-            ch_html.content = f'<h1>{title}</h1><div class="date">Released: {release_date}</div>{content}'
-            ch_html.add_item(nav_css)
-            book.add_item(ch_html)
-            chapters.append(ch_html)
+            file_name = f'{safe_slug}.xhtml'
+            source_hash = hashlib.sha1(json.dumps(
+                [content_hashes[t_slug], title, release_date, file_name], ensure_ascii=False
+            ).encode('utf-8')).hexdigest()
+            yield {
+                "slug": t_slug, "uid": f"ch_{safe_slug}", "file_name": file_name,
+                "title": title, "release_date": release_date, "source_hash": source_hash,
+            }
+
+def split_volumes(ordered_slugs, volume_size=None, ranges=None):
+    """
+    Splits the reading order into volumes: explicit (start, stop) slices of `order` when
+    ranges are given (anything after the last range becomes one more volume), otherwise
+    fixed-size runs of volume_size entries, otherwise a single volume.
+    """
+    if ranges:
+        volumes = [ordered_slugs[start:stop] for start, stop in ranges]
+        last_stop = max(stop for _, stop in ranges)
+        if last_stop < len(ordered_slugs):
+            volumes.append(ordered_slugs[last_stop:])
+        return [v for v in volumes if v]
+    if volume_size:
+        return [ordered_slugs[i:i + volume_size] for i in range(0, len(ordered_slugs), volume_size)]
+    return [ordered_slugs]
+
+def plan_volumes(metadata_obj, volume_size=None, ranges=None, series=None):
+    """Returns [(volume, volume metadata_obj)], where volume describes the output EPUB."""
+    series = series or DEFAULT_SERIES
+    metadata = metadata_obj.get("metadata", {})
+    parts = split_volumes(metadata_obj.get("order", []), volume_size, ranges)
+    if len(parts) == 1 and not (volume_size or ranges):
+        return [(series.volume(), metadata_obj)]
+
+    stem = os.path.splitext(series.output_epub)[0]
+    plans = []
+    for n, order in enumerate(parts, 1):
+        volume = {
+            **series.volume(),
+            "output_path": f"{stem}_Vol_{n:02d}.epub",
+            "manifest_path": os.path.join(series.data_dir, f"epub_manifest_vol_{n:02d}.json"),
+            "identifier": f"{series.identifier}-vol-{n:02d}",
+            "title": f"{series.title}, Volume {n}",
+            "cover_caption": f"Volume {n}",
+        }
+        # Only this volume's slice of the metadata goes to the worker process
+        volume_metadata = {
+            "metadata": {slug: metadata[slug] for slug in order if slug in metadata},
+            "order": order,
+            "cover_image_url": metadata_obj.get("cover_image_url"),
+        }
+        plans.append((volume, volume_metadata))
+    return plans
+
+def load_previous_epub(volume, incremental):
+    """
+    Returns (manifest, open zip of the previous EPUB or None). The manifest is empty
+    when nothing in it is reusable with the current writer and layout.
+    """
+    if not incremental or not os.path.exists(volume["output_path"]):
+        return {}, None
+    manifest = load_json(volume["manifest_path"])
+    if manifest.get("version") != EPUB_LAYOUT_VERSION or manifest.get("writer", "ebooklib") != EPUB_WRITER:
+        return {}, None
+    if not manifest.get("chapters"):
+        return manifest, None
+    return manifest, zipfile.ZipFile(volume["output_path"])
+
+def epub_cover(metadata_obj, series):
+    """Returns (path, media_type) of the cover to embed, or None."""
+    cover_image_url = metadata_obj.get("cover_image_url")
+    if cover_image_url:
+        cached = CoverCache(series.cover_dir).get(cover_image_url)
+        if cached:
+            return cached
+    if os.path.exists(series.legacy_cover_file):
+        return series.legacy_cover_file, "image/webp"
+    return None
+
+def epub_build_hash(volume, entries, style, cover):
+    """Fingerprint of every input to one EPUB; equal hashes mean the file on disk is already current."""
+    cover_stat = None
+    if cover:
+        st = os.stat(cover[0])
+        cover_stat = [cover[0], st.st_size, st.st_mtime_ns]
+    fonts = []
+    if os.path.isdir("fonts"):
+        fonts = sorted((entry.name, entry.stat().st_size, entry.stat().st_mtime_ns) for entry in os.scandir("fonts"))
+    return hashlib.sha1(json.dumps(
+        [volume, style, cover_stat, fonts, SUBSET_FONTS and font_subset.available() and sorted(font_subset.SELECTOR_TEXT.items()),
+         [e["source_hash"] for e in entries]],
+        ensure_ascii=False
+    ).encode('utf-8')).hexdigest()
+
+def create_epub(metadata_obj, chapters_data, incremental=True, volume=None, series=None):
+    """Builds one EPUB (the whole book, or one volume). Returns False if it was already up to date."""
+    series = series or DEFAULT_SERIES
+    volume = volume or series.volume()
+    output_path = volume["output_path"]
+    print(f"Generating {output_path} ({EPUB_WRITER} writer)...")
+    cover = epub_cover(metadata_obj, series)
+    if cover is None and metadata_obj.get("cover_image_url"):
+        print("Warning: Cover image URL found but no downloaded cover; check the generation logs.")
+
+    style_path = "style.css"
+    with open(style_path, 'r', encoding='utf-8') as f:
+        style = f.read()
+
+    entries = list(epub_chapter_entries(metadata_obj, chapters_data))
+    build_hash = epub_build_hash(volume, entries, style, cover)
+
+    # Incremental build: chapters whose inputs are unchanged since the last build are copied
+    # from the previous EPUB as already-rendered XHTML instead of being rendered again
+    manifest, previous_epub = load_previous_epub(volume, incremental)
+    if manifest.get("build_hash") == build_hash:
+        if previous_epub:
+            previous_epub.close()
+        print(f"{output_path} is up to date.")
+        return False
+    previous_chapters = manifest.get("chapters", {}) if previous_epub else {}
+    try:
+        if EPUB_WRITER == "native":
+            new_manifest, reused = write_epub_native(volume, entries, chapters_data, style, cover, previous_chapters, previous_epub)
+        else:
+            new_manifest, reused = write_epub_ebooklib(volume, entries, chapters_data, style, cover, previous_chapters, previous_epub)
+    finally:
+        if previous_epub:
+            previous_epub.close()
+
+    save_json(volume["manifest_path"], {
+        "version": EPUB_LAYOUT_VERSION, "writer": EPUB_WRITER, "build_hash": build_hash, "chapters": new_manifest,
+    })
+    print(f"Reused {reused} unchanged chapters, rendered {len(new_manifest) - reused}.")
+    print(f"EPUB generated successfully: {output_path}")
+    return True
+
+def create_epub_in_worker(metadata_obj, volume, incremental, series):
+    """Process pool entry point: SQLite connections can't be shared, so each worker opens the store itself."""
+    chapters_data = ChapterStore(series.chapters_db)
+    try:
+        return create_epub(metadata_obj, chapters_data, incremental, volume, series)
+    finally:
+        chapters_data.close()
+
+def create_volumes(metadata_obj, chapters_data, incremental=True, volume_size=None, ranges=None, series=None):
+    """
+    Builds the book as one EPUB or as volumes. Volumes build concurrently in worker processes;
+    volumes whose inputs are unchanged are skipped, so a new chapter only rebuilds the last one.
+    """
+    series = series or DEFAULT_SERIES
+    plans = plan_volumes(metadata_obj, volume_size, ranges, series)
+    if len(plans) == 1:
+        volume, volume_metadata = plans[0]
+        create_epub(volume_metadata, chapters_data, incremental, volume, series)
+        return
+
+    print(f"Building {len(plans)} volumes with up to {VOLUME_WORKERS} workers...")
+    with ProcessPoolExecutor(max_workers=min(VOLUME_WORKERS, len(plans))) as pool:
+        futures = [pool.submit(create_epub_in_worker, volume_metadata, volume, incremental, series) for volume, volume_metadata in plans]
+        results = []
+        for (volume, _), future in zip(plans, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Warning: Failed to build {volume['output_path']}: {e}")
+                results.append(None)
+    built = sum(1 for r in results if r)
+    failed = sum(1 for r in results if r is None)
+    print(f"Volumes: {built} rebuilt, {len(plans) - built - failed} up to date, {failed} failed.")
+
+def write_epub_native(volume, entries, chapters_data, style, cover, previous_chapters, previous_epub):
+    """Streams the book into the zip one chapter at a time. Returns (manifest chapters, reused count)."""
+    writer = StreamingEpubWriter(
+        volume["output_path"], volume["identifier"], volume["title"], language="en",
+        authors=[volume["author"]], description=volume["description"],
+    )
+    try:
+        if cover:
+            cover_path, media_type = cover
+            with open(cover_path, 'rb') as f:
+                writer.set_cover("cover" + os.path.splitext(cover_path)[1], f.read(), media_type, caption=volume["cover_caption"])
+
+        style, fonts = find_fonts(style)
+        writer.add_item("style_nav", "style/nav.css", "text/css", data=style)
+
+        new_manifest = {}
+        reused = 0
+        glyphs = new_glyph_usage(volume)
+        for entry in entries:
+            t_slug, uid, file_name, title = entry["slug"], entry["uid"], entry["file_name"], entry["title"]
+            previous = previous_chapters.get(t_slug)
+            content = None
+            if previous_epub and previous and previous["source_hash"] == entry["source_hash"] \
+                    and writer.copy_chapter(previous_epub, uid, file_name, title):
+                reused += 1
+            else:
+                content = chapters_data[t_slug].get("content", "")
+                writer.add_chapter(uid, file_name, title, render_chapter_xhtml_native(title, entry["release_date"], content))
+            chars, heading_chars = chapter_chars(entry, previous, content, chapters_data)
+            record_glyphs(glyphs, entry, chars, heading_chars)
+            new_manifest[t_slug] = {"file_name": file_name, "source_hash": entry["source_hash"], "chars": chars,
+                                    "heading_chars": heading_chars}
 
-    book.toc = tuple(chapters)
+        # Fonts go in last: subsetting needs the glyphs of every chapter
+        for uid, file_name, mime, local_path in subset_fonts(style, fonts, glyphs):
+            writer.add_item(uid, file_name, mime, source_path=local_path)
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    return new_manifest, reused
+
+def write_epub_ebooklib(volume, entries, chapters_data, style, cover, previous_chapters, previous_epub):
+    """Builds the whole book in memory with ebooklib. Returns (manifest chapters, reused count)."""
+    from ebooklib import epub
+    book = epub.EpubBook()
+    book.set_identifier(volume["identifier"])
+    book.set_title(volume["title"])
+    book.set_language("en")
+    book.add_author(volume["author"])
+    book.add_metadata('DC', 'description', volume["description"])
+
+    # Handle cover image
+    if cover:
+        cover_path = cover[0]
+        with open(cover_path, 'rb') as f:
+            book.set_cover("cover" + os.path.splitext(cover_path)[1], f.read())
+
+    # Update style if needed; the fonts themselves are embedded once the glyphs are known
+    style, fonts = find_fonts(style)
+
+    nav_css = epub.EpubItem(uid="style_nav", file_name="style/nav.css", media_type="text/css", content=style)
+    book.add_item(nav_css)
+
+    new_manifest = {}
+    chapters = []
+    reused = 0
+    glyphs = new_glyph_usage(volume)
+    for entry in entries:
+        t_slug, file_name, title = entry["slug"], entry["file_name"], entry["title"]
+        xhtml = None
+        content = None
+        previous = previous_chapters.get(t_slug)
+        if previous_epub and previous and previous["source_hash"] == entry["source_hash"]:
+            try:
+                xhtml = previous_epub.read(f"{book.FOLDER_NAME}/{file_name}")
+                reused += 1
+            except KeyError:
+                xhtml = None
+        if xhtml is None:
+            content = chapters_data[t_slug].get("content", "")
+            xhtml = render_chapter_xhtml(book, nav_css, title, entry["release_date"], content, file_name)
+        chars, heading_chars = chapter_chars(entry, previous, content, chapters_data)
+        record_glyphs(glyphs, entry, chars, heading_chars)
+
+        ch_item = epub.EpubItem(uid=entry["uid"], file_name=file_name, media_type="application/xhtml+xml", content=xhtml)
+        book.add_item(ch_item)
+        chapters.append(ch_item)
+        book.toc.append(epub.Link(file_name, title, entry["uid"]))
+        new_manifest[t_slug] = {"file_name": file_name, "source_hash": entry["source_hash"], "chars": chars,
+                                "heading_chars": heading_chars}
+
+    embed_fonts(book, subset_fonts(style, fonts, glyphs))
     book.add_item(epub.EpubNcx())
     book.add_item(epub.EpubNav())
     book.spine = ['nav'] + chapters
-    epub.write_epub(OUTPUT_EPUB, book, {})
-    print(f"EPUB generated successfully: {OUTPUT_EPUB}")
+    # Page lists are never used; skipping them avoids ebooklib re-parsing every chapter
+    tmp_path = volume["output_path"] + ".tmp"
+    epub.write_epub(tmp_path, book, {"epub3_pages": False})
+    os.replace(tmp_path, volume["output_path"])
+    return new_manifest, reused
 
-async def main(limit_indices=None, force_rebuild=False):
-    ensure_dirs()
-    metadata_obj = load_json(METADATA_FILE)
-    
-    # Always check for new chapters
-    metadata_obj = await generate_metadata_async(existing_metadata=metadata_obj, force_full_scan=force_rebuild)
+def update_failed_chapters(failed_chapters, attempted, pipeline, series=None):
+    """Rewrites the series' failed_chapters.json: attempted slugs that succeeded drop out, new failures are added."""
+    series = series or DEFAULT_SERIES
+    for _, slug, _ in attempted:
+        failed_chapters.pop(slug, None)
+    failed_at = datetime.now().isoformat(timespec="seconds")
+    for slug in pipeline.failed:
+        failed_chapters[slug] = {
+            "error": pipeline.errors.get(slug),
+            "attempts": pipeline.attempts.get(slug, 1),
+            "failed_at": failed_at,
+        }
+    save_json(series.failed_chapters_file, failed_chapters)
+    if failed_chapters:
+        print(f"{len(failed_chapters)} chapters of {series.title} failed; run with --retry-failed to retry only those.")
+
+def finish_profile(path=None):
+    """Stops profiling, writes the JSON/CSV report and prints the phase summary."""
+    run_profile = profiler.disable()
+    if run_profile is None:
+        return
+    path = path or os.path.join(PROFILE_DIR, f"profile-{datetime.now():%Y%m%d-%H%M%S}.json")
+    csv_path = run_profile.write(path)
+    print(run_profile.summary())
+    print(f"Profile written to {path} and {csv_path}")
+
+def build_epub_only(force_rebuild=False, volume_size=VOLUME_SIZE, series=None):
+    """
+    Rebuilds the book from the series' metadata.json and chapter store alone: no browser,
+    no network, and none of the scraping imports. Returns False if there is nothing cached.
+    """
+    series = series or DEFAULT_SERIES
+    metadata_obj = load_json(series.metadata_file)
+    if not metadata_obj.get("order"):
+        print(f"Error: No cached metadata in {series.metadata_file}; run once without --epub-only first.")
+        return False
+    chapters_data = load_chapter_store(series)
+    try:
+        if not chapters_data:
+            print(f"Error: No cached chapters in {series.chapters_db}; run once without --epub-only first.")
+            return False
+        with profiler.span("create_epub"):
+            create_volumes(metadata_obj, chapters_data, incremental=not force_rebuild, volume_size=volume_size,
+                           ranges=VOLUME_RANGES, series=series)
+    finally:
+        chapters_data.close()
+    return True
+
+class ScrapeEngine:
+    """
+    What every series updated in one run shares: one browser (BrowserSession and its PagePool),
+    one HTTP client, one concurrency and request-rate budget, one CircuitBreaker, one process
+    pool for chapter cleanup and one client for cover downloads.
+
+    The HTTP clients are created on first use, after a metadata scan has stored the consent cookies.
+    With shards > 1, chapter generation runs in a ShardedPipeline instead, whose worker processes
+    start their own browsers with the consent state the scan stored.
+    """
+
+    def __init__(self, shards=SHARDS):
+        self.shards = shards
+        self.shard_lock = asyncio.Lock()
+        self.resource_stats = ResourceStats()
+        self.session = BrowserSession(self.resource_stats)
+        self.page_pool = PagePool(self.session)
+        # One controller for the whole run, so the update check's findings carry over to generation
+        self.limiter = AdaptiveConcurrency(CONCURRENCY_INITIAL, CONCURRENCY_MIN, CONCURRENCY_MAX, MAX_REQUESTS_PER_SECOND)
+        self.breaker = CircuitBreaker()
+        self.executor = None
+        self.client = None
+        self.cover_client = None
+
+    def http_client(self):
+        """The shared chapter HTTP client, or None when FETCH_BACKEND is "browser"."""
+        if FETCH_BACKEND not in ("auto", "http"):
+            return None
+        if self.client is None:
+            import httpx
+            self.client = httpx.AsyncClient(
+                http2=True,
+                follow_redirects=True,
+                timeout=30,
+                headers={"User-Agent": USER_AGENT},
+                cookies=self.session.consent_cookies(),
+                limits=httpx.Limits(max_connections=CONCURRENCY_MAX, max_keepalive_connections=CONCURRENCY_MAX),
+            )
+        return self.client
+
+    def start_cover_download(self, cover_cache, url, force=False):
+        if self.cover_client is None:
+            import httpx
+            self.cover_client = httpx.AsyncClient(http2=True, timeout=30, headers={"User-Agent": USER_AGENT})
+        cover_cache.start(self.cover_client, url, force=force)
+
+    def parse_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        return self.executor
+
+    def pipeline(self, chapters_data):
+        if self.shards > 1:
+            return ShardedPipeline(chapters_data, self.shards, self.session.storage_state, self.limiter, self.resource_stats,
+                                   lock=self.shard_lock)
+        return ChapterPipeline(self.page_pool, chapters_data, self.http_client(), self.resource_stats,
+                               limiter=self.limiter, breaker=self.breaker, executor=self.parse_executor())
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self.cover_client is not None:
+            await self.cover_client.aclose()
+            self.cover_client = None
+        if self.page_pool.context is not None:
+            await self.page_pool.close()
+            print(self.page_pool.summary())
+        await self.session.close()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+async def probe_chapter(client, url, limiter):
+    """
+    One plain GET of a guessed chapter URL: no retry, no browser, nothing fed to a CircuitBreaker.
+    Returns (status, raw, validators) with status "absent" (MISSING_STATUSES), "found" (raw is
+    set when the reader content was server-rendered) or "unknown" for any other answer.
+    """
+    import httpx
+    try:
+        async with limiter.slot():
+            resp = await limited_get(client, url, limiter)
+    except httpx.HTTPError:
+        return "unknown", None, None
+    if resp.status_code in MISSING_STATUSES:
+        return "absent", None, None
+    if resp.status_code != 200:
+        return "unknown", None, None
+    if html_has_reader(resp.text):
+        return "found", ("html", resp.text), http_validators(resp)
+    return "found", None, None
+
+async def fill_chapter_gaps(engine, series, metadata_obj, chapters_data):
+    """
+    Fetches only the chapters the ChapterIndex finds missing, from the URLs their slugs would
+    have, and adds the ones that exist to metadata_obj. No chapter list scan.
+    Each guessed URL is probed once first; only the ones that exist go through the pipeline.
+    """
+    metadata = metadata_obj["metadata"]
+    index = ChapterIndex(metadata, metadata_obj["order"])
+    print(index.summary())
+    missing = index.missing_slugs()
+    if not missing:
+        print(f"No gaps in the chapter list of {series.title}.")
+        return
+    stored = chapters_data.titles()
+    pending = [(f"{series.url}/{slug}", slug, None) for slug in missing if slug not in stored]
+    absent = set()
+    prefetched, validators = {}, {}
+    if pending:
+        import httpx
+        client = engine.http_client()
+        probe_client = None
+        if client is None:
+            # The browser backend has no HTTP client; a probe still needs one
+            client = probe_client = httpx.AsyncClient(follow_redirects=True, timeout=30, headers={"User-Agent": USER_AGENT},
+                                                      cookies=engine.session.consent_cookies())
+        try:
+            results = await asyncio.gather(*(probe_chapter(client, url, engine.limiter) for url, _, _ in pending))
+        finally:
+            if probe_client is not None:
+                await probe_client.aclose()
+        for (_, slug, _), (status, raw, page_validators) in zip(pending, results):
+            if status == "absent":
+                absent.add(slug)
+            elif raw is not None:
+                prefetched[slug] = raw
+                validators[slug] = page_validators
+        pending = [item for item in pending if item[1] not in absent]
+        print(f"Probed {len(results)} guessed slugs: {len(absent)} do not exist, {len(pending)} to fetch.")
+
+    if pending:
+        print(f"Fetching {len(pending)} missing chapters of {series.title} (fetch backend: {FETCH_BACKEND})...")
+        pipeline = engine.pipeline(chapters_data)
+        with profiler.span("pipeline"):
+            await pipeline.run(pending, prefetched, validators)
+        print(pipeline.summary())
+        stored = chapters_data.titles()
+
+    filled = [slug for slug in missing if slug in stored]
+    for slug in filled:
+        metadata.setdefault(slug, {"url": f"{series.url}/{slug}", "title": stored[slug] or slug,
+                                   "release_date": "Unknown", "slug": slug})
+    metadata_obj["order"] = ChapterIndex(metadata, metadata_obj["order"]).order()
+    save_json(series.metadata_file, metadata_obj)
+    print(f"Filled {len(filled)} of {len(missing)} gaps in {series.title}.")
+    # Not recorded as failed: a guessed slug may simply not exist, and the next --fill-gaps tries again
+    if absent:
+        print(f"Not on the site under the expected slug: {', '.join(s for s in missing if s in absent)}")
+    failed = [slug for slug in missing if slug not in stored and slug not in absent]
+    if failed:
+        print(f"Could not be fetched this time: {', '.join(failed)}")
+
+async def update_series(engine, series, limit_indices=None, force_rebuild=False, check_updates=False, retry_failed=False,
+                        fill_gaps=False):
+    """
+    Scans one series for new chapters and generates the missing ones through the shared engine.
+    With fill_gaps, only the gaps in the cached chapter list are fetched instead.
+    Returns (metadata_obj, open chapter store) for the EPUB step, or None if there is no metadata.
+    """
+    ensure_dirs(series)
+    metadata_obj = load_json(series.metadata_file)
+    failed_chapters = load_json(series.failed_chapters_file)
+    if retry_failed and not failed_chapters:
+        print(f"No failed chapters recorded for {series.title}; nothing to retry.")
+        retry_failed = False
+    # The cover downloads alongside the scan and chapter generation; it's only needed by the EPUB
+    cover_cache = CoverCache(series.cover_dir)
+
+    def start_cover_download(url):
+        engine.start_cover_download(cover_cache, url, force=force_rebuild)
+
+    if fill_gaps and metadata_obj.get("order"):
+        print(f"Filling gaps in the chapter list of {series.title} (skipping the chapter list scan).")
+        if metadata_obj.get("cover_image_url"):
+            start_cover_download(metadata_obj["cover_image_url"])
+    elif retry_failed and metadata_obj.get("order"):
+        # The failed slugs are already in the metadata; a listing scan would only slow the retry down
+        print(f"Retrying {len(failed_chapters)} previously failed chapters of {series.title} (skipping the chapter list scan).")
+        if metadata_obj.get("cover_image_url"):
+            start_cover_download(metadata_obj["cover_image_url"])
+    else:
+        # Always check for new chapters
+        with profiler.span("metadata_scan"):
+            metadata_obj = await generate_metadata_async(
+                existing_metadata=metadata_obj, force_full_scan=force_rebuild, session=engine.session,
+                on_cover_url=start_cover_download, series=series,
+            )
     if metadata_obj:
-        save_json(METADATA_FILE, metadata_obj)
+        save_json(series.metadata_file, metadata_obj)
     else:
-        print("Error: Could not retrieve metadata.")
-        return
+        print(f"Error: Could not retrieve metadata for {series.title}.")
+        return None
 
     metadata = metadata_obj.get("metadata", {})
     ordered_slugs = metadata_obj.get("order", [])
     
-    chapters_data = load_json(CHAPTERS_FILE)
+    chapters_data = load_chapter_store(series)
+    try:
+        if fill_gaps:
+            await fill_chapter_gaps(engine, series, metadata_obj, chapters_data)
+        else:
+            # Titles only; chapter bodies stay on disk until the EPUB needs them
+            chapter_titles = chapters_data.titles()
     
-    # Sync metadata titles to chapters_data if chapters_data has generic titles
-    data_changed = False
-    for slug, meta in metadata.items():
-        # Clean exception: Never sync/overwrite Chapter 0 (Prologue)
-        if slug == "chapter-0":
-            continue
+            # Sync metadata titles to chapters_data if chapters_data has generic titles
+            data_changed = False
+            for slug, meta in metadata.items():
+                # Clean exception: Never sync/overwrite Chapter 0 (Prologue)
+                if slug == "chapter-0":
+                    continue
 
-        if slug in chapters_data:
-            ch_title = chapters_data[slug].get("title", "")
-            meta_title = meta.get("title", "")
+                if slug in chapter_titles:
+                    ch_title = chapter_titles[slug] or ""
+                    meta_title = meta.get("title", "")
             
-            # If metadata title is "richer" (has subtitle) and chapter title doesn't, update chapter title
-            if ":" in meta_title and ":" not in ch_title:
-                print(f"Syncing title for {slug}: {ch_title} -> {meta_title}")
-                chapters_data[slug]["title"] = meta_title
-                data_changed = True
-            # Or if metadata title is just longer/different and current is generic
-            elif meta_title != ch_title and ch_title == slug:
-                chapters_data[slug]["title"] = meta_title
-                data_changed = True
+                    # If metadata title is "richer" (has subtitle) and chapter title doesn't, update chapter title
+                    if ":" in meta_title and ":" not in ch_title:
+                        print(f"Syncing title for {slug}: {ch_title} -> {meta_title}")
+                        chapters_data.set_title(slug, meta_title)
+                        chapter_titles[slug] = meta_title
+                        data_changed = True
+                    # Or if metadata title is just longer/different and current is generic
+                    elif meta_title != ch_title and ch_title == slug:
+                        chapters_data.set_title(slug, meta_title)
+                        chapter_titles[slug] = meta_title
+                        data_changed = True
     
-    if data_changed:
-        save_json(CHAPTERS_FILE, chapters_data)
-        print("Updated chapters.json with improved titles from metadata.")
+            if data_changed:
+                print("Updated chapter store with improved titles from metadata.")
     
-    queue = asyncio.Queue()
-    for idx, slug in enumerate(ordered_slugs):
-        if limit_indices and idx not in limit_indices:
-            continue
+            pending = []
+            generated = []
+            for idx, slug in enumerate(ordered_slugs):
+                if limit_indices and idx not in limit_indices:
+                    continue
+                if retry_failed and slug not in failed_chapters:
+                    continue
             
-        meta = metadata[slug]
+                meta = metadata[slug]
         
-        # Check if already generated
-        already_generated = False
-        if slug == "chapter-807-808":
-            if "chapter-807" in chapters_data and "chapter-808" in chapters_data:
-                already_generated = True
-        elif slug in chapters_data:
-            # Check if title is just the slug (indicates retry might be needed or meta was better)
-            ch_data = chapters_data[slug]
-            if ch_data.get("title") == slug and slug.startswith("chapter-"):
+                # Check if already generated
                 already_generated = False
-            else:
-                already_generated = True
+                if slug == "chapter-807-808":
+                    if "chapter-807" in chapter_titles and "chapter-808" in chapter_titles:
+                        already_generated = True
+                elif slug in chapter_titles:
+                    # Check if title is just the slug (indicates retry might be needed or meta was better)
+                    if chapter_titles[slug] == slug and slug.startswith("chapter-"):
+                        already_generated = False
+                    else:
+                        already_generated = True
         
-        if already_generated and not force_rebuild:
-            continue
+                item = (meta['url'], slug, meta.get('title'))
+                if already_generated and not force_rebuild:
+                    generated.append(item)
+                    continue
             
-        await queue.put((meta['url'], slug, meta.get('title')))
+                pending.append(item)
 
-    if queue.empty():
-        print("No new/missing chapters to generate.")
-    else:
-        print(f"Starting generation of {queue.qsize()} items...")
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
-            
-            tasks = []
-            for _ in range(CONCURRENCY_LIMIT):
-                tasks.append(asyncio.create_task(worker(context, queue, chapters_data, semaphore)))
+            if not pending and not (check_updates and generated):
+                print(f"No new/missing chapters of {series.title} to generate.")
+            else:
+                prefetched, validators = {}, {}
+                if check_updates and generated:
+                    # Changed chapters join the normal pipeline, reusing the page the check already fetched
+                    with profiler.span("update_check"):
+                        changed, prefetched, validators = await check_for_updates(
+                            engine.page_pool, chapters_data, generated, engine.http_client(), engine.resource_stats, engine.limiter)
+                    pending += changed
 
-            await queue.join()
-            for task in tasks: task.cancel()
-            await browser.close()
+                if pending:
+                    print(f"Starting generation of {len(pending)} items of {series.title} (fetch backend: {FETCH_BACKEND})...")
+                    pipeline = engine.pipeline(chapters_data)
+                    with profiler.span("pipeline"):
+                        await pipeline.run(pending, prefetched, validators)
+                    print(pipeline.summary())
+                    update_failed_chapters(failed_chapters, pending, pipeline, series)
 
-    print("Generation complete.")
-    
-    # Download cover if needed
+                    backend_report = pipeline.backend_report
+                    if backend_report:
+                        served_by_http = sorted(s for s, b in backend_report.items() if b == "http")
+                        served_by_browser = sorted(s for s, b in backend_report.items() if b == "browser")
+                        print(f"Fetch backends: {len(served_by_http)} chapters via http, {len(served_by_browser)} via browser.")
+                        if served_by_browser and served_by_http:
+                            print(f"Browser fallback used for: {', '.join(served_by_browser)}")
+                else:
+                    print(f"No new/missing/changed chapters of {series.title} to generate.")
+
+    except BaseException:
+        chapters_data.close()
+        raise
+
+    # Normally already finished: the download started as soon as the scan found the URL
     cover_url = metadata_obj.get("cover_image_url")
     if cover_url:
-        cover_path = os.path.join(DATA_DIR, "cover.webp")
-        if not os.path.exists(cover_path) or force_rebuild:
-            print("Downloading cover image...")
-            try:
-                async with httpx.AsyncClient() as client:
-                    resp = await client.get(cover_url, follow_redirects=True)
-                    if resp.status_code == 200:
-                        with open(cover_path, "wb") as f:
-                            f.write(resp.content)
-                        print("Cover image downloaded.")
-                    else:
-                        print(f"Failed to download cover image: Status {resp.status_code}")
-            except Exception as e:
-                print(f"Error downloading cover image: {e}")
+        await cover_cache.wait(cover_url)
+    return metadata_obj, chapters_data
+
+async def main(limit_indices=None, force_rebuild=False, volume_size=VOLUME_SIZE, check_updates=False, retry_failed=False,
+               series_list=None, shards=SHARDS, fill_gaps=False):
+    """
+    Updates every series in series_list (DEFAULT_SERIES when empty) concurrently through one
+    ScrapeEngine, then builds their EPUBs. shards > 1 splits chapter generation across that many processes.
+    """
+    series_list = series_list or [DEFAULT_SERIES]
+    engine = ScrapeEngine(shards)
+    try:
+        results = await asyncio.gather(*(
+            update_series(engine, series, limit_indices, force_rebuild, check_updates, retry_failed, fill_gaps)
+            for series in series_list
+        ), return_exceptions=True)
+    finally:
+        await engine.close()
+    print("Generation complete.")
+    if any(engine.limiter.events.values()):
+        print(engine.limiter.summary())
+    print(engine.resource_stats.summary())
 
-    if chapters_data:
-        create_epub(metadata_obj, chapters_data)
+    for series, result in zip(series_list, results):
+        if isinstance(result, BaseException):
+            if len(series_list) == 1:
+                raise result
+            print(f"Error: Updating {series.title} failed: {type(result).__name__}: {result}")
+            continue
+        if result is None:
+            continue
+        metadata_obj, chapters_data = result
+        try:
+            if chapters_data:
+                with profiler.span("create_epub"):
+                    create_volumes(metadata_obj, chapters_data, incremental=not force_rebuild, volume_size=volume_size,
+                                   ranges=VOLUME_RANGES, series=series)
+        finally:
+            chapters_data.close()
 
 if __name__ == "__main__":
     import sys
@@ -781,12 +2728,38 @@ if __name__ == "__main__":
     asyncio.set_event_loop(loop)
     try:
         force = "--force" in sys.argv
-        args = [a for a in sys.argv[1:] if a != "--force"]
-        if args:
-            # If numbers are provided, treat them as indices in the ordered list for targeted testing
-            test_limit = [int(v) for v in args if v.isdigit()]
-            loop.run_until_complete(main(limit_indices=test_limit, force_rebuild=force))
-        else:
-            loop.run_until_complete(main(force_rebuild=force))
+        check_updates = "--check-updates" in sys.argv
+        epub_only = "--epub-only" in sys.argv
+        retry_failed = "--retry-failed" in sys.argv
+        fill_gaps = "--fill-gaps" in sys.argv
+        volume_size = VOLUME_SIZE
+        shards = SHARDS
+        profile_path = None
+        series_list = [DEFAULT_SERIES]
+        for a in sys.argv[1:]:
+            if a.startswith("--volume-size="):
+                volume_size = int(a.split("=", 1)[1]) or None
+            elif a.startswith("--profile="):
+                profile_path = a.split("=", 1)[1]
+            elif a.startswith("--shards="):
+                shards = max(1, int(a.split("=", 1)[1]))
+            elif a.startswith("--series="):
+                series_list = load_series(a.split("=", 1)[1], DATA_DIR, BASE_URL)
+        if "--profile" in sys.argv or profile_path:
+            profiler.enable(PROFILE_RSS_INTERVAL)
+        args = [a for a in sys.argv[1:] if not a.startswith("--")]
+        # If numbers are provided, treat them as indices in the ordered list for targeted testing
+        test_limit = [int(v) for v in args if v.isdigit()] or None
+        try:
+            if epub_only:
+                for series in series_list:
+                    build_epub_only(force_rebuild=force, volume_size=volume_size, series=series)
+            else:
+                loop.run_until_complete(main(limit_indices=test_limit, force_rebuild=force, volume_size=volume_size,
+                                             check_updates=check_updates, retry_failed=retry_failed, series_list=series_list,
+                                             shards=shards, fill_gaps=fill_gaps))
+        finally:
+            # An interrupted run still gets its report
+            finish_profile(profile_path)
     except KeyboardInterrupt:
         print("\nInterrupted.")
@@ -0,0 +1,263 @@
+import os
+import csv
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # Optional: without it no memory samples are taken
+
+# Child processes whose name contains one of these are counted as Chromium
+CHROMIUM_PROCESS_NAMES = ("chrome", "chromium", "headless_shell")
+
+class _NullSpan:
+    """What span() returns while profiling is off: one shared object, nothing recorded."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    def __init__(self, profiler, name, chapter):
+        self.profiler = profiler
+        self.name = name
+        self.chapter = chapter
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start, self.chapter, self.start)
+        return False
+
+class RssSampler:
+    """
+    Background thread sampling the RSS of this process, its Chromium children and any other
+    children (the Playwright driver, parse workers) every `interval` seconds.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def sample(self, started):
+        proc = psutil.Process()
+        python_rss = proc.memory_info().rss
+        chromium_rss = other_rss = 0
+        for child in proc.children(recursive=True):
+            try:
+                rss = child.memory_info().rss
+                name = child.name().lower()
+            except psutil.Error:
+                continue
+            if any(n in name for n in CHROMIUM_PROCESS_NAMES):
+                chromium_rss += rss
+            else:
+                other_rss += rss
+        self.samples.append({
+            "t": round(time.perf_counter() - started, 3),
+            "python_mb": round(python_rss / 1024 / 1024, 1),
+            "chromium_mb": round(chromium_rss / 1024 / 1024, 1),
+            "other_mb": round(other_rss / 1024 / 1024, 1),
+        })
+
+    def _run(self, started):
+        while not self.stop_event.is_set():
+            try:
+                self.sample(started)
+            except psutil.Error:
+                pass
+            self.stop_event.wait(self.interval)
+
+    def start(self, started):
+        if psutil is None:
+            return False
+        self.thread = threading.Thread(target=self._run, args=(started,), daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+class Profiler:
+    """
+    Timing spans, per-chapter records and memory samples for one run.
+
+    Spans are (name, chapter, start, seconds); a span with a chapter is also added to that
+    chapter's record, so a record holds the time each phase took for that chapter along with
+    any fields set with note().
+    """
+
+    def __init__(self, rss_interval=1.0):
+        self.started = time.perf_counter()
+        self.spans = []
+        self.chapters = {}
+        self.counters = {}
+        self.rss = RssSampler(rss_interval) if rss_interval else None
+
+    def span(self, name, chapter=None):
+        return _Span(self, name, chapter)
+
+    def add(self, name, seconds, chapter=None, start=None):
+        offset = (start if start is not None else time.perf_counter() - seconds) - self.started
+        self.spans.append((name, chapter, offset, seconds))
+        if chapter is not None:
+            record = self.chapters.setdefault(chapter, {})
+            record[name] = record.get(name, 0.0) + seconds
+
+    def note(self, chapter, **fields):
+        self.chapters.setdefault(chapter, {}).update(fields)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, spans):
+        """Adds spans recorded elsewhere (by collect() in a worker process)."""
+        for name, chapter, _, seconds in spans:
+            self.add(name, seconds, chapter)
+
+    def phases(self):
+        """{phase: [seconds, ...]} in first-seen order."""
+        phases = {}
+        for name, _, _, seconds in self.spans:
+            phases.setdefault(name, []).append(seconds)
+        return phases
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        elapsed = self.elapsed()
+        phases = {
+            name: {
+                "count": len(values),
+                "total_s": round(sum(values), 3),
+                "p50_s": round(percentile(values, 50), 4),
+                "p95_s": round(percentile(values, 95), 4),
+                "max_s": round(max(values), 4),
+            }
+            for name, values in self.phases().items()
+        }
+        samples = self.rss.samples if self.rss else []
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "counters": self.counters,
+            "throughput": {
+                name: round(n / elapsed, 3) for name, n in self.counters.items()
+            } if elapsed else {},
+            "phases": phases,
+            "peak_rss_mb": {
+                key: max(s[key] for s in samples) for key in ("python_mb", "chromium_mb", "other_mb")
+            } if samples else None,
+            "rss_samples": samples,
+            "chapters": self.chapters,
+        }
+
+    def write(self, json_path):
+        """Writes the report as JSON and the per-chapter records as CSV next to it. Returns the CSV path."""
+        os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        csv_path = os.path.splitext(json_path)[0] + ".csv"
+        columns = []
+        for record in self.chapters.values():
+            for key in record:
+                if key not in columns:
+                    columns.append(key)
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["slug"] + columns)
+            for slug, record in self.chapters.items():
+                writer.writerow([slug] + [_csv_value(record.get(key)) for key in columns])
+        return csv_path
+
+    def summary(self):
+        report = self.report()
+        lines = [f"Profile: {report['elapsed_s']:.1f}s"]
+        width = max((len(name) for name in report["phases"]), default=0)
+        for name, p in report["phases"].items():
+            lines.append(f"  {name:<{width}}  n={p['count']:<5} total {p['total_s']:8.2f}s  "
+                         f"p50 {p['p50_s']:.3f}s  p95 {p['p95_s']:.3f}s  max {p['max_s']:.3f}s")
+        for name, rate in report["throughput"].items():
+            lines.append(f"  {report['counters'][name]} {name} ({rate:.2f}/s)")
+        if report["peak_rss_mb"]:
+            peak = report["peak_rss_mb"]
+            lines.append(f"  Peak memory: python {peak['python_mb']:.0f} MiB, chromium {peak['chromium_mb']:.0f} MiB, "
+                         f"other {peak['other_mb']:.0f} MiB ({len(report['rss_samples'])} samples)")
+        elif self.rss is not None and psutil is None:
+            lines.append("  No memory samples (psutil is not installed).")
+        return "\n".join(lines)
+
+def _csv_value(value):
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    return "" if value is None else value
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+# The profiler of the current run; None while profiling is off
+_active = None
+
+def enable(rss_interval=1.0):
+    global _active
+    _active = Profiler(rss_interval)
+    if _active.rss is not None:
+        _active.rss.start(_active.started)
+    return _active
+
+def disable():
+    """Stops profiling and returns the finished Profiler (None if it wasn't on)."""
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None and profiler.rss is not None:
+        profiler.rss.stop()
+    return profiler
+
+def active():
+    return _active
+
+def span(name, chapter=None):
+    """with profiler.span("phase", slug): ... times the block while profiling is on, and costs one call otherwise."""
+    if _active is None:
+        return _NULL_SPAN
+    return _active.span(name, chapter)
+
+def note(chapter, **fields):
+    if _active is not None:
+        _active.note(chapter, **fields)
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+@contextmanager
+def collect():
+    """
+    Records spans into a fresh list for the duration of the block, e.g. in a worker process,
+    whose spans are passed back to the parent and added there with merge().
+    """
+    global _active
+    previous = _active
+    _active = Profiler(rss_interval=None)
+    try:
+        yield _active.spans
+    finally:
+        _active = previous
@@ -0,0 +1,104 @@
+import os
+import re
+import json
+
+class Series:
+    """
+    One series on the site: where it is listed, what goes into its EPUB, and where its
+    cache lives. Every path is inside data_dir, so series never share a chapter store,
+    a metadata file or an EPUB manifest.
+    """
+
+    def __init__(self, slug, title, author, data_dir, description="", output_epub=None, identifier=None,
+                 base_url="https://wetriedtls.com"):
+        self.slug = slug
+        self.title = title
+        self.author = author
+        self.data_dir = data_dir
+        self.description = description
+        self.output_epub = output_epub or re.sub(r"\s+", "_", re.sub(r"[^\w\s-]", "", title)).strip("_") + ".epub"
+        self.identifier = identifier or slug
+        self.base_url = base_url.rstrip("/")
+
+    def __repr__(self):
+        return f"Series({self.slug!r})"
+
+    def replace(self, **changes):
+        """A copy with some settings changed, e.g. base_url for a local fixture site."""
+        values = {k: getattr(self, k) for k in (
+            "slug", "title", "author", "data_dir", "description", "output_epub", "identifier", "base_url")}
+        values.update(changes)
+        return Series(**values)
+
+    @property
+    def path(self):
+        return f"/series/{self.slug}"
+
+    @property
+    def url(self):
+        return self.base_url + self.path
+
+    @property
+    def link_selector(self):
+        """Chapter links of this series in the chapter list."""
+        return f'a[href*="{self.path}/"]'
+
+    @property
+    def metadata_file(self):
+        return os.path.join(self.data_dir, "metadata.json")
+
+    @property
+    def chapters_db(self):
+        return os.path.join(self.data_dir, "chapters.db")
+
+    @property
+    def chapters_file(self):
+        # Legacy cache, migrated into chapters_db on first run
+        return os.path.join(self.data_dir, "chapters.json")
+
+    @property
+    def failed_chapters_file(self):
+        return os.path.join(self.data_dir, "failed_chapters.json")
+
+    @property
+    def epub_manifest_file(self):
+        return os.path.join(self.data_dir, "epub_manifest.json")
+
+    @property
+    def cover_dir(self):
+        return os.path.join(self.data_dir, "covers")
+
+    @property
+    def legacy_cover_file(self):
+        # Used as-is when the cover cache has nothing yet
+        return os.path.join(self.data_dir, "cover.webp")
+
+    def volume(self):
+        """The single-EPUB volume description create_epub builds by default."""
+        return {
+            "output_path": self.output_epub,
+            "manifest_path": self.epub_manifest_file,
+            "identifier": self.identifier,
+            "title": self.title,
+            "author": self.author,
+            "description": self.description,
+            "cover_caption": None,
+        }
+
+def load_series(path, data_root, base_url):
+    """
+    Reads a JSON list of series, each {"slug", "title", "author"} plus any other Series
+    setting. data_dir defaults to data_root/<slug>.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    series = []
+    for entry in entries:
+        entry = dict(entry)
+        entry.setdefault("data_dir", os.path.join(data_root, entry["slug"]))
+        entry.setdefault("base_url", base_url)
+        series.append(Series(**entry))
+    slugs = [s.slug for s in series]
+    if len(set(slugs)) != len(slugs):
+        raise ValueError(f"{path} lists the same series more than once")
+    return series
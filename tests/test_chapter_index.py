@@ -0,0 +1,40 @@
+from chapter_index import ChapterIndex, parse_entry
+
+def index(order):
+    return ChapterIndex({slug: {"title": slug} for slug in order}, order)
+
+def test_parse_entry():
+    assert parse_entry("chapter-12") == ("chapter", 12, 12, 0)
+    assert parse_entry("chapter-807-808") == ("chapter", 807, 808, 0)
+    assert parse_entry("chapter-12-5") == ("chapter", 12, 12, 5)
+    assert parse_entry("authors-qa-3") == ("qa", 3, 3, 0)
+    assert parse_entry("notice") is None
+
+def test_chapters_sort_by_number():
+    idx = index(["chapter-10", "chapter-9", "chapter-100", "chapter-11"])
+    assert idx.order() == ["chapter-9", "chapter-10", "chapter-11", "chapter-100"]
+
+def test_sub_chapter_sorts_after_its_chapter_without_duplicating_it():
+    idx = index(["chapter-13", "chapter-12-5", "chapter-11", "chapter-12"])
+    assert idx.order() == ["chapter-11", "chapter-12", "chapter-12-5", "chapter-13"]
+    assert idx.duplicates() == {}
+    assert idx.gaps() == {}
+
+def test_sub_chapter_does_not_hide_a_missing_chapter():
+    idx = index(["chapter-11", "chapter-12-5", "chapter-13"])
+    assert idx.gaps() == {"chapter": [12]}
+    assert idx.missing_slugs() == ["chapter-12"]
+
+def test_merged_chapter_covers_both_numbers():
+    idx = index(["chapter-806", "chapter-807-808", "chapter-809", "chapter-807"])
+    assert idx.gaps() == {}
+    assert idx.duplicates() == {"chapter": {807: ["chapter-807-808", "chapter-807"]}}
+
+def test_side_entries_stay_after_the_chapter_they_followed():
+    idx = index(["chapter-2", "authors-qa-1", "chapter-1", "chapter-3"])
+    assert idx.order() == ["chapter-1", "chapter-2", "authors-qa-1", "chapter-3"]
+
+def test_gaps_become_guessed_slugs():
+    idx = index(["chapter-1", "chapter-4", "authors-qa-1", "authors-qa-3"])
+    assert idx.gaps() == {"chapter": [2, 3], "qa": [2]}
+    assert idx.missing_slugs() == ["chapter-2", "chapter-3", "authors-qa-2"]
@@ -0,0 +1,29 @@
+import main
+from benchmarks import cleanup_bench
+
+PAGE = """<html><body><div id="reader-container">
+<p>Chapter 12: The Sword Path</p>
+<p>He said, “I’ll go.”&nbsp;Then&nbsp;left.</p>
+<p><span title="it’s a ‘tag’">She thought, 'this is it.' Then [Status Window] opened.</span></p>
+<p>Join our Discord!</p>
+</div></body></html>"""
+
+EXPECTED = (
+    "<p>He said, “I’ll go.”\xa0Then\xa0left.</p>\n"
+    "<p><span title=\"it’s a ‘tag’\">She thought, <em>‘this is it.’</em> Then <strong>[Status Window]</strong> opened.</span></p>"
+)
+
+def test_compiled_cleanup_matches_golden_corpus():
+    assert cleanup_bench.check_golden()
+
+def test_chapter_page_end_to_end():
+    chapter = main.parse_chapter_html(PAGE, "chapter-12")["chapter-12"]
+    assert chapter["title"] == "Chapter 12: The Sword Path"
+    # Attribute quotes are markup, not text: only the text between tags is cleaned
+    assert chapter["content"] == EXPECTED
+
+def test_browser_blocks_match_parsed_page():
+    # READER_BLOCKS_JS serializes U+00A0 as &nbsp;; BeautifulSoup writes it out literally
+    blocks = [dict(block, html=block["html"].replace("\xa0", "&nbsp;")) for block in main.reader_blocks(PAGE)]
+    assert any("&nbsp;" in block["html"] for block in blocks)
+    assert main.process_chapter_blocks(blocks, "chapter-12") == main.parse_chapter_html(PAGE, "chapter-12")
@@ -0,0 +1,74 @@
+import asyncio
+import random
+
+from concurrency import AdaptiveConcurrency
+
+def limiter(initial=8, minimum=2, maximum=24, **kwargs):
+    return AdaptiveConcurrency(initial, minimum, maximum, log=lambda message: None, **kwargs)
+
+def feed(limiter, latencies):
+    async def run():
+        for latency in latencies:
+            limiter.record_success(latency)
+    asyncio.run(run())
+
+def test_steady_latency_grows_the_limit_up_to_the_maximum():
+    adaptive = limiter()
+    feed(adaptive, [0.2] * 1000)
+    assert adaptive.limit == adaptive.maximum
+    assert adaptive.events["slow"] == 0
+
+def test_jitter_on_a_fast_link_does_not_shrink_the_limit():
+    rng = random.Random(1)
+    adaptive = limiter()
+    # 0.5-3.5 ms: the average is several times the fastest response, but all of it is noise
+    feed(adaptive, [0.002 + rng.uniform(-0.0015, 0.0015) for _ in range(500)])
+    assert adaptive.limit >= 8
+    assert adaptive.events["slow"] == 0
+
+def test_sustained_inflation_still_backs_off():
+    rng = random.Random(2)
+    adaptive = limiter()
+    feed(adaptive, [0.2 + rng.uniform(-0.02, 0.02) for _ in range(300)])
+    before = adaptive.limit
+    feed(adaptive, [1.0 + rng.uniform(-0.1, 0.1) for _ in range(60)])
+    assert adaptive.events["slow"] > 0
+    assert adaptive.limit < before
+
+def test_burst_of_throttling_cuts_the_limit_once():
+    adaptive = limiter(initial=16)
+    async def run():
+        for _ in range(5):
+            adaptive.record_status(429)
+    asyncio.run(run())
+    assert adaptive.limit == 8
+    assert adaptive.events["throttled"] == 5
+
+def test_in_flight_requests_never_exceed_the_limit():
+    adaptive = limiter(initial=3, minimum=1, maximum=3)
+    peak = 0
+    async def request():
+        nonlocal peak
+        async with adaptive.slot():
+            peak = max(peak, adaptive.in_flight)
+            await asyncio.sleep(0.001)
+    async def run():
+        await asyncio.gather(*(request() for _ in range(20)))
+    asyncio.run(run())
+    assert peak == 3
+    assert adaptive.in_flight == 0
+
+def test_raising_the_limit_wakes_blocked_requests():
+    adaptive = limiter(initial=2, minimum=1, maximum=4)
+    async def run():
+        await adaptive.acquire()
+        await adaptive.acquire()
+        blocked = asyncio.ensure_future(adaptive.acquire())
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        adaptive._set_limit(3, "test")
+        assert len(adaptive.wake_tasks) == 1
+        await asyncio.wait_for(blocked, 1)
+        assert adaptive.in_flight == 3
+        assert not adaptive.wake_tasks
+    asyncio.run(run())
@@ -0,0 +1,66 @@
+import zipfile
+
+from lxml import etree
+
+from epub_writer import CHAPTER_EPUB_PREFIX, OPF_NS, StreamingEpubWriter, html_fragment_to_xhtml, render_xhtml, validate_epub
+
+def build(path):
+    writer = StreamingEpubWriter(str(path), "id-1", "Book", authors=["Someone"])
+    writer.set_cover("images/cover.png", b"\x89PNG", "image/png")
+    for n in (1, 2):
+        chapter = render_xhtml(f"Chapter {n}", html_fragment_to_xhtml(f"<p>Text {n}<br>more</p>"), css_href="style/nav.css",
+                               epub_prefix=CHAPTER_EPUB_PREFIX)
+        writer.add_chapter(f"chapter_{n}", f"chapter_{n}.xhtml", f"Chapter {n}", chapter)
+    writer.close()
+
+def test_written_book_passes_validation(tmp_path):
+    path = tmp_path / "book.epub"
+    build(path)
+    assert validate_epub(str(path)) == []
+    assert not (tmp_path / "book.epub.tmp").exists()
+
+def test_spine_and_toc_follow_chapter_order(tmp_path):
+    path = tmp_path / "book.epub"
+    build(path)
+    with zipfile.ZipFile(path) as zf:
+        opf = etree.fromstring(zf.read("EPUB/content.opf"))
+        nav = zf.read("EPUB/nav.xhtml").decode()
+    idrefs = [i.get("idref") for i in opf.findall("opf:spine/opf:itemref", OPF_NS)]
+    assert idrefs[-2:] == ["chapter_1", "chapter_2"]
+    assert nav.index("chapter_1.xhtml") < nav.index("chapter_2.xhtml")
+
+def test_cover_page_is_first_in_spine_and_not_linear(tmp_path):
+    path = tmp_path / "book.epub"
+    build(path)
+    with zipfile.ZipFile(path) as zf:
+        opf = etree.fromstring(zf.read("EPUB/content.opf"))
+    itemrefs = opf.findall("opf:spine/opf:itemref", OPF_NS)
+    assert (itemrefs[0].get("idref"), itemrefs[0].get("linear")) == ("cover", "no")
+    assert [i.get("idref") for i in itemrefs[1:]] == ["nav", "chapter_1", "chapter_2"]
+
+def test_chapter_keeps_epub_prefix(tmp_path):
+    path = tmp_path / "book.epub"
+    build(path)
+    with zipfile.ZipFile(path) as zf:
+        html = etree.fromstring(zf.read("EPUB/chapter_1.xhtml"))
+    assert html.get("{http://www.idpf.org/2007/ops}prefix") == CHAPTER_EPUB_PREFIX
+
+def test_copied_chapter_is_identical(tmp_path):
+    old = tmp_path / "old.epub"
+    build(old)
+    new = tmp_path / "new.epub"
+    writer = StreamingEpubWriter(str(new), "id-1", "Book")
+    with zipfile.ZipFile(old) as source:
+        assert writer.copy_chapter(source, "chapter_1", "chapter_1.xhtml", "Chapter 1")
+        assert not writer.copy_chapter(source, "chapter_3", "chapter_3.xhtml", "Chapter 3")
+    writer.close()
+    with zipfile.ZipFile(old) as a, zipfile.ZipFile(new) as b:
+        assert a.read("EPUB/chapter_1.xhtml") == b.read("EPUB/chapter_1.xhtml")
+    assert validate_epub(str(new)) == []
+
+def test_broken_xhtml_is_reported(tmp_path):
+    path = tmp_path / "book.epub"
+    writer = StreamingEpubWriter(str(path), "id-1", "Book")
+    writer.add_chapter("chapter_1", "chapter_1.xhtml", "Chapter 1", b"<html><p>unclosed</html>")
+    writer.close()
+    assert any("chapter_1.xhtml" in problem for problem in validate_epub(str(path)))
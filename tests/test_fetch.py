@@ -0,0 +1,93 @@
+import asyncio
+
+import httpx
+import pytest
+
+import main
+
+READER_PAGE = '<div id="reader-container"><p>Chapter 1: Start</p><p>Text</p></div>'
+
+class NoBrowser:
+    async def acquire(self):
+        raise AssertionError("fell back to the browser")
+
+def fetch(status, text="busy"):
+    return fetch_with(lambda request: httpx.Response(status, text=text))
+
+def fetch_with(handler):
+    async def run():
+        report = {}
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport) as client:
+            raw = await main.fetch_chapter_raw(
+                NoBrowser(), "http://site/series/s/chapter-1", "chapter-1", client, backend_report=report)
+        return raw, report
+    return asyncio.run(run())
+
+def test_server_rendered_chapter_skips_the_browser(monkeypatch):
+    monkeypatch.setattr(main, "FETCH_BACKEND", "auto")
+    raw, report = fetch(200, READER_PAGE)
+    assert raw == ("html", READER_PAGE)
+    assert report == {"chapter-1": "http"}
+
+def test_missing_reader_falls_back_to_browser(monkeypatch):
+    monkeypatch.setattr(main, "FETCH_BACKEND", "auto")
+    with pytest.raises(AssertionError, match="fell back to the browser"):
+        fetch(200, "<html></html>")
+
+def test_http_backend_never_opens_the_browser(monkeypatch):
+    monkeypatch.setattr(main, "FETCH_BACKEND", "http")
+    assert fetch(200, "<html></html>") == (None, {})
+
+@pytest.mark.parametrize("status", sorted(main.THROTTLE_STATUSES))
+def test_throttling_status_is_raised_not_retried_in_browser(status, monkeypatch):
+    monkeypatch.setattr(main, "FETCH_BACKEND", "auto")
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(status)
+
+def test_missing_page_is_not_retried_in_browser(monkeypatch):
+    monkeypatch.setattr(main, "FETCH_BACKEND", "auto")
+    assert fetch(404) == (None, {})
+
+def test_server_error_is_raised_not_retried_in_browser(monkeypatch):
+    monkeypatch.setattr(main, "FETCH_BACKEND", "auto")
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(500)
+
+def test_connection_error_falls_back_to_browser(monkeypatch):
+    monkeypatch.setattr(main, "FETCH_BACKEND", "auto")
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+    with pytest.raises(AssertionError, match="fell back to the browser"):
+        fetch_with(refuse)
+
+@pytest.mark.parametrize("html", [
+    '<div id="reader-container">', "<div id='reader-container'>", "<div id=reader-container>",
+    '<div class="x" id = "reader-container" >',
+])
+def test_reader_container_in_any_attribute_form(html):
+    assert main.html_has_reader(html)
+
+def test_other_ids_are_not_the_reader():
+    assert not main.html_has_reader('<div id="reader-container-ad">')
+    assert not main.html_has_reader('<div id="reader">reader-container</div>')
+
+def probe(status, text="<html></html>"):
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(status, text=text))
+        limiter = main.AdaptiveConcurrency(2, 1, 4, log=lambda message: None)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await main.probe_chapter(client, "http://site/series/s/chapter-5", limiter)
+    return asyncio.run(run())
+
+def test_probe_treats_404_as_absent():
+    assert probe(404) == ("absent", None, None)
+
+def test_probe_returns_server_rendered_page():
+    status, raw, _ = probe(200, READER_PAGE)
+    assert status == "found"
+    assert raw[0] == "html"
+
+def test_probe_leaves_other_answers_to_the_pipeline():
+    assert probe(503)[0] == "unknown"
+    assert probe(200)[:2] == ("found", None)
@@ -0,0 +1,35 @@
+import os
+
+import font_subset
+import main
+
+STYLE = open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "style.css"), encoding="utf-8").read()
+
+def book_codepoints(contents):
+    glyphs = main.new_glyph_usage({"title": "Book", "cover_caption": None})
+    for n, content in enumerate(contents):
+        entry = {"slug": f"chapter-{n}", "title": f"Chapter {n}", "release_date": "01/02/2025"}
+        main.record_glyphs(glyphs, entry, *main.chapter_chars(entry, None, content, None))
+    return font_subset.font_codepoints(STYLE, glyphs)
+
+def test_heading_chars():
+    content = '<p>Body ü</p><h2 class="x">Sect 天</h2><H3>é</H3>'
+    assert font_subset.heading_chars(content) == "".join(sorted(set("Sect 天é")))
+
+def test_in_body_heading_keeps_its_glyphs_in_the_heading_fonts():
+    codepoints = book_codepoints(['<p>Plain text.</p><h2>Ω Realm 天</h2>'])
+    for heading_font in ("FoglihtenNo07calt.otf", "Huakang.ttf"):
+        assert {ord("Ω"), ord("天")} <= codepoints[heading_font]
+
+def test_body_only_text_stays_out_of_the_heading_fonts():
+    codepoints = book_codepoints(['<p>Only in the body: 龍</p>'])
+    assert ord("龍") not in codepoints["FoglihtenNo07calt.otf"]
+    assert ord("龍") in codepoints["Literata.ttf"]
+
+def test_reused_chapter_without_heading_chars_is_read_again():
+    chapters = {"chapter-1": {"content": "<h2>Ω</h2>"}}
+    entry = {"slug": "chapter-1"}
+    # A manifest written before heading_chars existed
+    chars, heading_chars = main.chapter_chars(entry, {"chars": "Ω"}, None, chapters)
+    assert heading_chars == "Ω"
+    assert main.chapter_chars(entry, {"chars": "Ω", "heading_chars": "Ω"}, None, None) == ("Ω", "Ω")
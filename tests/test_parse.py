@@ -0,0 +1,33 @@
+import pytest
+
+import main
+
+PAGE = """<html><head><title>Chapter 3</title></head><body>
+<nav><p>Chapter 99: Not this one</p></nav>
+<div id="reader-container">
+<p>Chapter 3: The Sect</p>
+<p>He said “wait” — and left.</p>
+<h2>Part Two</h2>
+<p>Join our Discord for more!</p>
+</div>
+<footer><p>Next chapter</p></footer>
+</body></html>"""
+
+@pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+def test_only_the_reader_container_is_parsed(parser, monkeypatch):
+    monkeypatch.setattr(main, "HTML_PARSER", parser)
+    chapter = main.parse_chapter_html(PAGE, "chapter-3")["chapter-3"]
+    assert chapter["title"].startswith("Chapter 3")
+    assert "Part Two" in chapter["content"]
+    assert "Chapter 99" not in chapter["content"]
+    assert "Discord" not in chapter["content"]
+
+def test_parsers_agree(monkeypatch):
+    results = []
+    for parser in ("lxml", "html.parser"):
+        monkeypatch.setattr(main, "HTML_PARSER", parser)
+        results.append(main.parse_chapter_html(PAGE, "chapter-3"))
+    assert results[0] == results[1]
+
+def test_page_without_reader_is_none():
+    assert main.parse_chapter_html("<html><body><p>Loading</p></body></html>", "chapter-3") is None
@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import main
+
+class TimedOut(Exception):
+    pass
+
+async def settle(delay, timeout):
+    """Resolves after `delay` seconds, or fails like a Playwright wait at `timeout` ms (None: never resolves)."""
+    if delay is None or delay * 1000 > timeout:
+        await asyncio.sleep(timeout / 1000)
+        raise TimedOut()
+    await asyncio.sleep(delay)
+
+class Button:
+    def __init__(self, visible_after):
+        self.visible_after = visible_after
+        self.start = time.monotonic()
+
+    async def wait_for(self, state, timeout):
+        await settle(self.visible_after, timeout)
+
+    async def is_visible(self):
+        return self.visible_after is not None and time.monotonic() - self.start >= self.visible_after
+
+class Page:
+    def __init__(self, hydrated_after):
+        self.hydrated_after = hydrated_after
+
+    async def wait_for_function(self, js, arg, timeout):
+        await settle(self.hydrated_after, timeout)
+
+def race(visible_after, hydrated_after):
+    async def run():
+        start = time.monotonic()
+        shown = await main.popup_or_ready(Page(hydrated_after), Button(visible_after))
+        return shown, time.monotonic() - start
+    return asyncio.run(run())
+
+def test_popup_wins_the_race(monkeypatch):
+    monkeypatch.setattr(main, "POPUP_TIMEOUT_MS", 1000)
+    shown, elapsed = race(visible_after=0.05, hydrated_after=0.3)
+    assert shown
+    assert elapsed < 0.2
+
+def test_hydrated_page_without_popup_returns_at_once(monkeypatch):
+    monkeypatch.setattr(main, "POPUP_TIMEOUT_MS", 1000)
+    shown, elapsed = race(visible_after=None, hydrated_after=0.05)
+    assert not shown
+    assert elapsed < 0.2
+
+def test_nothing_settles_costs_one_timeout(monkeypatch):
+    monkeypatch.setattr(main, "POPUP_TIMEOUT_MS", 200)
+    shown, elapsed = race(visible_after=None, hydrated_after=None)
+    assert not shown
+    assert elapsed < 0.35
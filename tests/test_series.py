@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+import main
+from series import Series, load_series
+
+def write(path, entries):
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    return str(path)
+
+def test_each_series_gets_its_own_data_dir(tmp_path):
+    path = write(tmp_path / "series.json", [
+        {"slug": "one", "title": "One: The Book", "author": "A"},
+        {"slug": "two", "title": "Two", "author": "B", "data_dir": str(tmp_path / "custom")},
+    ])
+    one, two = load_series(path, str(tmp_path / "data"), "http://site/")
+    assert one.data_dir == str(tmp_path / "data" / "one")
+    assert two.data_dir == str(tmp_path / "custom")
+    assert one.chapters_db != two.chapters_db
+    assert one.output_epub == "One_The_Book.epub"
+    assert one.url == "http://site/series/one"
+
+def test_duplicate_series_is_rejected(tmp_path):
+    entry = {"slug": "one", "title": "One", "author": "A"}
+    with pytest.raises(ValueError):
+        load_series(write(tmp_path / "series.json", [entry, entry]), str(tmp_path), "http://site")
+
+def test_replace_keeps_other_settings():
+    series = Series("one", "One", "A", "data/one", description="Blurb")
+    local = series.replace(base_url="http://127.0.0.1:8000")
+    assert local.url == "http://127.0.0.1:8000/series/one"
+    assert (local.description, local.data_dir) == ("Blurb", "data/one")
+
+def test_pipelines_share_one_request_budget(monkeypatch):
+    monkeypatch.setattr(main, "FETCH_BACKEND", "browser")
+    engine = main.ScrapeEngine()
+    try:
+        first, second = engine.pipeline({}), engine.pipeline({})
+        assert first.limiter is second.limiter is engine.limiter
+        assert first.breaker is second.breaker is engine.breaker
+    finally:
+        if engine.executor is not None:
+            engine.executor.shutdown()
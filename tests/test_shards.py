@@ -0,0 +1,90 @@
+import main
+
+class DeadProcess:
+    exitcode = -9
+
+    def join(self):
+        pass
+
+class ClosedConn:
+    def close(self):
+        pass
+
+def exited_shard(pipeline, pending):
+    shard_id = len(pipeline.workers)
+    pipeline.workers[shard_id] = {"process": DeadProcess(), "conn": ClosedConn(), "closed": True, "report": None,
+                                  "pending": {slug: ("http://site/" + slug, slug, None) for slug in pending}}
+    return shard_id
+
+def test_each_shard_gets_a_share_of_the_budget():
+    limiter = main.AdaptiveConcurrency(8, 2, 24, 12, log=lambda message: None)
+    pipeline = main.ShardedPipeline(chapters_data=None, shards=3, limiter=limiter)
+    assert pipeline.limits == (3, 1, 8, 4.0)
+
+def test_unfinished_chapters_of_a_dead_shard_go_to_a_new_one(monkeypatch):
+    monkeypatch.setattr(main, "SHARD_RESTARTS", 1)
+    pipeline = main.ShardedPipeline(chapters_data=None, shards=2)
+    started = []
+    monkeypatch.setattr(pipeline, "_start_shard", started.append)
+    pipeline._shard_exited(exited_shard(pipeline, ["chapter-1", "chapter-3"]))
+    assert [slug for _, slug, _ in started[0]] == ["chapter-1", "chapter-3"]
+    assert pipeline.restarts == 1
+    # Out of restarts: the chapters are failed instead
+    pipeline._shard_exited(exited_shard(pipeline, ["chapter-5"]))
+    assert len(started) == 1
+    assert pipeline.failed == ["chapter-5"]
+    assert "code -9" in pipeline.errors["chapter-5"]
+
+def test_shard_sink_sends_chapters_to_the_coordinator():
+    class Conn:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, message):
+            self.sent.append(message)
+
+    conn = Conn()
+    sink = main.ShardSink(1, conn)
+    sink.backend_report["chapter-1"] = "http"
+    sink.update({"chapter-1": {"content": "x"}, "chapter-2": {"content": "y"}}, {"chapter-1": "a", "chapter-2": "b"})
+    kind, shard_id, chapters, fingerprints, backends = conn.sent[0]
+    assert (kind, shard_id, len(chapters)) == ("chapters", 1, 2)
+    assert backends == {"chapter-1": "http", "chapter-2": "prefetched"}
+
+def test_resource_stats_merge():
+    total, shard = main.ResourceStats(), main.ResourceStats()
+    total.record_page_load(1.0)
+    shard.record_page_load(2.0)
+    shard.allowed_requests = 3
+    shard.blocked_by_type["image"] = 4
+    total.merge(shard)
+    assert total.page_loads == [1.0, 2.0]
+    assert total.allowed_requests == 3
+    assert total.blocked_by_type == {"image": 4}
+
+def _shard_pool_settings(settings, conn):
+    # Runs in a spawned process, the way run_shard does
+    main.apply_shard_settings(settings)
+    pool = main.shard_engine(None, (1, 1, 2, None)).page_pool
+    conn.send((pool.recycle_after, pool.rss_limit))
+    conn.close()
+
+def test_shard_page_pool_uses_coordinator_settings():
+    pipeline = main.ShardedPipeline(chapters_data=None, shards=2)
+    settings = {name: getattr(main, name) for name in main.SHARD_SETTINGS}
+    settings.update(PAGE_RECYCLE_AFTER=7, CONTEXT_RSS_LIMIT_MB=99)
+    receiver, sender = pipeline.context.Pipe(duplex=False)
+    process = pipeline.context.Process(target=_shard_pool_settings, args=(settings, sender))
+    process.start()
+    sender.close()
+    recycle_after, rss_limit = receiver.recv()
+    process.join()
+    assert recycle_after == 7
+    assert rss_limit == 99 * 1024 * 1024
+
+def test_page_pool_reads_settings_at_construction(monkeypatch):
+    monkeypatch.setattr(main, "PAGE_RECYCLE_AFTER", 11)
+    monkeypatch.setattr(main, "CONTEXT_RSS_LIMIT_MB", 0)
+    pool = main.PagePool(session=None)
+    assert pool.recycle_after == 11
+    assert pool.rss_limit == 0